@@ -1,5 +1,9 @@
 from flask import Flask
 from config import Config  # Import Config class from config.py
+from app.logging_config import setup_logging
+
+# Configure logging before anything else logs (level, format and destination come from Config)
+setup_logging()
 
 # Initialize the Flask app
 app = Flask(__name__)
@@ -0,0 +1,150 @@
+"""
+Comparable sales: the k most similar past sales in the same zipcode as a property.
+
+Sales come from data/processed/cleaned_dataset_iqr.csv. Each zipcode gets its own KD-tree
+over standardized sqft_living, bedrooms, bathrooms, sqft_lot and house_age (z-scores over the
+whole dataset, so one unit means the same in every zipcode). The index is built on first use,
+saved to data/processed/comps_index.pkl and reloaded from there while the dataset file is
+unchanged. Rebuild it explicitly with:
+
+    python -m app.comps
+"""
+import logging
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from utils import atomic_write
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_PATH = os.path.join(BASE_DIR, "../data/processed/cleaned_dataset_iqr.csv")
+COMPS_PATH = os.path.join(BASE_DIR, "../data/processed/comps_index.pkl")
+
+# Bump when the index layout changes so stale files are rebuilt
+COMPS_VERSION = 1
+COMP_FEATURES = ("sqft_living", "no_of_bedrooms", "no_of_bathrooms", "sqft_lot", "house_age")
+SALE_COLUMNS = ("price",) + COMP_FEATURES + ("no_of_floors",)
+
+def dataset_signature(path):
+    """Size and modification time of the dataset; a stored index is reused only while they match."""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+class ComparableSalesIndex:
+    """Per-zipcode KD-trees over standardized sale features, plus the sales themselves in columnar arrays.
+
+    Sales are sorted by zipcode, so each zipcode's sales are one contiguous slice and a tree's
+    point indices map straight to rows of the sale arrays.
+    """
+
+    def __init__(self, sales, signature=None):
+        # sales: {column: array} for SALE_COLUMNS plus "zipcode"
+        order = np.argsort(sales["zipcode"], kind="stable")
+        zipcodes = np.asarray(sales["zipcode"])[order]
+        self.sales = {column: np.asarray(sales[column])[order] for column in SALE_COLUMNS}
+        self.signature = signature
+        self.version = COMPS_VERSION
+
+        points = np.column_stack([self.sales[column] for column in COMP_FEATURES]).astype(np.float64)
+        self.mean = points.mean(axis=0)
+        self.scale = points.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        points = (points - self.mean) / self.scale
+
+        # One tree per zipcode over its slice of the sorted sales
+        unique, starts = np.unique(zipcodes, return_index=True)
+        ends = np.append(starts[1:], len(zipcodes))
+        self.trees = {
+            int(zip_code): (int(start), cKDTree(points[start:end]))
+            for zip_code, start, end in zip(unique, starts, ends)
+        }
+
+    @classmethod
+    def from_csv(cls, path=DATASET_PATH):
+        import pandas as pd  # Only needed when the index is (re)built
+        df = pd.read_csv(path, usecols=list(SALE_COLUMNS) + ["zipcode"])
+        return cls({column: df[column].to_numpy() for column in df.columns}, dataset_signature(path))
+
+    def __len__(self):
+        return len(self.sales["price"])
+
+    def query(self, features, k=10):
+        """Returns up to k sales in features['zipcode'], most similar first, each with its distance.
+
+        Returns None when the zipcode has no sales on record.
+        """
+        entry = self.trees.get(int(features["zipcode"]))
+        if entry is None:
+            return None
+        start, tree = entry
+        point = (np.array([float(features[column]) for column in COMP_FEATURES]) - self.mean) / self.scale
+        k = min(k, tree.n)
+        distances, indices = tree.query(point, k=k)
+
+        # Gather whole columns at once rather than one value at a time
+        rows = start + np.atleast_1d(indices)
+        columns = [self.sales[column][rows].tolist() for column in SALE_COLUMNS]
+        return [dict(zip(SALE_COLUMNS, values), distance=round(distance, 4))
+                for values, distance in zip(zip(*columns), np.atleast_1d(distances).tolist())]
+
+def write_index(index, path=COMPS_PATH):
+    """Writes the index atomically, so concurrent readers never see a partial file."""
+    with atomic_write(path) as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+class ComparableSales:
+    """Lazily loaded comparable-sales index, shared by all requests of a process."""
+
+    def __init__(self, path=COMPS_PATH, dataset_path=DATASET_PATH):
+        self.path = path
+        self.dataset_path = dataset_path
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        signature = dataset_signature(self.dataset_path)
+        try:
+            with open(self.path, "rb") as f:
+                stored = pickle.load(f)
+            if stored.version == COMPS_VERSION and stored.signature == signature:
+                return stored
+            logging.warning("Comparable sales index in %s is out of date, rebuilding", self.path)
+        except (OSError, pickle.UnpicklingError, AttributeError, EOFError) as e:
+            logging.warning("Could not read the comparable sales index (%s), rebuilding", e)
+
+        start = time.perf_counter()
+        index = ComparableSalesIndex.from_csv(self.dataset_path)
+        logging.info("Built comparable sales index over %d sales in %.2fs", len(index), time.perf_counter() - start)
+        try:
+            write_index(index, self.path)
+        except OSError as e:
+            logging.error("Could not save the comparable sales index: %s", e)
+        return index
+
+    @property
+    def index(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._load()
+        return self._index
+
+    def query(self, features, k=10):
+        return self.index.query(features, k)
+
+# Shared index used by the routes
+comparable_sales = ComparableSales()
+
+def main():
+    # Pickle the class as app.comps.ComparableSalesIndex, not __main__.ComparableSalesIndex
+    from app import comps
+    index = comps.ComparableSalesIndex.from_csv()
+    comps.write_index(index)
+    print(f"Indexed {len(index)} sales in {len(index.trees)} zipcodes to {os.path.normpath(COMPS_PATH)}")
+
+if __name__ == "__main__":
+    main()
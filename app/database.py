@@ -1,28 +1,194 @@
 import sqlite3
 import os
+import hashlib
+import math
+import threading
+import time
+import numpy as np
 import pytz
 import logging
-import operator  # Safer condition handling
-from datetime import datetime
-
-# Define safe operator mappings
-OPERATORS = {
-    "<": operator.lt,
-    "<=": operator.le,
-    "=": operator.eq,
-    "==": operator.eq,
-    "!=": operator.ne,
-    ">": operator.gt,
-    ">=": operator.ge
-}
-
-# Configure logging
-logging.basicConfig(filename="database.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+from datetime import datetime, timedelta
+from config import Config
+from app.recommendations import OPERATORS, RuleEngine  # OPERATORS re-exported for existing imports
+from app.trends import get_location_type, location_trends  # ZIP market trends (loaded on first use)
+from app.metrics import queries_written, stage_duration
 
 # Get the absolute path of the project root
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  
-DB_DIR = os.path.join(BASE_DIR, "../data")  
-DB_PATH = os.path.join(DB_DIR, "housing.db")  
+DB_PATH = Config.DATABASE_PATH or os.path.join(BASE_DIR, "../data/housing.db")
+DB_DIR = os.path.dirname(DB_PATH)
+
+class ConnectionPool:
+    """Thread-safe SQLite connection pool: each thread reuses one long-lived connection.
+
+    Connections run in WAL mode so readers never block the writer, with relaxed
+    synchronous/cache_size pragmas and a per-connection prepared statement cache.
+    A forked worker process opens its own connections instead of sharing the parent's.
+    """
+
+    def __init__(self, db_path, timeout=30.0, cache_size_kib=16384, cached_statements=128):
+        self.db_path = db_path
+        self.timeout = timeout  # Seconds to wait on a locked database before raising
+        self.cache_size_kib = cache_size_kib
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._connections = []  # (thread, connection) pairs opened in this process
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints, no fsync per commit
+        conn.execute(f"PRAGMA cache_size=-{self.cache_size_kib}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def connection(self):
+        """Returns the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, "connection", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = self._connect()
+        self._local.connection = conn
+        self._local.pid = os.getpid()
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked child: the inherited connections belong to the parent process
+                self._pid = os.getpid()
+                self._connections = []
+            # Close connections left behind by threads that have exited
+            alive = []
+            for thread, other in self._connections:
+                if thread.is_alive():
+                    alive.append((thread, other))
+                else:
+                    other.close()
+            alive.append((threading.current_thread(), conn))
+            self._connections = alive
+        return conn
+
+    def close_all(self):
+        """Closes every connection opened by this process (e.g. at shutdown)."""
+        with self._lock:
+            if self._pid == os.getpid():
+                for _, conn in self._connections:
+                    conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+# Shared pool used by every database function in this module
+pool = ConnectionPool(DB_PATH)
+
+# Timestamps are stored in UTC and shown in Config.DISPLAY_TIMEZONE
+DISPLAY_TIMEZONE = pytz.timezone(Config.DISPLAY_TIMEZONE)
+
+def fixed_utc_offset_minutes(timezone):
+    """Returns the zone's current UTC offset in minutes if it is the same all year (no DST), else None."""
+    year = datetime.now().year
+    offsets = {timezone.utcoffset(datetime(year, month, 1)) for month in (1, 4, 7, 10)}
+    if len(offsets) != 1:
+        return None
+    return int(offsets.pop().total_seconds() // 60)
+
+# For fixed-offset zones (e.g. Africa/Nairobi, UTC+3) SQLite shifts the timestamps itself, so rows come
+# back ready to display; zones with DST fall back to converting each row in Python
+DISPLAY_OFFSET_MINUTES = fixed_utc_offset_minutes(DISPLAY_TIMEZONE)
+if DISPLAY_OFFSET_MINUTES is not None:
+    TIMESTAMP_SQL = f"datetime(timestamp, '{DISPLAY_OFFSET_MINUTES:+d} minutes') AS timestamp"
+    DAY_SQL = f"date(timestamp, '{DISPLAY_OFFSET_MINUTES:+d} minutes')"
+else:
+    TIMESTAMP_SQL = "timestamp"
+    DAY_SQL = "timestamp"  # Converted to the display day in Python
+
+QUERY_SELECT_SQL = f"SELECT id, sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, zipcode, purpose, predicted_price, model_version, {TIMESTAMP_SQL} FROM queries"
+
+# Statements are kept as constants so each pooled connection prepares them once and reuses them
+# Inserts a row unless an identical one was stored within the last second. The lookup goes through
+# idx_queries_hash (query_hash, timestamp), so its cost does not grow with the size of the table.
+INSERT_QUERY_SQL = """
+    INSERT INTO queries (sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, 
+                         no_of_floors, house_age, zipcode, purpose, predicted_price, query_hash, model_version)
+    SELECT :sqft_living, :no_of_bedrooms, :no_of_bathrooms, :sqft_lot,
+           :no_of_floors, :house_age, :zipcode, :purpose, :predicted_price, :query_hash, :model_version
+    WHERE NOT EXISTS (
+        SELECT 1 FROM queries
+        WHERE query_hash = :query_hash AND timestamp >= datetime('now', '-1 second')
+        AND sqft_living = :sqft_living AND no_of_bedrooms = :no_of_bedrooms AND no_of_bathrooms = :no_of_bathrooms
+        AND sqft_lot = :sqft_lot AND no_of_floors = :no_of_floors AND house_age = :house_age
+        AND zipcode = :zipcode AND purpose = :purpose AND predicted_price = :predicted_price
+    )
+"""
+
+QUERY_COLUMNS = ("sqft_living", "no_of_bedrooms", "no_of_bathrooms", "sqft_lot", "no_of_floors", "house_age", "zipcode", "purpose", "predicted_price")
+HASHED_COLUMN_COUNT = len(QUERY_COLUMNS)  # model_version may follow the row values, but is not part of the content hash
+
+SELECT_ALL_QUERIES_SQL = f"{QUERY_SELECT_SQL} ORDER BY id DESC"
+
+def query_hash(sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, zipcode, purpose, predicted_price):
+    """Returns a signed 64-bit content hash of a query row, matching how SQLite stores the values."""
+    try:
+        zipcode = int(zipcode)  # INTEGER affinity stores '98001' as 98001
+    except (TypeError, ValueError):
+        zipcode = str(zipcode)
+    key = repr((float(sqft_living), float(no_of_bedrooms), float(no_of_bathrooms), float(sqft_lot),
+                float(no_of_floors), float(house_age), zipcode, str(purpose), float(predicted_price)))
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big", signed=True)
+
+def query_params(values):
+    """Builds the named parameters for INSERT_QUERY_SQL from a row of QUERY_COLUMNS values, optionally followed by the model version."""
+    params = dict(zip(QUERY_COLUMNS, values))
+    params["query_hash"] = query_hash(*values[:HASHED_COLUMN_COUNT])
+    params["model_version"] = values[HASHED_COLUMN_COUNT] if len(values) > HASHED_COLUMN_COUNT else None
+    return params
+
+def migrate_database(conn, chunk_size=10000):
+    """Brings an existing queries table up to date: adds and backfills query_hash, adds model_version, then indexes them."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(queries)")}
+    if "query_hash" not in columns:
+        conn.execute("ALTER TABLE queries ADD COLUMN query_hash INTEGER")
+        logging.info("Added query_hash column to queries")
+    if "model_version" not in columns:
+        # Rows stored before versioning keep NULL: the model that produced them is unknown
+        conn.execute("ALTER TABLE queries ADD COLUMN model_version TEXT")
+        logging.info("Added model_version column to queries")
+
+    # Backfill in id order and in chunks, so large histories never sit in memory at once
+    last_id = 0
+    while True:
+        rows = conn.execute("""
+            SELECT id, sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, zipcode, purpose, predicted_price
+            FROM queries WHERE id > ? AND query_hash IS NULL ORDER BY id LIMIT ?
+        """, (last_id, chunk_size)).fetchall()
+        if not rows:
+            break
+        with conn:
+            conn.executemany("UPDATE queries SET query_hash = ? WHERE id = ?", [(query_hash(*row[1:]), row[0]) for row in rows])
+        last_id = rows[-1][0]
+        logging.info("Backfilled query_hash up to id %s", last_id)
+
+    # Duplicate suppression looks rows up by hash, then by recency
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_queries_hash ON queries (query_hash, timestamp);")
+
+    # Admin filters: each index ends in id so keyset pagination (ORDER BY id DESC) can walk it directly
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_queries_zipcode_id ON queries (zipcode, id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_queries_purpose_timestamp ON queries (purpose, timestamp, id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_queries_timestamp_id ON queries (timestamp, id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_queries_price_id ON queries (predicted_price, id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_queries_model_version_id ON queries (model_version, id);")
+
+    # Fold in the rows the aggregate tables have not seen yet (all of them the first time), in chunks
+    conn.commit()
+    reset_query_stats_if_stale(conn)
+    while refresh_query_stats(conn, limit=chunk_size) == chunk_size:
+        pass
+
+    # Refresh planner statistics so range filters pick an index only when it is selective
+    conn.execute("PRAGMA optimize")
+    conn.commit()
 
 def create_database():
     """Creates the SQLite database and required tables if they do not exist."""
@@ -30,7 +196,7 @@ def create_database():
         if not os.path.exists(DB_DIR):
             os.makedirs(DB_DIR)
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = pool.connection()
         cursor = conn.cursor()
 
         # Create queries table (stores user inputs and predictions)
@@ -46,7 +212,9 @@ def create_database():
                 zipcode INTEGER NOT NULL,
                 purpose TEXT NOT NULL,
                 predicted_price REAL NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP  
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                query_hash INTEGER,  -- Content hash of the row, for duplicate suppression
+                model_version TEXT  -- Model registry version that made the prediction
             )
         """)
 
@@ -64,8 +232,13 @@ def create_database():
             )
         """)
 
+        # Aggregates of the queries table for the dashboard charts (see refresh_query_stats)
+        cursor.executescript(QUERY_STATS_SCHEMA)
+
         conn.commit()
-        conn.close()
+
+        # Upgrade tables created by older versions
+        migrate_database(conn)
         logging.info("Database and tables created successfully at %s", DB_PATH)
 
     except Exception as e:
@@ -73,23 +246,6 @@ def create_database():
 
 
 
-import random
-import logging
-
-# Define home location categories based on ZIP ranges
-def get_location_type(zip_code):
-    """Categorizes ZIP codes into Urban, Suburban, or Rural."""
-    urban_zips = list(range(98001, 98200))  # Covers Seattle, Bellevue, and Tacoma (high-density urban areas)
-    suburban_zips = list(range(98201, 98550))  # Covers Everett, Olympia, and surrounding suburban regions
-    rural_zips = list(range(98551, 99001))  # Covers Yakima, Goldendale, and eastern WA rural areas
-
-    if zip_code in urban_zips:
-        return "Urban"
-    elif zip_code in suburban_zips:
-        return "Suburban"
-    else:
-        return "Rural"
-
 # Expert-driven home pricing rules
 features = {
     "sqft_living": [
@@ -119,91 +275,34 @@ features = {
     ]
 }
 
-# Generate dynamic ZIP-based market trends
-def generate_location_trends(start_zip=98001, end_zip=99001):
-    location_trends = {}
-
-    for zip_code in range(start_zip, end_zip + 1):
-        location_type = get_location_type(zip_code)
-        median_price = random.randint(250000, 750000)
-        price_trend = random.choice(["up", "down", "stable"])
-        competition = random.choice(["high", "medium", "low"])
-        median_days_on_market = random.randint(20, 120)
-
-        suggestions = []
-
-        # Market trend insights
-        if price_trend == "up":
-            suggestions.append("📈 Home values in this area are currently rising, making it a great time to invest in property for long-term growth.")
-        elif price_trend == "down":
-            suggestions.append("📉 The market in this area is declining. Sellers should consider pricing their homes aggressively to attract buyers.")
-        else:
-            suggestions.append("⚖️ The market is stable, offering a balanced environment for both buyers and sellers with steady long-term investment potential.")
-
-        # Competition-based advice
-        if competition == "high":
-            suggestions.append("🔥 The market is highly competitive, with multiple offers expected. Buyers should be prepared to act quickly and make strong offers.")
-        elif competition == "medium":
-            suggestions.append("🤝 The market has fair competition, providing opportunities for negotiation between buyers and sellers.")
-        else:
-            suggestions.append("❄️ The market is slow, with fewer buyers. Sellers may need to offer incentives such as closing cost assistance to attract interest.")
-
-        # Luxury vs. Affordable Market
-        if median_price > 600000:
-            suggestions.append("💎 This is a high-end area! Staging your home and investing in premium upgrades can help attract top-tier buyers.")
-        elif median_price < 350000:
-            suggestions.append("🏠 This is an affordable market, making it an excellent opportunity for first-time buyers to enter the housing market.")
-
-        # Location-specific insights
-        if location_type == "Urban":
-            suggestions.append("🏙️ Urban areas are ideal for condos and townhomes, which tend to have faster resale times due to high demand.")
-        elif location_type == "Suburban":
-            suggestions.append("🏡 Suburban zones are highly desirable for families, with homes featuring yards and proximity to schools being particularly attractive.")
-        else:
-            suggestions.append("🌄 Rural markets appeal to niche buyers looking for large lots and a quiet lifestyle. Highlight the tranquility and space your property offers.")
-
-        # Smart Timing Advice
-        suggestions.append(f"⏳ On average, homes in this area take approximately {median_days_on_market} days to sell. Adjust your strategy accordingly.")
-
-        location_trends[str(zip_code)] = {
-            "median_price": median_price,
-            "price_trend": price_trend,
-            "competition": competition,
-            "location_type": location_type,
-            "median_days_on_market": median_days_on_market,
-            "suggestions": suggestions
-        }
-
-    return location_trends
-
-# Precompute location trends
-location_trends = generate_location_trends()
+def load_recommendation_rules():
+    """Reads the rules stored in the recommendations table as (purpose, feature, condition, suggestion) rows."""
+    conn = pool.connection()
+    return conn.execute("SELECT purpose, feature, condition, suggestion FROM recommendations ORDER BY id").fetchall()
+
+# Feature rules are compiled once and recompiled when the stored rules change. The built-in rules above
+# are used unless Config.RECOMMENDATION_RULES_SOURCE is 'database' (the recommendations table,
+# falling back to the built-in rules while it is empty)
+rule_engine = RuleEngine(
+    features,
+    load_rules=load_recommendation_rules if Config.RECOMMENDATION_RULES_SOURCE == 'database' else None,
+    refresh_interval=Config.RECOMMENDATION_RULES_REFRESH
+)
+
+def location_recommendations(user_features):
+    """Returns the ZIP market-trend suggestions for a property (empty for unknown zipcodes)."""
+    if "zipcode" in user_features:
+        return location_trends.suggestions(user_features["zipcode"])
+    return []
 
 def get_recommendations(purpose, user_features):
     """Generates recommendations based on user features and dynamic trends."""
     try:
-        recommendations = []
-
         # Feature-based recommendations (rule-based)
-        for feature, user_value in user_features.items():
-            if feature in features and isinstance(user_value, (int, float)):  
-                for condition, value, suggestion in features[feature]:
-                    if (
-                        (condition == "<" and user_value < value) or
-                        (condition == "<=" and user_value <= value) or
-                        (condition == ">" and user_value > value) or
-                        (condition == ">=" and user_value >= value) or
-                        (condition == "=" and user_value == value)
-                    ):
-                        modified_suggestion = f"✅ Buyer Tip: {suggestion}" if purpose == "buy" else f"💰 Seller Tip: {suggestion} Consider staging or upgrades to maximize your home's appeal."
-                        recommendations.append(modified_suggestion)
+        recommendations = rule_engine.evaluate(purpose, user_features)
 
         # Market-based recommendations (ZIP trends)
-        if "zipcode" in user_features:
-            zip_code = str(user_features["zipcode"])
-            if zip_code in location_trends:
-                trends = location_trends[zip_code]
-                recommendations.extend(trends["suggestions"])
+        recommendations.extend(location_recommendations(user_features))
 
         return recommendations
 
@@ -211,73 +310,325 @@ def get_recommendations(purpose, user_features):
         logging.error("Error generating recommendations: %s", e)
         return []
 
-def insert_query(sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, zipcode, purpose, predicted_price):
-    """Inserts a new user query and prediction into the database, preventing exact duplicates at the same timestamp."""
+def get_recommendations_batch(purpose, features_list):
+    """Generates recommendations for many properties at once (same output as calling get_recommendations on each)."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        # Prevent duplicate entries within a short time frame
-        cursor.execute("""
-            SELECT COUNT(*) FROM queries 
-            WHERE sqft_living = ? AND no_of_bedrooms = ? AND no_of_bathrooms = ? AND sqft_lot = ?
-            AND no_of_floors = ? AND house_age = ? AND zipcode = ? AND purpose = ? AND predicted_price = ?
-            AND timestamp >= datetime('now', '-1 second')
-        """, (sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, zipcode, purpose, predicted_price))
-
-        count = cursor.fetchone()[0]
+        results = rule_engine.evaluate_many(purpose, features_list)
+        for recommendations, user_features in zip(results, features_list):
+            recommendations.extend(location_recommendations(user_features))
+        return results
 
-        if count == 0:
-            cursor.execute("""
-                INSERT INTO queries (sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, 
-                                     no_of_floors, house_age, zipcode, purpose, predicted_price)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, zipcode, purpose, predicted_price))
-
-            conn.commit()
-            logging.info("User query inserted successfully: %s", (sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, zipcode, purpose, predicted_price))
+    except Exception as e:
+        logging.error("Error generating recommendations: %s", e)
+        return [[] for _ in features_list]
 
+def insert_query(sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, zipcode, purpose, predicted_price, model_version=None):
+    """Inserts a new user query and prediction into the database, preventing exact duplicates at the same timestamp."""
+    try:
+        conn = pool.connection()
+        values = (sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, zipcode, purpose, predicted_price, model_version)
+
+        start = time.perf_counter()
+        with conn:  # Commits on success, rolls back on error
+            # The insert is skipped if the same row was stored within the last second
+            cursor = conn.execute(INSERT_QUERY_SQL, query_params(values))
+        stage_duration.observe(time.perf_counter() - start, "db_write")
+        queries_written.inc()
+
+        if cursor.rowcount == 1:
+            logging.debug("User query inserted successfully: %s", values)
         else:
-            logging.warning("Duplicate entry prevented: %s", (sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, zipcode, purpose, predicted_price))
-
-        conn.close()
+            logging.warning("Duplicate entry prevented: %s", values)
 
     except Exception as e:
         logging.error("Error inserting query: %s", e)
 
-def convert_to_nairobi(utc_timestamp):
-    """Converts a UTC timestamp to Nairobi time (EAT, UTC+3)."""
+def insert_queries(rows):
+    """Inserts many (sqft_living, ..., purpose, predicted_price[, model_version]) rows in a single transaction, skipping recent duplicates."""
+    conn = pool.connection()
+    start = time.perf_counter()
+    with conn:
+        conn.executemany(INSERT_QUERY_SQL, [query_params(row) for row in rows])
+        # Keeps the dashboard aggregates current (single inserts are folded in by the next batch or read)
+        refresh_query_stats(conn)
+    # One observation per transaction: duplicate check and insert of every row, plus the commit
+    stage_duration.observe(time.perf_counter() - start, "db_write")
+    queries_written.inc(amount=len(rows))
+    logging.info("Inserted %d queued user queries", len(rows))
+
+# Dashboard aggregates: per display day and per zipcode (each split by purpose), the count and the
+# price sum, min and max, plus a histogram of the log price for the median. Every statistic merges
+# by addition, so any range of days is answered from the aggregates without reading the queries
+# table, and there is one row per bucket (days x purposes and zipcodes x purposes), however many
+# predictions are stored.
+QUERY_STATS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS query_stats (
+        dimension TEXT NOT NULL,  -- 'day' or 'zipcode'
+        bucket NOT NULL,  -- YYYY-MM-DD in the display time zone, or the zipcode
+        purpose TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        price_sum REAL NOT NULL,
+        min_price REAL NOT NULL,
+        max_price REAL NOT NULL,
+        price_bins BLOB NOT NULL,  -- PRICE_BIN_COUNT little-endian uint32 counts (see price_bins)
+        PRIMARY KEY (dimension, bucket, purpose)
+    );
+    CREATE TABLE IF NOT EXISTS query_stats_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        last_id INTEGER NOT NULL,  -- Highest queries.id folded into the aggregates
+        display_timezone TEXT NOT NULL  -- Time zone the days were bucketed in
+    );
+    INSERT OR IGNORE INTO query_stats_state (id, last_id, display_timezone) VALUES (1, 0, '');
+"""
+
+# Price histogram: 2% wide bins from $10,000 to $10,000,000 (prices outside fall in the end bins),
+# so a reported median is within about 1% of the exact one
+PRICE_BIN_MIN = 10_000
+PRICE_BIN_RATIO = 1.02
+PRICE_BIN_COUNT = math.ceil(math.log(1000) / math.log(PRICE_BIN_RATIO))
+PRICE_BIN_DTYPE = np.dtype("<u4")
+
+SELECT_QUERY_STATS_SQL = """
+    SELECT count, price_sum, min_price, max_price, price_bins FROM query_stats WHERE dimension = ? AND bucket = ? AND purpose = ?
+"""
+UPSERT_QUERY_STATS_SQL = """
+    INSERT OR REPLACE INTO query_stats (dimension, bucket, purpose, count, price_sum, min_price, max_price, price_bins)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def price_bins(prices):
+    """Returns the histogram bin of each price."""
+    bins = np.floor(np.log(np.maximum(prices, 1.0) / PRICE_BIN_MIN) / math.log(PRICE_BIN_RATIO))
+    return np.clip(bins, 0, PRICE_BIN_COUNT - 1).astype(np.intp)
+
+def reset_query_stats_if_stale(conn):
+    """Empties the aggregates when they were bucketed in another display time zone, so they are rebuilt."""
+    timezone, = conn.execute("SELECT display_timezone FROM query_stats_state").fetchone()
+    if timezone != Config.DISPLAY_TIMEZONE:
+        with conn:
+            conn.execute("DELETE FROM query_stats")
+            conn.execute("UPDATE query_stats_state SET last_id = 0, display_timezone = ?", (Config.DISPLAY_TIMEZONE,))
+        if timezone:
+            logging.info("Display time zone changed from %s, rebuilding the query aggregates", timezone)
+
+def refresh_query_stats(conn, limit=None):
+    """Folds the queries stored since the last refresh into query_stats; returns how many rows it read.
+
+    Runs in the caller's transaction when there is one (insert_queries calls it right after
+    inserting, while it holds the write lock), otherwise in its own IMMEDIATE transaction, so two processes
+    never fold the same row twice. Rows are only ever appended to queries, so the highest id seen
+    is all the state it needs.
+    """
+    own_transaction = not conn.in_transaction
+    if own_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        last_id, = conn.execute("SELECT last_id FROM query_stats_state").fetchone()
+        sql = f"SELECT id, {DAY_SQL}, zipcode, purpose, predicted_price FROM queries WHERE id > ? ORDER BY id"
+        rows = conn.execute(sql + (" LIMIT ?" if limit else ""), (last_id, limit) if limit else (last_id,)).fetchall()
+        if rows:
+            prices = np.array([row[4] for row in rows], dtype=np.float64)
+            bins = price_bins(prices)
+            rows_by_key = {}
+            for i, (_, day, zipcode, purpose, _) in enumerate(rows):
+                if DISPLAY_OFFSET_MINUTES is None:
+                    day = convert_to_local_time(day)[:10]
+                rows_by_key.setdefault(("day", day, purpose), []).append(i)
+                rows_by_key.setdefault(("zipcode", zipcode, purpose), []).append(i)
+
+            updates = []
+            for key, indices in rows_by_key.items():
+                key_prices = prices[indices]
+                histogram = np.bincount(bins[indices], minlength=PRICE_BIN_COUNT).astype(PRICE_BIN_DTYPE)
+                count, total, low, high = len(indices), key_prices.sum(), key_prices.min(), key_prices.max()
+                existing = conn.execute(SELECT_QUERY_STATS_SQL, key).fetchone()
+                if existing is not None:
+                    count, total = count + existing[0], total + existing[1]
+                    low, high = min(low, existing[2]), max(high, existing[3])
+                    histogram += np.frombuffer(existing[4], dtype=PRICE_BIN_DTYPE)
+                updates.append(key + (count, float(total), float(low), float(high), histogram.tobytes()))
+            conn.executemany(UPSERT_QUERY_STATS_SQL, updates)
+            conn.execute("UPDATE query_stats_state SET last_id = ?", (rows[-1][0],))
+        if own_transaction:
+            conn.commit()
+        return len(rows)
+    except Exception:
+        if own_transaction:
+            conn.rollback()
+        raise
+
+def histogram_medians(histograms, low, high):
+    """Approximates the median of each row of price histograms, clamped to [low, high] per row.
+
+    Each price is taken at its bin's geometric centre; for an even count the two middle ones are averaged.
+    """
+    cumulative = np.cumsum(histograms, axis=1)
+    total = cumulative[:, -1:]
+    positions = np.concatenate([(total - 1) // 2, total // 2], axis=1)  # The middle price twice, or the two middle prices
+    middle = (cumulative[:, None, :] <= positions[:, :, None]).sum(axis=2)  # Bin of each middle price
+    prices = np.clip(PRICE_BIN_MIN * PRICE_BIN_RATIO ** (middle + 0.5), low[:, None], high[:, None])
+    return prices.mean(axis=1)
+
+# Groupings offered by get_query_stats
+QUERY_STATS_GROUPS = ("day", "zipcode", "purpose")
+
+def get_query_stats(group="day", start_date=None, end_date=None, purpose=None):
+    """Returns the count and the mean, median, min and max predicted price per day, zipcode or purpose.
+
+    Dates are inclusive 'YYYY-MM-DD' display days, as in get_queries_page; zipcode buckets cover
+    every date, so the dates only filter the day and purpose groupings. Only the aggregates are
+    read (after folding in any new rows), so the cost grows with the number of buckets, not with
+    the number of predictions ever stored. Medians are within about 1%.
+    """
+    if group not in QUERY_STATS_GROUPS:
+        raise ValueError(f"group must be one of: {', '.join(QUERY_STATS_GROUPS)}")
+    clauses = ["dimension = ?"]
+    params = ["zipcode" if group == "zipcode" else "day"]
+    if group != "zipcode":
+        if start_date:
+            clauses.append("bucket >= ?")
+            params.append(datetime.strptime(start_date, '%Y-%m-%d').strftime('%Y-%m-%d'))
+        if end_date:
+            clauses.append("bucket <= ?")
+            params.append(datetime.strptime(end_date, '%Y-%m-%d').strftime('%Y-%m-%d'))
+    if purpose:
+        clauses.append("purpose = ?")
+        params.append(purpose)
+    key = "purpose" if group == "purpose" else "bucket"
+
+    conn = pool.connection()
+    # Cheap check first: the write lock is only taken when there is something to fold in
+    last_id, = conn.execute("SELECT last_id FROM query_stats_state").fetchone()
+    if conn.execute("SELECT 1 FROM queries WHERE id > ? LIMIT 1", (last_id,)).fetchone():
+        refresh_query_stats(conn)
+
+    rows = conn.execute(f"""
+        SELECT {key}, count, price_sum, min_price, max_price, price_bins FROM query_stats
+        WHERE {' AND '.join(clauses)} ORDER BY {key}
+    """, params).fetchall()
+    if not rows:
+        return []
+
+    # Merge the rows of each bucket (the purposes of a day or zipcode, or the days of a purpose)
+    buckets = [row[0] for row in rows]
+    starts = [i for i in range(len(rows)) if i == 0 or buckets[i] != buckets[i - 1]]
+    counts = np.add.reduceat(np.array([row[1] for row in rows]), starts)
+    price_sums = np.add.reduceat(np.array([row[2] for row in rows]), starts)
+    low = np.minimum.reduceat(np.array([row[3] for row in rows]), starts)
+    high = np.maximum.reduceat(np.array([row[4] for row in rows]), starts)
+    histograms = np.frombuffer(b"".join(row[5] for row in rows), dtype=PRICE_BIN_DTYPE).reshape(len(rows), PRICE_BIN_COUNT)
+    medians = histogram_medians(np.add.reduceat(histograms.astype(np.int64), starts, axis=0), low, high)
+    return [{
+        group: buckets[start],
+        "count": int(counts[i]),
+        "mean_price": float(price_sums[i] / counts[i]),
+        "median_price": float(medians[i]),
+        "min_price": float(low[i]),
+        "max_price": float(high[i]),
+    } for i, start in enumerate(starts)]
+
+def convert_to_local_time(utc_timestamp):
+    """Converts a UTC timestamp string to the display timezone (Config.DISPLAY_TIMEZONE)."""
     if utc_timestamp:
         try:
             utc_time = datetime.strptime(utc_timestamp, '%Y-%m-%d %H:%M:%S')
             utc_time = pytz.utc.localize(utc_time)  
-            nairobi_time = utc_time.astimezone(pytz.timezone('Africa/Nairobi'))
-            return nairobi_time.strftime('%Y-%m-%d %H:%M:%S')  
+            local_time = utc_time.astimezone(DISPLAY_TIMEZONE)
+            return local_time.strftime('%Y-%m-%d %H:%M:%S')  
         except Exception as e:
             logging.error("Error converting time: %s", e)
             return utc_timestamp  
     return None
 
+def localize_rows(rows):
+    """Returns query rows with display-timezone timestamps (a no-op when SQLite already converted them)."""
+    if DISPLAY_OFFSET_MINUTES is not None:
+        return rows
+    return [row[:-1] + (convert_to_local_time(row[-1]),) for row in rows]
+
 def get_all_queries():
-    """Retrieves all past queries and predictions, converting timestamps to Nairobi time."""
+    """Retrieves all past queries and predictions (newest first), with timestamps in the display timezone."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, zipcode, purpose, predicted_price, timestamp FROM queries ORDER BY timestamp DESC")
-        rows = cursor.fetchall()
-        conn.close()
-
-        results = []
-        for row in rows:
-            id, sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, zipcode, purpose, predicted_price, timestamp = row
-            nairobi_timestamp = convert_to_nairobi(timestamp)
-            results.append((id, sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, zipcode, purpose, predicted_price, nairobi_timestamp))
- 
-        return results  
+        conn = pool.connection()
+        return localize_rows(conn.execute(SELECT_ALL_QUERIES_SQL).fetchall())
     except Exception as e:
         logging.error("Error retrieving queries: %s", e)
         return []
 
+def local_date_to_utc(date_string, end_of_day=False):
+    """Converts a 'YYYY-MM-DD' date in the display timezone to the UTC timestamp string stored in the database.
+
+    With end_of_day=True, returns the start of the following day (an exclusive upper bound).
+    """
+    local_date = datetime.strptime(date_string, '%Y-%m-%d')
+    if end_of_day:
+        local_date += timedelta(days=1)
+    local_time = DISPLAY_TIMEZONE.localize(local_date)
+    return local_time.astimezone(pytz.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+def build_query_filters(min_price=None, max_price=None, start_date=None, end_date=None, purpose=None, zipcode=None, model_version=None):
+    """Turns the admin filters into a SQL WHERE fragment and its parameters. Dates are 'YYYY-MM-DD' (inclusive)."""
+    clauses = []
+    params = []
+    if min_price is not None:
+        clauses.append("predicted_price >= ?")
+        params.append(min_price)
+    if max_price is not None:
+        clauses.append("predicted_price <= ?")
+        params.append(max_price)
+    if start_date:
+        clauses.append("timestamp >= ?")
+        params.append(local_date_to_utc(start_date))
+    if end_date:
+        clauses.append("timestamp < ?")
+        params.append(local_date_to_utc(end_date, end_of_day=True))
+    if purpose:
+        clauses.append("purpose = ?")
+        params.append(purpose)
+    if zipcode is not None:
+        clauses.append("zipcode = ?")
+        params.append(zipcode)
+    if model_version:
+        clauses.append("model_version = ?")
+        params.append(model_version)
+    return clauses, params
+
+def get_queries_page(limit=50, before_id=None, **filters):
+    """Returns one page of queries (newest first) matching the filters, plus the cursor for the next page.
+
+    Uses keyset pagination: pass the returned next_cursor as before_id to fetch the following page.
+    next_cursor is None when there are no more rows.
+    """
+    clauses, params = build_query_filters(**filters)
+    if before_id is not None:
+        clauses.append("id < ?")
+        params.append(before_id)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    conn = pool.connection()
+    rows = conn.execute(f"{QUERY_SELECT_SQL} {where} ORDER BY id DESC LIMIT ?", params + [limit + 1]).fetchall()
+
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    return localize_rows(rows[:limit]), next_cursor
+
+def iter_queries(chunk_size=1000, **filters):
+    """Yields lists of up to chunk_size queries (newest first) matching the filters.
+
+    Rows are read from the cursor one chunk at a time, so memory stays flat however large the table is.
+    """
+    clauses, params = build_query_filters(**filters)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    cursor = pool.connection().execute(f"{QUERY_SELECT_SQL} {where} ORDER BY id DESC", params)
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield localize_rows(rows)
+    finally:
+        cursor.close()
+
 if __name__ == "__main__":
     create_database()
 
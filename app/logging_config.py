@@ -0,0 +1,112 @@
+"""
+Central logging setup, driven by Config.LOG_LEVEL, LOG_FORMAT and LOG_FILE.
+
+The root logger gets a QueueHandler, which only puts records on an in-memory queue; a listener
+thread formats them and writes them to the log file (or stderr), so a request never waits on
+disk I/O. Log with %-style arguments (logging.debug("Features: %s", features)), not f-strings:
+below LOG_LEVEL a call returns after a level check, before the arguments are ever formatted.
+
+LOG_FORMAT=json writes one JSON object per line (time, level, logger, message, location, and any
+fields passed with extra={...}); LOG_FORMAT=text writes the classic human-readable lines.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+
+from config import Config
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+
+# Attributes every LogRecord has; anything else on a record was passed with extra={...}
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as a single-line JSON object."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() formats the whole record in the logging thread. Here only the message
+    arguments are merged (they may be mutated once the call returns); the timestamp, the JSON
+    encoding and any traceback are formatted by the listener.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+_queue_handler = None
+_listener = None
+
+def _start_listener(handlers):
+    """Starts a listener thread over a new queue, and points the root QueueHandler at it."""
+    global _listener
+    records = queue.SimpleQueue()
+    _queue_handler.queue = records
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+
+def _restart_after_fork():
+    # The listener thread does not survive a fork (gunicorn workers), and records still on the
+    # inherited queue are written by the parent; each worker starts its own listener on a new queue
+    if _listener is not None:
+        _start_listener(_listener.handlers)
+
+def stop_logging():
+    """Writes out the queued records, stops the listener thread and closes its handlers."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+def setup_logging(level=None, log_format=None, log_file=None):
+    """Configures the root logger; arguments default to the Config values. Safe to call again."""
+    global _queue_handler
+    level = (level or Config.LOG_LEVEL).upper()
+    log_format = log_format or Config.LOG_FORMAT
+    log_file = Config.LOG_FILE if log_file is None else log_file
+
+    handler = logging.FileHandler(log_file) if log_file else logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+    stop_logging()
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    _queue_handler = DeferredQueueHandler(queue.SimpleQueue())
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+    # Flask sets its app logger to DEBUG in debug mode; LOG_LEVEL decides instead
+    logging.getLogger("app").setLevel(level)
+    _start_listener([handler])
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+atexit.register(stop_logging)
@@ -0,0 +1,68 @@
+import collections
+import os
+import sys
+import threading
+import time
+
+from utils import ForkSafeThread
+
+# Background threads that spend their life waiting; their stacks would only add noise
+IDLE_THREADS = {"query-writer", "model-watcher", "micro-batcher", "sampling-profiler"}
+
+class SamplingProfiler(ForkSafeThread):
+    """Statistical profiler for the serving process.
+
+    A background thread wakes up every interval seconds, reads the current stack of every other
+    thread (sys._current_frames) and counts it. Nothing is hooked into the code being profiled,
+    so the cost is one stack walk per thread per interval, independent of the request rate.
+    folded() returns the counts as folded stacks ("file:function;file:function count"), the
+    input format of flamegraph.pl and speedscope. The sampler is a ForkSafeThread.
+    """
+
+    thread_name = "sampling-profiler"
+
+    def __init__(self, interval=0.01, max_depth=64):
+        super().__init__()
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self._counts = collections.Counter()
+        self._stopping = None  # Event of the running sampler thread
+
+    def _on_start(self):
+        self._counts.clear()
+        self._stopping = threading.Event()
+        return (self._stopping,)
+
+    def _stack(self, frame):
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def stop(self):
+        """Stops sampling; the next ensure_started() starts a new profile."""
+        with self._lock:
+            if self._stopping is not None:
+                self._stopping.set()
+            self._pid = None
+
+    def _run(self, stopping):
+        while not stopping.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = [self._stack(frame) for ident, frame in sys._current_frames().items()
+                      if names.get(ident) not in IDLE_THREADS]
+            with self._lock:
+                self._counts.update(stacks)
+                self.samples += 1
+
+    def folded(self, reset=False):
+        """Returns the sampled stacks in folded format, most frequent first; reset=True starts a new profile."""
+        with self._lock:
+            counts = self._counts.most_common()
+            if reset:
+                self._counts.clear()
+                self.samples = 0
+        return "".join(f"{stack} {count}\n" for stack, count in counts)
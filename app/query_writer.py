@@ -0,0 +1,155 @@
+import atexit
+import logging
+import math
+import queue
+import threading
+import time
+
+from config import Config
+from app.database import QUERY_COLUMNS, insert_query, insert_queries
+from app.metrics import Gauge, registry as metrics_registry
+from utils import ForkSafeThread
+
+QUERY_PURPOSES = ("buy", "sell")
+
+def check_row(values):
+    """Raises ValueError if the queries table would reject the row (a missing or non-numeric value, or an unknown purpose)."""
+    for column, value in zip(QUERY_COLUMNS, values):
+        if column == "purpose":
+            if value not in QUERY_PURPOSES:
+                raise ValueError(f"purpose must be 'buy' or 'sell', got {value!r}")
+            continue
+        try:
+            valid = value is not None and math.isfinite(float(value))
+        except (TypeError, ValueError):
+            valid = False
+        if not valid:
+            raise ValueError(f"{column} must be a number, got {value!r}")
+
+class QueryWriter(ForkSafeThread):
+    """Write-behind logger for predictions.
+
+    Requests hand their row to an in-memory queue and return immediately; a background
+    thread drains the queue and commits rows to the queries table in batched transactions.
+    Identical submissions within duplicate_window seconds of the last stored one are dropped,
+    like the duplicate check insert_query performs. Rows the table would reject are refused
+    before they are queued, and a batch that still fails is retried row by row, so one bad
+    row cannot lose the others. When the queue is full, the row is written synchronously
+    instead of being lost.
+    """
+
+    thread_name = "query-writer"
+
+    def __init__(self, max_queue_size=10000, flush_interval=0.5, batch_size=200, duplicate_window=1.0):
+        super().__init__()
+        self.max_queue_size = max_queue_size
+        self.flush_interval = flush_interval  # Max seconds a row waits before being committed
+        self.batch_size = batch_size
+        self.duplicate_window = duplicate_window
+
+        self._queue = None
+        self._stopping = threading.Event()
+        self._recent = {}  # row values -> monotonic time the row was last accepted
+
+    def _on_start(self):
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._stopping.clear()
+        return ()
+
+    def _is_duplicate(self, values, now):
+        with self._lock:
+            last_seen = self._recent.get(values)
+            if last_seen is not None and now - last_seen <= self.duplicate_window:
+                return True  # Dropped rows do not extend the window
+            self._recent[values] = now
+            if len(self._recent) > self.max_queue_size:
+                # Forget submissions that have aged out of the window
+                cutoff = now - self.duplicate_window
+                self._recent = {key: seen for key, seen in self._recent.items() if seen >= cutoff}
+        return False
+
+    def submit(self, sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, zipcode, purpose, predicted_price, model_version=None):
+        """Queues a prediction for storage. Returns False if it was dropped as invalid or as a duplicate."""
+        values = (sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, zipcode, purpose, predicted_price, model_version)
+        try:
+            check_row(values)
+        except ValueError as e:
+            logging.warning("Invalid query not stored (%s): %s", e, values)
+            return False
+        values = values[:8] + (float(predicted_price), model_version)
+        if self._is_duplicate(values, time.monotonic()):
+            logging.warning("Duplicate entry prevented: %s", values)
+            return False
+
+        self.ensure_started()
+        try:
+            self._queue.put_nowait(values)
+        except queue.Full:
+            logging.warning("Query writer queue is full; writing synchronously")
+            insert_query(*values)
+        return True
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            stopping = self._stopping.is_set()
+            if stopping:
+                timeout = 0  # Drain whatever is left without waiting
+            elif deadline is None:
+                timeout = self.flush_interval
+            else:
+                timeout = max(deadline - time.monotonic(), 0)
+
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            except queue.Empty:
+                pass
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline or stopping):
+                self._write(batch)
+                batch = []
+                deadline = None
+            elif stopping and self._queue.empty():
+                return
+
+    def _write(self, batch):
+        try:
+            insert_queries(batch)
+        except Exception as e:
+            logging.error("Error writing %d queued queries, retrying one by one: %s", len(batch), e)
+            for values in batch:
+                try:
+                    insert_queries([values])
+                except Exception as e:
+                    logging.error("Dropped queued query %s: %s", values, e)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self):
+        """Blocks until every row queued so far has been committed."""
+        if self.started:
+            self._queue.join()
+
+    def stop(self, timeout=5.0):
+        """Drains the queue, commits the remaining rows and stops the writer thread."""
+        if not self.started:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._pid = None
+
+# Shared writer used by the routes; pending rows are flushed when the process exits
+query_writer = QueryWriter(
+    max_queue_size=Config.QUERY_QUEUE_SIZE,
+    flush_interval=Config.QUERY_FLUSH_INTERVAL,
+    batch_size=Config.QUERY_BATCH_SIZE,
+    duplicate_window=Config.QUERY_DUPLICATE_WINDOW
+)
+atexit.register(query_writer.stop)
+
+metrics_registry.register(Gauge("query_writer_queue_size", "Predictions waiting to be written to the queries table.",
+                        lambda: {(): query_writer._queue.qsize() if query_writer._queue is not None else 0}))
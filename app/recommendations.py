@@ -0,0 +1,185 @@
+import bisect
+import logging
+import operator  # Safer condition handling
+import threading
+import time
+
+import numpy as np
+
+# Define safe operator mappings
+OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge
+}
+
+def format_suggestion(purpose, suggestion):
+    """Frames a rule's suggestion for a buyer or a seller."""
+    if purpose == "buy":
+        return f"✅ Buyer Tip: {suggestion}"
+    return f"💰 Seller Tip: {suggestion} Consider staging or upgrades to maximize your home's appeal."
+
+def parse_condition(condition):
+    """Splits a stored condition such as '< 1000' or '=1' into (operator, value)."""
+    condition = condition.strip()
+    for symbol in sorted(OPERATORS, key=len, reverse=True):
+        if condition.startswith(symbol):
+            return symbol, float(condition[len(symbol):])
+    raise ValueError(f"Unsupported condition: {condition!r}")
+
+class CompiledFeatureRules:
+    """All rules for one feature, compiled into a sorted threshold array.
+
+    The distinct thresholds split the number line into regions: each threshold itself and the
+    open intervals between them. Every supported operator gives the same answer for all values
+    in a region, so the matching rules are worked out once per region at compile time.
+    Evaluating a value is then one binary search plus a list lookup.
+    """
+
+    def __init__(self, rules):
+        # rules: list of (op, value, purpose, buyer_text, seller_text), in definition order
+        self.rules = rules
+        self.thresholds = sorted({value for _, value, *_ in rules})
+        self.threshold_array = np.array(self.thresholds, dtype=np.float64)
+
+        # One representative value per region: below, at and between the thresholds (and NaN last)
+        representatives = []
+        for i, threshold in enumerate(self.thresholds):
+            lower = self.thresholds[i - 1] if i else threshold - 1
+            representatives += [(lower + threshold) / 2, threshold]
+        representatives.append(self.thresholds[-1] + 1 if self.thresholds else 0.0)
+        representatives.append(float("nan"))
+        self.nan_region = len(representatives) - 1
+
+        self.region_rules = [
+            [rule for rule in rules if OPERATORS[rule[0]](value, rule[1])]
+            for value in representatives
+        ]
+        self._texts = {}  # purpose -> suggestion texts per region
+
+    def region(self, value):
+        """Returns the region index of value."""
+        if value != value:
+            return self.nan_region
+        i = bisect.bisect_left(self.thresholds, value)
+        return 2 * i + 1 if i < len(self.thresholds) and self.thresholds[i] == value else 2 * i
+
+    def regions(self, values):
+        """Vectorized region(): returns the region index of every value in a float array."""
+        i = np.searchsorted(self.threshold_array, values, side="left")
+        at_threshold = np.zeros(len(values), dtype=bool)
+        if self.thresholds:
+            at_threshold = self.threshold_array[np.minimum(i, len(self.thresholds) - 1)] == values
+        regions = 2 * i + at_threshold
+        regions[np.isnan(values)] = self.nan_region
+        return regions
+
+    def texts(self, purpose):
+        """Returns the suggestion texts of each region, framed for purpose (built once per purpose)."""
+        purpose = "buy" if purpose == "buy" else "sell"  # Anything else reads as sell; keeps the cache at two entries
+        texts = self._texts.get(purpose)
+        if texts is None:
+            texts = [
+                [buyer_text if purpose == "buy" else seller_text
+                 for _, _, rule_purpose, buyer_text, seller_text in matched
+                 if rule_purpose is None or rule_purpose == purpose]
+                for matched in self.region_rules
+            ]
+            self._texts[purpose] = texts
+        return texts
+
+class RuleEngine:
+    """Evaluates the feature-based recommendation rules.
+
+    Rules come from the recommendations table when it has any rows, otherwise from the
+    built-in defaults. They are compiled once into per-feature threshold arrays and
+    recompiled when the stored rules change (checked at most every refresh_interval seconds).
+    """
+
+    def __init__(self, default_rules, load_rules=None, refresh_interval=60.0):
+        self.default_rules = default_rules
+        self.load_rules = load_rules  # Callable returning [(purpose, feature, condition, suggestion), ...]
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._source = None
+        self._compiled = None
+        self._next_refresh = 0.0
+
+    def _read_rules(self):
+        stored = []
+        if self.load_rules is not None:
+            try:
+                stored = list(self.load_rules())
+            except Exception as e:
+                logging.error("Error loading recommendation rules: %s", e)
+                if self._source is not None:
+                    return self._source  # Keep serving the rules we already have
+        if stored:
+            return tuple(stored)
+        # Built-in defaults apply to both purposes
+        return tuple((None, feature, f"{op} {value}", suggestion)
+                     for feature, rules in self.default_rules.items()
+                     for op, value, suggestion in rules)
+
+    def _compile(self, source):
+        by_feature = {}
+        for purpose, feature, condition, suggestion in source:
+            try:
+                op, value = parse_condition(condition)
+            except ValueError as e:
+                logging.error("Skipping recommendation rule for %s: %s", feature, e)
+                continue
+            rule = (op, value, purpose or None, format_suggestion("buy", suggestion), format_suggestion("sell", suggestion))
+            by_feature.setdefault(feature, []).append(rule)
+        return {feature: CompiledFeatureRules(rules) for feature, rules in by_feature.items()}
+
+    def reload(self):
+        """Re-reads the rules now and recompiles them if they changed."""
+        with self._lock:
+            source = self._read_rules()
+            if source != self._source:
+                self._compiled = self._compile(source)
+                self._source = source
+                logging.info("Compiled %d recommendation rules", len(source))
+            self._next_refresh = time.monotonic() + self.refresh_interval
+
+    def _rules(self):
+        if self._compiled is None or time.monotonic() >= self._next_refresh:
+            self.reload()
+        return self._compiled
+
+    def evaluate(self, purpose, user_features):
+        """Returns the rule-based suggestions for one property, in feature then rule order."""
+        compiled = self._rules()
+        recommendations = []
+        for feature, user_value in user_features.items():
+            rules = compiled.get(feature)
+            if rules is not None and isinstance(user_value, (int, float)):
+                recommendations += rules.texts(purpose)[rules.region(user_value)]
+        return recommendations
+
+    def evaluate_many(self, purpose, features_list):
+        """Batch version of evaluate(): each feature is matched for all properties in one vectorized pass."""
+        compiled = self._rules()
+        matches = {}
+        for feature, rules in compiled.items():
+            rows = [i for i, features in enumerate(features_list)
+                    if isinstance(features.get(feature), (int, float))]
+            if rows:
+                values = np.array([features_list[i][feature] for i in rows], dtype=np.float64)
+                texts = rules.texts(purpose)
+                matches[feature] = {row: texts[region] for row, region in zip(rows, rules.regions(values).tolist())}
+
+        results = []
+        for i, user_features in enumerate(features_list):
+            recommendations = []
+            for feature in user_features:
+                texts = matches.get(feature, {}).get(i)
+                if texts is not None:
+                    recommendations += texts
+            results.append(recommendations)
+        return results
@@ -1,43 +1,81 @@
 import csv
+import io
+import math
 import os
-from flask import render_template, request, flash, jsonify, Response
+import time
+import zlib
+from datetime import datetime
+from flask import render_template, request, flash, jsonify, Response, g
 from app import app
-from model.predict import predict_price  # Import the predict function
+from model.predict import PredictionRequest, predict_prices, predict_sweep, validate_sweep, format_server_timing, validate_features, validate_purpose  # Import the prediction pipeline
+from app.comps import comparable_sales
+from app.metrics import registry as metrics_registry, http_requests, http_request_duration, observe_stages
+from app.profiler import SamplingProfiler
 from config import Config  # Import the Config class to access config settings
-from app.database import insert_query, get_all_queries, get_recommendations  # Import necessary functions
+from app.database import get_queries_page, get_query_stats, iter_queries, QUERY_STATS_GROUPS  # Import necessary functions
 
-import logging
-logging.basicConfig(level=logging.DEBUG)  # Set logging level to DEBUG for development
+# Samples the stacks of the serving threads when Config.PROFILER_ENABLED is set (see /debug/profile)
+profiler = SamplingProfiler(Config.PROFILER_INTERVAL_MS / 1000) if Config.PROFILER_ENABLED else None
+
+# ------------------- INSTRUMENTATION -------------------
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    if profiler is not None:
+        profiler.ensure_started()
+
+@app.after_request
+def record_request_metrics(response):
+    """Counts the request and records its duration, plus the pipeline stage timings a route left in g.stage_timings."""
+    request_start = g.get('request_start')
+    if metrics_registry.enabled and request_start is not None:
+        url_rule = request.url_rule
+        endpoint = url_rule.rule if url_rule is not None else 'unmatched'  # Bounded label values
+        http_request_duration.observe(time.perf_counter() - request_start, endpoint)
+        http_requests.inc(endpoint, request.method, response.status_code)
+        stage_timings = g.get('stage_timings')
+        if stage_timings:
+            observe_stages(stage_timings)
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Counters and latency histograms of this process, in the Prometheus text format."""
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/debug/profile')
+def debug_profile():
+    """Folded stacks from the sampling profiler (Config.PROFILER_ENABLED); ?reset=1 starts a new profile."""
+    if profiler is None:
+        return jsonify({'error': 'The sampling profiler is disabled (set PROFILER_ENABLED=1).'}), 404
+    reset = request.args.get('reset', '').lower() in ('1', 'true', 'yes')
+    return Response(profiler.folded(reset=reset), mimetype='text/plain')
 
 # ------------------- HOME PAGE ROUTE -------------------
 @app.route('/', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
+        parse_start = time.perf_counter()
         if request.is_json:
             data = request.get_json()  # Get JSON data
             purpose = data.get("purpose")  # Extract purpose
-            app.logger.debug(f"Received JSON data: {data}")
+            app.logger.debug("Received JSON data: %s", data)
         else:
             app.logger.error("Invalid request format: Expected JSON")
             return jsonify({'error': 'Invalid request format'}), 400  # Error if not JSON
 
         try:
-            # Get the input data from the request (parse bathrooms as float)
-            sqft_living = float(data['sqft_living'])
-            no_of_bedrooms = int(data['no_of_bedrooms'])
-            no_of_bathrooms = float(data['no_of_bathrooms'])  # Allow decimals for bathrooms
-            sqft_lot = float(data['sqft_lot'])
-            no_of_floors = int(data['no_of_floors'])
-            house_age = int(data['house_age'])
-            zipcode = data['zipcode']
             purpose = data['purpose']  # Capture the purpose (buy/sell)
-            
-            app.logger.debug(f"Parsed input data: sqft_living={sqft_living}, no_of_bedrooms={no_of_bedrooms}, no_of_bathrooms={no_of_bathrooms}, sqft_lot={sqft_lot}, no_of_floors={no_of_floors}, house_age={house_age}, zipcode={zipcode}, purpose={purpose}")
+            prediction = PredictionRequest(data, purpose)
+            prediction.timings['parse'] = (time.perf_counter() - parse_start) * 1000
+            g.stage_timings = prediction.timings  # Recorded in the metrics after the response is built
 
-            # Validate the zipcode against the range defined in config.py
-            min_zipcode, max_zipcode = Config.ZIPCODE_RANGE
-            if not (min_zipcode <= int(zipcode) <= max_zipcode):
-                error_msg = f"Invalid zipcode. It should be between {min_zipcode} and {max_zipcode}."
+            # Validate and cast the input (purpose is buy or sell, bathrooms may be decimal, zipcode must be in Config.ZIPCODE_RANGE)
+            try:
+                validate_purpose(purpose)
+                features = prediction.validate()
+            except ValueError as e:
+                error_msg = str(e)
                 app.logger.error(error_msg)
                 if request.is_json:
                     return jsonify({'error': error_msg}), 400
@@ -45,66 +83,51 @@ def index():
                     flash(error_msg, "danger")
                     return render_template('index.html')
 
-            # Prepare the features for prediction
-            features = {
-                "sqft_living": sqft_living,
-                "no_of_bedrooms": no_of_bedrooms,
-                "no_of_bathrooms": no_of_bathrooms,
-                "sqft_lot": sqft_lot,
-                "no_of_floors": no_of_floors,
-                "house_age": house_age,
-                "zipcode": zipcode
-            }
-            
-            app.logger.debug(f"Features prepared for prediction: {features}")
+            app.logger.debug("Features prepared for prediction: %s, purpose=%s", features, purpose)
 
             # Get the predicted price and confidence interval
-            predicted_price, confidence_interval, recommendations = predict_price(features, purpose)
+            predicted_price, confidence_interval = prediction.infer()
 
-            app.logger.debug(f"Predicted price: {predicted_price}, Confidence interval: {confidence_interval}")
+            app.logger.debug("Predicted price: %s, Confidence interval: %s", predicted_price, confidence_interval)
 
-            # Calculate price range (±$50,000)
-            min_price = max(predicted_price - 50000, 0)  # Ensure min price is not negative
-            max_price = predicted_price + 50000
+            # Search the listings within the prediction interval
+            min_price = int(round(max(confidence_interval[0], 0)))  # Ensure min price is not negative
+            max_price = int(round(confidence_interval[1]))
 
             # Construct the dynamic Realtor.com URL
-            realtor_url = f"https://www.realtor.com/realestateandhomes-search/{zipcode}/price-{min_price}-{max_price}"
-            app.logger.debug(f"Realtor.com URL: {realtor_url}")
+            realtor_url = f"https://www.realtor.com/realestateandhomes-search/{features['zipcode']}/price-{min_price}-{max_price}"
+            app.logger.debug("Realtor.com URL: %s", realtor_url)
 
             # Fetch recommendations based on the user's purpose and features
-            recommendations = get_recommendations(purpose, features)
-            app.logger.debug(f"Recommendations: {recommendations}")
-
-            # Store the prediction in the database
-            insert_query(
-                sqft_living=sqft_living,
-                no_of_bedrooms=no_of_bedrooms,
-                no_of_bathrooms=no_of_bathrooms,
-                sqft_lot=sqft_lot,
-                no_of_floors=no_of_floors,
-                house_age=house_age,
-                zipcode=zipcode,
-                purpose=purpose,  # Add the purpose field here
-                predicted_price=predicted_price
-            )
-            app.logger.debug("Prediction stored in the database")
+            recommendations = prediction.recommend()
+
+            # Queue the prediction for storage (committed in the background by the query writer)
+            prediction.persist()
+            app.logger.debug("Prediction queued for storage; stage timings (ms): %s", prediction.timings)
 
             # Return JSON if it's an AJAX request
+            render_start = time.perf_counter()
             if request.is_json:
-                return jsonify({
+                response = jsonify({
                     'predicted_price': predicted_price,
                     'confidence_interval': confidence_interval,
                     'recommendations': recommendations,
-                    'realtor_url': realtor_url
+                    'realtor_url': realtor_url,
+                    'model_version': prediction.model_version
                 })
+                prediction.timings['render'] = (time.perf_counter() - render_start) * 1000
+                response.headers['Server-Timing'] = prediction.server_timing()
+                return response
 
             # Render the results in HTML template
-            return render_template('index.html', 
+            html = render_template('index.html', 
                                    predicted_price=predicted_price, 
                                    confidence_interval=confidence_interval,
                                    features=features,
                                    recommendations=recommendations,  # Pass recommendations to the template
                                    realtor_url=realtor_url)
+            prediction.timings['render'] = (time.perf_counter() - render_start) * 1000
+            return html
         except ValueError as e:
             error_msg = f"Please enter valid numerical values for all fields. Error: {str(e)}"
             app.logger.error(error_msg)
@@ -133,19 +156,271 @@ def index():
     # For GET requests, simply render the page
     return render_template('index.html')
 
+# ------------------- BATCH PREDICTION API -------------------
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Predicts prices for many properties in one request.
+    Expects JSON: {"purpose": "buy" | "sell", "properties": [{...}, ...]}.
+    Set "recommendations": false to skip the recommendation stage.
+    Rows that fail validation are reported individually; predictions are not stored.
+    """
+    if not request.is_json:
+        app.logger.error("Invalid request format: Expected JSON")
+        return jsonify({'error': 'Invalid request format'}), 400
+
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Invalid request format'}), 400
+    purpose = data.get("purpose")
+    properties = data.get("properties")
+
+    try:
+        validate_purpose(purpose)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not isinstance(properties, list) or not properties:
+        return jsonify({'error': "Missing required field: 'properties' must be a non-empty list"}), 400
+    if len(properties) > Config.MAX_BATCH_SIZE:
+        return jsonify({'error': f"Too many properties. The maximum batch size is {Config.MAX_BATCH_SIZE}."}), 400
+
+    try:
+        timings = {}
+        results = predict_prices(properties, purpose, recommend=data.get("recommendations", True) is not False, timings=timings)
+        errors = sum(1 for result in results if 'error' in result)
+        app.logger.debug("Batch prediction finished: %d rows, %d errors, stage timings (ms): %s", len(results), errors, timings)
+        render_start = time.perf_counter()
+        response = jsonify({'results': results, 'count': len(results), 'errors': errors})
+        timings['render'] = (time.perf_counter() - render_start) * 1000
+        response.headers['Server-Timing'] = format_server_timing(timings)
+        g.stage_timings = {f"batch_{stage}": duration for stage, duration in timings.items()}  # Whole-batch stages
+        return response
+    except Exception as e:
+        error_msg = f"An unexpected error occurred: {str(e)}"
+        app.logger.error(error_msg)
+        return jsonify({'error': error_msg}), 500
+
+# ------------------- WHAT-IF SWEEP -------------------
+@app.route('/predict/sweep', methods=['POST'])
+def predict_sweep_route():
+    """
+    Prices a grid of variations of one property in a single vectorized pass.
+    Expects JSON: {"property": {...form fields...}, "vary": [{"feature": "sqft_living", "start": 1000, "stop": 3000,
+    "step": 100}, {"feature": "no_of_bathrooms", "values": [1, 2, 3]}]}. Returns the axes and the prices,
+    nested one list level per axis, in "vary" order.
+    Sweeps are not stored.
+    """
+    if not request.is_json:
+        app.logger.error("Invalid request format: Expected JSON")
+        return jsonify({'error': 'Invalid request format'}), 400
+
+    try:
+        features, axes = validate_sweep(request.get_json())
+    except KeyError as e:
+        return jsonify({'error': f"Missing required field: {str(e)}"}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        # The base property goes through the regular pipeline (and prediction cache), so it matches POST /
+        prediction = PredictionRequest(features, validated=True)
+        predicted_price, confidence_interval = prediction.infer()
+        timings = {}
+        prices, ci_min, ci_max = predict_sweep(features, axes, prediction.models, timings)
+        app.logger.debug("Sweep of %d points finished, stage timings (ms): %s", prices.size, timings)
+        render_start = time.perf_counter()
+        response = jsonify({
+            'base': {'features': features, 'predicted_price': predicted_price, 'confidence_interval': confidence_interval},
+            'axes': [{'feature': feature, 'values': values} for feature, values in axes],
+            'prices': prices.round(2).tolist(),
+            'lower': ci_min.round(2).tolist(),
+            'upper': ci_max.round(2).tolist(),
+            'count': prices.size,
+            'model_version': prediction.model_version
+        })
+        timings['render'] = (time.perf_counter() - render_start) * 1000
+        response.headers['Server-Timing'] = format_server_timing(timings)
+        g.stage_timings = {f"sweep_{stage}": duration for stage, duration in timings.items()}
+        return response
+    except Exception as e:
+        error_msg = f"An unexpected error occurred: {str(e)}"
+        app.logger.error(error_msg)
+        return jsonify({'error': error_msg}), 500
+
+# ------------------- COMPARABLE SALES -------------------
+@app.route('/comps', methods=['POST'])
+def comps():
+    """
+    Returns the k most similar past sales in the property's zipcode, most similar first.
+    Expects JSON with the home page form fields and an optional "k" (default and maximum in config.py).
+    """
+    if not request.is_json:
+        app.logger.error("Invalid request format: Expected JSON")
+        return jsonify({'error': 'Invalid request format'}), 400
+
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Invalid request format'}), 400
+    try:
+        features = validate_features(data)
+    except KeyError as e:
+        return jsonify({'error': f"Missing required field: {str(e)}"}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    k = data.get('k', Config.COMPS_DEFAULT_K)
+    if not isinstance(k, int) or isinstance(k, bool) or not 1 <= k <= Config.COMPS_MAX_K:
+        return jsonify({'error': f"k must be an integer between 1 and {Config.COMPS_MAX_K}."}), 400
+
+    try:
+        sales = comparable_sales.query(features, k)
+    except Exception as e:
+        error_msg = f"An unexpected error occurred: {str(e)}"
+        app.logger.error(error_msg)
+        return jsonify({'error': error_msg}), 500
+    if sales is None:
+        return jsonify({'error': f"No sales on record for zipcode {features['zipcode']}."}), 404
+    return jsonify({'zipcode': int(features['zipcode']), 'count': len(sales), 'comps': sales})
+
 # ------------------- NEW ADMIN PAGE -------------------
 @app.route('/admin')
 def admin_dashboard():
     try:
-        # Fetch all stored predictions from the database
-        predictions = get_all_queries()
-        app.logger.debug(f"Fetched {len(predictions)} predictions for admin dashboard")
-        return render_template('admin.html', predictions=predictions)
+        # Rows are fetched page by page from /admin/queries by the dashboard script
+        return render_template('admin.html', page_size=Config.ADMIN_PAGE_SIZE)
     except Exception as e:
         error_msg = f"Error fetching predictions: {str(e)}"
         app.logger.error(error_msg)
         flash(error_msg, "danger")
-        return render_template('admin.html', predictions=[])
+        return render_template('admin.html', page_size=Config.ADMIN_PAGE_SIZE)
+
+# ------------------- ADMIN QUERY API (PAGINATED) -------------------
+def parse_number(args, name, cast):
+    """Reads an optional numeric query parameter; raises ValueError if it is present but not a finite number."""
+    value = args.get(name) or None
+    if value is None:
+        return None
+    try:
+        number = cast(value)
+    except ValueError:
+        number = None
+    if number is None or not math.isfinite(number):
+        raise ValueError(f"{name} must be a {'whole ' if cast is int else ''}number, got '{value}'")
+    return number
+
+def parse_query_filters(args):
+    """Reads the admin filter query parameters (minPrice, maxPrice, startDate, endDate, purpose, zipcode, modelVersion).
+
+    Raises ValueError for a malformed number or date, rather than ignoring the filter.
+    """
+    min_price = parse_number(args, 'minPrice', float)
+    max_price = parse_number(args, 'maxPrice', float)
+    zipcode = parse_number(args, 'zipcode', int)
+    purpose = args.get('purpose') or None
+    start_date = args.get('startDate') or None
+    end_date = args.get('endDate') or None
+    for date_string in (start_date, end_date):
+        if date_string:
+            datetime.strptime(date_string, '%Y-%m-%d')  # Raises ValueError for malformed dates
+    return {
+        'min_price': min_price,
+        'max_price': max_price,
+        'start_date': start_date,
+        'end_date': end_date,
+        'purpose': purpose,
+        'zipcode': zipcode,
+        'model_version': args.get('modelVersion') or None
+    }
+
+@app.route('/admin/queries')
+def admin_queries():
+    """
+    Returns one page of stored predictions as JSON, newest first.
+    Query parameters: limit, cursor (next_cursor from the previous page) and the admin filters.
+    """
+    try:
+        filters = parse_query_filters(request.args)
+        limit = min(max(request.args.get('limit', Config.ADMIN_PAGE_SIZE, type=int), 1), Config.ADMIN_PAGE_SIZE_MAX)
+        cursor = request.args.get('cursor', type=int)
+
+        rows, next_cursor = get_queries_page(limit=limit, before_id=cursor, **filters)
+        app.logger.debug("Fetched %d predictions for admin page (cursor=%s)", len(rows), cursor)
+
+        columns = ('id', 'sqft_living', 'no_of_bedrooms', 'no_of_bathrooms', 'sqft_lot', 'no_of_floors',
+                   'house_age', 'zipcode', 'purpose', 'predicted_price', 'model_version', 'timestamp')
+        return jsonify({
+            'rows': [dict(zip(columns, row)) for row in rows],
+            'next_cursor': next_cursor
+        })
+    except ValueError as e:
+        return jsonify({'error': f"Invalid filter value: {str(e)}"}), 400
+    except Exception as e:
+        error_msg = f"Error fetching predictions: {str(e)}"
+        app.logger.error(error_msg)
+        return jsonify({'error': error_msg}), 500
+
+# ------------------- ADMIN TREND API (AGGREGATES) -------------------
+@app.route('/admin/stats')
+def admin_stats():
+    """
+    Returns prediction counts and mean/median predicted prices per day, zipcode or purpose, for the dashboard charts.
+    Query parameters: group (day, zipcode or purpose; default day), startDate, endDate and purpose.
+    Served from the aggregate tables, so the cost does not grow with the number of stored predictions.
+    """
+    try:
+        group = request.args.get('group', 'day')
+        if group not in QUERY_STATS_GROUPS:
+            return jsonify({'error': f"group must be one of: {', '.join(QUERY_STATS_GROUPS)}"}), 400
+        filters = parse_query_filters(request.args)
+        buckets = get_query_stats(group, start_date=filters['start_date'], end_date=filters['end_date'], purpose=filters['purpose'])
+        app.logger.debug("Fetched %d %s buckets for the admin charts", len(buckets), group)
+        return jsonify({'group': group, 'buckets': buckets, 'count': sum(bucket['count'] for bucket in buckets)})
+    except ValueError as e:
+        return jsonify({'error': f"Invalid filter value: {str(e)}"}), 400
+    except Exception as e:
+        error_msg = f"Error fetching prediction trends: {str(e)}"
+        app.logger.error(error_msg)
+        return jsonify({'error': error_msg}), 500
+
+# ------------------- CSV EXPORT HELPERS -------------------
+CSV_HEADERS = [
+    "Sqft Living", "Bedrooms", "Bathrooms", "Lot Size",
+    "Floors", "House Age", "Zipcode", "Purpose", "Predicted Price", "Model Version", "Date"
+]
+
+def csv_response(filename, filters):
+    """
+    Streams the matching predictions as CSV straight from the database cursor.
+    Add ?gzip=1 to the request to download a gzip-compressed file instead.
+    """
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)  # Handles quoting and escaping
+        writer.writerow(CSV_HEADERS)
+        for chunk in iter_queries(chunk_size=Config.CSV_CHUNK_SIZE, **filters):
+            writer.writerows(row[1:] for row in chunk)  # Skip ID column
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        if buffer.tell():
+            yield buffer.getvalue()  # Headers only (no matching rows)
+
+    def generate_gzip():
+        compressor = zlib.compressobj(wbits=31)  # wbits=31 writes a gzip header and trailer
+        for text in generate_csv():
+            data = compressor.compress(text.encode('utf-8'))
+            if data:
+                yield data
+        yield compressor.flush()
+
+    if compress:
+        response = Response(generate_gzip(), mimetype="application/gzip")
+        filename += ".gz"
+    else:
+        response = Response(generate_csv(), mimetype="text/csv")
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
 
 # ------------------- DOWNLOAD ALL DATA AS CSV -------------------
 @app.route('/download_all_csv')
@@ -154,79 +429,33 @@ def download_all_csv():
     This route generates and returns a CSV file containing all stored predictions.
     """
     try:
-        # Fetch all stored predictions
-        predictions = get_all_queries()
-        app.logger.debug(f"Fetched {len(predictions)} predictions for CSV download")
-        # Define the CSV headers
-        headers = [
-            "Sqft Living", "Bedrooms", "Bathrooms", "Lot Size",
-            "Floors", "House Age", "Zipcode", "Purpose", "Predicted Price", "Date"
-        ]
-        # Create CSV data
-        def generate():
-            yield ','.join(headers) + '\n'  # Write the headers first
-            for row in predictions:
-                yield ','.join(map(str, row[1:])) + '\n'  # Skip ID column
-        # Prepare the response with CSV file
-        response = Response(generate(), mimetype="text/csv")
-        response.headers["Content-Disposition"] = "attachment; filename=all_houses_predictions.csv"
-        return response
+        app.logger.debug("Streaming all predictions as CSV")
+        return csv_response("all_houses_predictions.csv", {})
     except Exception as e:
         error_msg = f"Error generating CSV: {str(e)}"
         app.logger.error(error_msg)
         flash(error_msg, "danger")
-        return render_template('admin.html')
+        return render_template('admin.html', page_size=Config.ADMIN_PAGE_SIZE)
 
 # ------------------- DOWNLOAD FILTERED DATA AS CSV -------------------
 @app.route('/download_filtered_csv', methods=['GET'])
 def download_filtered_csv():
     """
     This route generates and returns a CSV file containing filtered predictions.
-    Filters are passed via query parameters.
+    Filters are passed via query parameters (same as /admin/queries) and applied in SQL.
     """
     try:
-        # Parse filter parameters from the request
-        min_price = float(request.args.get('minPrice', 0))
-        max_price = float(request.args.get('maxPrice', float('inf')))
-        start_date = request.args.get('startDate', None)
-        end_date = request.args.get('endDate', None)
-
-        # Fetch all stored predictions
-        predictions = get_all_queries()
-        app.logger.debug(f"Fetched {len(predictions)} predictions for filtered CSV download")
-
-        # Apply filters
-        filtered_predictions = [
-            row for row in predictions
-            if (
-                min_price <= float(row[-2]) <= max_price and  # Predicted Price
-                (not start_date or row[-1] >= start_date) and  # Date
-                (not end_date or row[-1] <= end_date)  # Date
-            )
-        ]
-        app.logger.debug(f"Filtered predictions: {len(filtered_predictions)}")
-
-        # Define the CSV headers
-        headers = [
-            "Sqft Living", "Bedrooms", "Bathrooms", "Lot Size",
-            "Floors", "House Age", "Zipcode", "Purpose","Predicted Price", "Date"
-        ]
-
-        # Create CSV data
-        def generate():
-            yield ','.join(headers) + '\n'  # Write the headers first
-            for row in filtered_predictions:
-                yield ','.join(map(str, row[1:])) + '\n'  # Skip ID column
-
-        # Prepare the response with CSV file
-        response = Response(generate(), mimetype="text/csv")
-        response.headers["Content-Disposition"] = "attachment; filename=filtered_houses_predictions.csv"
-        return response
+        filters = parse_query_filters(request.args)
+        app.logger.debug("Streaming filtered predictions as CSV: %s", filters)
+        return csv_response("filtered_houses_predictions.csv", filters)
+    except ValueError as e:
+        flash(f"Invalid filter value: {str(e)}", "danger")
+        return render_template('admin.html', page_size=Config.ADMIN_PAGE_SIZE), 400
     except Exception as e:
         error_msg = f"Error generating filtered CSV: {str(e)}"
         app.logger.error(error_msg)
         flash(error_msg, "danger")
-        return render_template('admin.html')
+        return render_template('admin.html', page_size=Config.ADMIN_PAGE_SIZE)
 
 # ------------------- GLOBAL ERROR HANDLER -------------------
 @app.errorhandler(500)
@@ -269,8 +269,108 @@ function displayResult(result, inputData) {
   document.getElementById('form-section').classList.add('hidden');
   resultSection.classList.remove('hidden');
   resultSection.scrollIntoView({ behavior: 'smooth' });
+
+  loadSweepChart(inputData);
+}
+
+/* ===============================
+     What-If Sweep Chart
+  =============================== */
+// One line per bathroom count; the interval band is drawn around the entered count
+const SWEEP_LINE_COLORS = ['var(--secondary-color)', 'var(--primary-color)', 'var(--accent-color)'];
+let lastSweepInput = null;
+
+// Range of the swept feature around the entered value, in about 40 steps
+function sweepAxis(feature, value) {
+  if (feature === 'house_age') {
+    const stop = Math.min(Math.max(2 * value, 40), 150);
+    return { feature: feature, start: 0, stop: stop, step: Math.max(1, Math.round(stop / 40)) };
+  }
+  // Half to one and a half times the entered area, in round steps of at least 10 sqft
+  const step = Math.max(10, Math.round(value / 40 / 10) * 10);
+  const start = Math.max(step, Math.round(value * 0.5 / step) * step);
+  return { feature: feature, start: start, stop: Math.max(start, Math.round(value * 1.5 / step) * step), step: step };
+}
+
+function loadSweepChart(inputData) {
+  lastSweepInput = inputData;
+  const chart = document.getElementById('sweep-chart');
+  const feature = document.getElementById('sweep-feature').value;
+  const bathrooms = parseFloat(inputData.no_of_bathrooms);
+  const vary = [
+    { feature: 'no_of_bathrooms', values: [bathrooms - 1, bathrooms, bathrooms + 1].filter(value => value >= 0) },
+    sweepAxis(feature, parseFloat(inputData[feature]))
+  ];
+
+  // Every point of the chart is priced by one request (see /predict/sweep)
+  fetch('/predict/sweep', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ property: inputData, vary: vary })
+  })
+  .then(response => {
+    if (!response.ok) {
+      throw new Error(`HTTP Error ${response.status}`);
+    }
+    return response.json();
+  })
+  .then(result => drawSweepChart(result))
+  .catch(error => {
+    console.error("Error loading the what-if chart:", error);
+    chart.innerHTML = '<p>The what-if chart is not available right now.</p>';
+  });
+}
+
+function drawSweepChart(result) {
+  const chart = document.getElementById('sweep-chart');
+  const [lines, sweep] = result.axes;
+  const xs = sweep.values;
+  const width = 640, height = 320;
+  const pad = { left: 80, right: 20, top: 30, bottom: 45 };
+
+  const baseLine = Math.max(0, lines.values.indexOf(result.base.features.no_of_bathrooms));
+  const lower = result.lower[baseLine], upper = result.upper[baseLine];
+  const prices = result.prices.flat().concat(lower, upper);
+  const yMin = Math.min(...prices), yMax = Math.max(...prices);
+  const x = value => pad.left + (value - xs[0]) / ((xs[xs.length - 1] - xs[0]) || 1) * (width - pad.left - pad.right);
+  const y = value => height - pad.bottom - (value - yMin) / ((yMax - yMin) || 1) * (height - pad.top - pad.bottom);
+  const points = values => values.map((value, i) => `${x(xs[i]).toFixed(1)},${y(value).toFixed(1)}`);
+  const money = value => `$${Math.round(value / 1000).toLocaleString()}k`;
+
+  let svg = `<svg viewBox="0 0 ${width} ${height}" role="img" aria-label="Predicted price by ${sweep.feature}">`;
+  svg += `<polygon class="sweep-band" points="${points(upper).concat(points(lower).reverse()).join(' ')}"></polygon>`;
+  result.prices.forEach((row, i) => {
+    const color = SWEEP_LINE_COLORS[i % SWEEP_LINE_COLORS.length];
+    const label = `${lines.values[i]} bath${lines.values[i] === 1 ? '' : 's'}`;
+    svg += `<polyline class="sweep-line" style="stroke: ${color}" points="${points(row).join(' ')}"></polyline>`;
+    svg += `<rect x="${pad.left + 10 + i * 90}" y="8" width="14" height="4" style="fill: ${color}"></rect>`;
+    svg += `<text x="${pad.left + 30 + i * 90}" y="14">${label}</text>`;
+  });
+
+  // Axes with a few ticks, and the entered property
+  svg += `<line class="sweep-axis" x1="${pad.left}" y1="${height - pad.bottom}" x2="${width - pad.right}" y2="${height - pad.bottom}"></line>`;
+  svg += `<line class="sweep-axis" x1="${pad.left}" y1="${pad.top}" x2="${pad.left}" y2="${height - pad.bottom}"></line>`;
+  [0, 0.5, 1].forEach(fraction => {
+    const xValue = xs[Math.round(fraction * (xs.length - 1))];
+    const yValue = yMin + fraction * (yMax - yMin);
+    svg += `<text x="${x(xValue)}" y="${height - pad.bottom + 18}" text-anchor="middle">${xValue.toLocaleString()}</text>`;
+    svg += `<text x="${pad.left - 8}" y="${y(yValue) + 4}" text-anchor="end">${money(yValue)}</text>`;
+  });
+  const xLabel = document.querySelector(`#sweep-feature option[value="${sweep.feature}"]`).textContent;
+  svg += `<text x="${(width + pad.left) / 2}" y="${height - 8}" text-anchor="middle">${xLabel}</text>`;
+  const baseX = parseFloat(result.base.features[sweep.feature]);
+  if (baseX >= xs[0] && baseX <= xs[xs.length - 1]) {
+    svg += `<circle class="sweep-marker" cx="${x(baseX)}" cy="${y(result.base.predicted_price)}" r="5"><title>Your property: ${money(result.base.predicted_price)}</title></circle>`;
+  }
+  chart.innerHTML = svg + '</svg>';
 }
 
+document.getElementById('sweep-feature').addEventListener('change', function () {
+  if (lastSweepInput) {
+    loadSweepChart(lastSweepInput);
+  }
+});
+
 /* ===============================
      Prediction History Logic
   =============================== */
@@ -0,0 +1,166 @@
+"""
+ZIP market-trend table used for location recommendations.
+
+The table is built from data/processed/cleaned_dataset_iqr.csv: zipcodes present in the
+dataset get their median sale price, and the remaining fields come from a random generator
+seeded with the table version and the zipcode, so every worker and every restart sees the
+same trends for a zip. The table is stored in data/processed/location_trends.json and loaded
+on first use. Regenerate it after changing the dataset or TRENDS_VERSION:
+
+    python -m app.trends
+"""
+import csv
+import json
+import logging
+import os
+import random
+import statistics
+import threading
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_PATH = os.path.join(BASE_DIR, "../data/processed/cleaned_dataset_iqr.csv")
+TRENDS_PATH = os.path.join(BASE_DIR, "../data/processed/location_trends.json")
+
+# Bump when the generation rules change so stale tables are rebuilt
+TRENDS_VERSION = 1
+ZIP_RANGE = (98001, 99001)
+
+# Location type boundaries: [start, end) for each band, everything else is Rural
+URBAN_ZIPS = (98001, 98200)  # Covers Seattle, Bellevue, and Tacoma (high-density urban areas)
+SUBURBAN_ZIPS = (98201, 98550)  # Covers Everett, Olympia, and surrounding suburban regions
+
+def get_location_type(zip_code):
+    """Categorizes ZIP codes into Urban, Suburban, or Rural."""
+    if URBAN_ZIPS[0] <= zip_code < URBAN_ZIPS[1]:
+        return "Urban"
+    elif SUBURBAN_ZIPS[0] <= zip_code < SUBURBAN_ZIPS[1]:
+        return "Suburban"
+    else:
+        return "Rural"
+
+def dataset_median_prices(path=DATASET_PATH):
+    """Returns {zipcode: median sale price} from the cleaned dataset."""
+    prices = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            prices.setdefault(int(row["zipcode"]), []).append(float(row["price"]))
+    return {zip_code: statistics.median(values) for zip_code, values in prices.items()}
+
+def build_trends(median_prices, start_zip=ZIP_RANGE[0], end_zip=ZIP_RANGE[1], version=TRENDS_VERSION):
+    """Builds the trend table for every zipcode in [start_zip, end_zip]."""
+    trends = {}
+    for zip_code in range(start_zip, end_zip + 1):
+        rng = random.Random(f"{version}:{zip_code}")
+        synthetic_price = rng.randint(250000, 750000)
+        trends[str(zip_code)] = {
+            "median_price": int(round(median_prices.get(zip_code, synthetic_price))),
+            "price_trend": rng.choice(["up", "down", "stable"]),
+            "competition": rng.choice(["high", "medium", "low"]),
+            "location_type": get_location_type(zip_code),
+            "median_days_on_market": rng.randint(20, 120),
+        }
+    return trends
+
+def write_trends(trends, path=TRENDS_PATH, version=TRENDS_VERSION):
+    """Writes the table atomically, so concurrent readers never see a partial file."""
+    with atomic_write(path, "w") as f:
+        json.dump({"version": version, "trends": trends}, f, separators=(",", ":"), sort_keys=True)
+
+def build_suggestions(trend):
+    """Turns one zipcode's trend record into its list of suggestions."""
+    suggestions = []
+
+    # Market trend insights
+    if trend["price_trend"] == "up":
+        suggestions.append("📈 Home values in this area are currently rising, making it a great time to invest in property for long-term growth.")
+    elif trend["price_trend"] == "down":
+        suggestions.append("📉 The market in this area is declining. Sellers should consider pricing their homes aggressively to attract buyers.")
+    else:
+        suggestions.append("⚖️ The market is stable, offering a balanced environment for both buyers and sellers with steady long-term investment potential.")
+
+    # Competition-based advice
+    if trend["competition"] == "high":
+        suggestions.append("🔥 The market is highly competitive, with multiple offers expected. Buyers should be prepared to act quickly and make strong offers.")
+    elif trend["competition"] == "medium":
+        suggestions.append("🤝 The market has fair competition, providing opportunities for negotiation between buyers and sellers.")
+    else:
+        suggestions.append("❄️ The market is slow, with fewer buyers. Sellers may need to offer incentives such as closing cost assistance to attract interest.")
+
+    # Luxury vs. Affordable Market
+    if trend["median_price"] > 600000:
+        suggestions.append("💎 This is a high-end area! Staging your home and investing in premium upgrades can help attract top-tier buyers.")
+    elif trend["median_price"] < 350000:
+        suggestions.append("🏠 This is an affordable market, making it an excellent opportunity for first-time buyers to enter the housing market.")
+
+    # Location-specific insights
+    if trend["location_type"] == "Urban":
+        suggestions.append("🏙️ Urban areas are ideal for condos and townhomes, which tend to have faster resale times due to high demand.")
+    elif trend["location_type"] == "Suburban":
+        suggestions.append("🏡 Suburban zones are highly desirable for families, with homes featuring yards and proximity to schools being particularly attractive.")
+    else:
+        suggestions.append("🌄 Rural markets appeal to niche buyers looking for large lots and a quiet lifestyle. Highlight the tranquility and space your property offers.")
+
+    # Smart Timing Advice
+    suggestions.append(f"⏳ On average, homes in this area take approximately {trend['median_days_on_market']} days to sell. Adjust your strategy accordingly.")
+    return suggestions
+
+class TrendTable:
+    """Lazily loaded trend table; suggestions are built once per zipcode on first request."""
+
+    def __init__(self, path=TRENDS_PATH, dataset_path=DATASET_PATH):
+        self.path = path
+        self.dataset_path = dataset_path
+        self._trends = None
+        self._suggestions = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+            if stored.get("version") == TRENDS_VERSION:
+                return stored["trends"]
+            logging.warning("Location trends in %s are version %s, rebuilding", self.path, stored.get("version"))
+        except (OSError, ValueError) as e:
+            logging.warning("Could not read location trends (%s), rebuilding", e)
+
+        trends = build_trends(dataset_median_prices(self.dataset_path))
+        try:
+            write_trends(trends, self.path)
+        except OSError as e:
+            logging.error("Could not save location trends: %s", e)
+        return trends
+
+    @property
+    def trends(self):
+        if self._trends is None:
+            with self._lock:
+                if self._trends is None:
+                    self._trends = self._load()
+        return self._trends
+
+    def get(self, zip_code):
+        """Returns the trend record for zip_code, or None for zipcodes outside the table."""
+        return self.trends.get(str(zip_code))
+
+    def suggestions(self, zip_code):
+        """Returns the market-trend suggestions for zip_code (empty for unknown zipcodes)."""
+        key = str(zip_code)
+        suggestions = self._suggestions.get(key)
+        if suggestions is None:
+            trend = self.trends.get(key)
+            if trend is None:
+                return []
+            suggestions = self._suggestions[key] = build_suggestions(trend)
+        return suggestions
+
+# Shared table used by the recommendation code
+location_trends = TrendTable()
+
+def main():
+    trends = build_trends(dataset_median_prices())
+    write_trends(trends)
+    print(f"Wrote {len(trends)} zipcodes (version {TRENDS_VERSION}) to {os.path.normpath(TRENDS_PATH)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Comparable-sales benchmark: index build time and k-nearest query latency as the dataset grows.
+
+Run from the project root:
+    python -m benchmarks.bench_comps [--sizes 20000 1000000 5000000] [--k 10]
+
+Larger datasets are synthesized by repeating the cleaned dataset with small random jitter on
+every comparison feature (zipcodes unchanged, so each zipcode's tree grows proportionally).
+Queries are sampled from the real sales; reports p50 / p99 latency of ComparableSalesIndex.query.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.comps import COMP_FEATURES, DATASET_PATH, SALE_COLUMNS, ComparableSalesIndex
+
+
+def synthesize(df, size, rng):
+    """Returns {column: array} with size rows: the dataset repeated, with jittered comparison features."""
+    rows = np.arange(size) % len(df)
+    sales = {column: df[column].to_numpy()[rows] for column in list(SALE_COLUMNS) + ["zipcode"]}
+    if size > len(df):
+        for column in COMP_FEATURES:
+            values = sales[column].astype(np.float64)
+            sales[column] = values * rng.normal(1.0, 0.02, size)
+    return sales
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20_000, 1_000_000, 5_000_000])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=5000)
+    args = parser.parse_args()
+
+    df = pd.read_csv(DATASET_PATH)
+    rng = np.random.default_rng(42)
+    queries = df.sample(args.queries, replace=True, random_state=42).to_dict("records")
+
+    print(f"{'sales':>10} {'build s':>8} {'p50 us':>8} {'p99 us':>8}")
+    for size in args.sizes:
+        sales = synthesize(df, size, rng)
+        start = time.perf_counter()
+        index = ComparableSalesIndex(sales)
+        build = time.perf_counter() - start
+
+        latencies = []
+        for features in queries:
+            start = time.perf_counter()
+            index.query(features, args.k)
+            latencies.append(time.perf_counter() - start)
+        latencies = np.array(latencies) * 1e6
+        print(f"{size:>10,} {build:>8.2f} {np.percentile(latencies, 50):>8.1f} {np.percentile(latencies, 99):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+SQLite concurrency benchmark: one connection per call (rollback journal) vs. the pooled WAL layer.
+
+Run from the project root:
+    python -m benchmarks.bench_database [--ops 200] [--rows 500]
+
+Each scenario runs against a fresh temporary database, so data/housing.db is never touched.
+Reports insert and read (get_all_queries) throughput with 1, 4 and 16 threads.
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from app import database
+
+THREAD_COUNTS = (1, 4, 16)
+
+# The statements the database layer ran before pooling, idx_queries_hash and SQL-side time zone conversion
+LEGACY_DUPLICATE_CHECK_SQL = """
+    SELECT COUNT(*) FROM queries
+    WHERE sqft_living = ? AND no_of_bedrooms = ? AND no_of_bathrooms = ? AND sqft_lot = ?
+    AND no_of_floors = ? AND house_age = ? AND zipcode = ? AND purpose = ? AND predicted_price = ?
+    AND timestamp >= datetime('now', '-1 second')
+"""
+
+LEGACY_SELECT_ALL_SQL = "SELECT id, sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, zipcode, purpose, predicted_price, timestamp FROM queries ORDER BY timestamp DESC"
+
+LEGACY_INSERT_SQL = """
+    INSERT INTO queries (sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot,
+                         no_of_floors, house_age, zipcode, purpose, predicted_price)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def legacy_insert(db_path, values):
+    """insert_query as it was before pooling: new connection, default journal, commit per row."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    cursor = conn.cursor()
+    cursor.execute(LEGACY_DUPLICATE_CHECK_SQL, values)
+    if cursor.fetchone()[0] == 0:
+        cursor.execute(LEGACY_INSERT_SQL, values)
+        conn.commit()
+    conn.close()
+
+
+def legacy_read(db_path):
+    """get_all_queries as it was before pooling (per-row pytz timestamp conversion)."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    rows = conn.execute(LEGACY_SELECT_ALL_SQL).fetchall()
+    conn.close()
+    return [row[:-1] + (database.convert_to_local_time(row[-1]),) for row in rows]
+
+
+def random_values(rng):
+    return (rng.randint(500, 5000), rng.randint(1, 6), rng.choice([1.0, 1.5, 2.0, 2.5]), rng.randint(1000, 20000),
+            rng.choice([1.0, 2.0]), rng.randint(0, 100), rng.randint(98001, 98199), rng.choice(["buy", "sell"]),
+            rng.uniform(1e5, 2e6))
+
+
+def run_threads(n_threads, ops_per_thread, work):
+    """Runs work(rng) ops_per_thread times on each of n_threads threads; returns ops/second."""
+    barrier = threading.Barrier(n_threads + 1)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        barrier.wait()
+        for _ in range(ops_per_thread):
+            work(rng)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return n_threads * ops_per_thread / (time.perf_counter() - start)
+
+
+def fresh_database(directory, name, seed_rows, wal):
+    db_path = os.path.join(directory, name)
+    database.pool.close_all()
+    database.pool = database.ConnectionPool(db_path)
+    database.DB_PATH = db_path
+    database.create_database()
+    rng = random.Random(0)
+    conn = database.pool.connection()
+    with conn:
+        conn.executemany(database.INSERT_QUERY_SQL, [database.query_params(random_values(rng)) for _ in range(seed_rows)])
+    if not wal:
+        database.pool.close_all()
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+    return db_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=200, help="operations per thread")
+    parser.add_argument("--rows", type=int, default=500, help="rows in the table for the read benchmark")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print(f"{'threads':>7} {'legacy insert/s':>16} {'pooled insert/s':>16} {'legacy read/s':>14} {'pooled read/s':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        for n_threads in THREAD_COUNTS:
+            legacy_path = fresh_database(directory, f"legacy_{n_threads}.db", args.rows, wal=False)
+            legacy_reads = run_threads(n_threads, args.ops, lambda rng: legacy_read(legacy_path))
+            legacy_inserts = run_threads(n_threads, args.ops, lambda rng: legacy_insert(legacy_path, random_values(rng)))
+
+            fresh_database(directory, f"pooled_{n_threads}.db", args.rows, wal=True)
+            pooled_reads = run_threads(n_threads, args.ops, lambda rng: database.get_all_queries())
+            pooled_inserts = run_threads(n_threads, args.ops, lambda rng: database.insert_query(*random_values(rng)))
+            database.pool.close_all()
+
+            print(f"{n_threads:>7} {legacy_inserts:>16.0f} {pooled_inserts:>16.0f} {legacy_reads:>14.0f} {pooled_reads:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
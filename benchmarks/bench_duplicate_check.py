@@ -0,0 +1,111 @@
+"""
+Duplicate-suppression benchmark: the old nine-column scan vs. the idx_queries_hash lookup.
+
+Run from the project root:
+    python -m benchmarks.bench_duplicate_check [--sizes 10000 1000000 10000000]
+
+For each table size a temporary database is filled with historical rows (generated inside
+SQLite, so even 10M rows load quickly), then the average cost of one insert_query call
+is measured for both duplicate checks against the same table. The scan runs last, after the
+indexes added since (idx_queries_timestamp_id and the rest) are dropped, so it probes the
+table the way the original schema did.
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from app import database
+from benchmarks.bench_database import LEGACY_DUPLICATE_CHECK_SQL, LEGACY_INSERT_SQL, random_values
+
+# Historical rows, all older than the 1-second duplicate window
+SEED_SQL = """
+    WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?)
+    INSERT INTO queries (sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors,
+                         house_age, zipcode, purpose, predicted_price, timestamp, query_hash)
+    SELECT 500 + abs(random() % 4500), 1 + abs(random() % 6), 1 + abs(random() % 4) * 0.5, 1000 + abs(random() % 19000),
+           1 + abs(random() % 3), abs(random() % 100), 98001 + abs(random() % 199),
+           CASE WHEN random() % 2 = 0 THEN 'buy' ELSE 'sell' END, 100000 + abs(random() % 1900000),
+           datetime('2024-01-01', '+' || (n / 60) || ' minutes'), random()
+    FROM seq
+"""
+
+
+def build_table(directory, size):
+    db_path = os.path.join(directory, f"queries_{size}.db")
+    database.pool.close_all()
+    database.pool = database.ConnectionPool(db_path)
+    database.create_database()
+    conn = database.pool.connection()
+    start = time.perf_counter()
+    with conn:
+        conn.execute(SEED_SQL, (size,))
+    print(f"  loaded {size:,} rows in {time.perf_counter() - start:.1f}s")
+    return db_path
+
+
+# The only index on queries before the hash lookup and the admin filter indexes were added
+LEGACY_INDEXES = ("idx_queries_purpose",)
+
+
+def drop_new_indexes(conn):
+    """Drops every queries index the original schema lacked (the legacy check would use the timestamp ones)."""
+    names = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'queries' AND sql IS NOT NULL")]
+    for name in names:
+        if name not in LEGACY_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.commit()
+
+
+def time_legacy(db_path, inserts):
+    conn = sqlite3.connect(db_path)
+    drop_new_indexes(conn)
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(inserts):
+        values = random_values(rng)
+        if conn.execute(LEGACY_DUPLICATE_CHECK_SQL, values).fetchone()[0] == 0:
+            conn.execute(LEGACY_INSERT_SQL, values)
+            conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed / inserts * 1e6
+
+
+def time_hashed(inserts):
+    rng = random.Random(2)
+    start = time.perf_counter()
+    for _ in range(inserts):
+        database.insert_query(*random_values(rng))
+    return (time.perf_counter() - start) / inserts * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--inserts", type=int, default=500, help="inserts timed per scheme (fewer for the scan on big tables)")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            print(f"table size {size:,}")
+            db_path = build_table(directory, size)
+            hashed = time_hashed(args.inserts)
+            database.pool.close_all()
+            legacy = time_legacy(db_path, max(10, min(args.inserts, 5_000_000 // size)))
+            results.append((size, legacy, hashed))
+            os.remove(db_path)
+
+    print(f"{'rows':>12} {'nine-column scan (us/insert)':>30} {'hash index (us/insert)':>24}")
+    for size, legacy, hashed in results:
+        print(f"{size:>12,} {legacy:>30.0f} {hashed:>24.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Featurization benchmark: compiled FeatureBuilder vs. the original pandas pipeline.
+
+Run from the project root:
+    python -m benchmarks.bench_features
+
+Checks that both paths agree bit for bit on every row of the training data
+(with integer and string zipcodes), then reports per-call latency.
+"""
+import logging
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from app import app  # noqa: F401  (initializes the app before model.predict, avoiding the circular import)
+from model import predict
+from model.features import NUMERIC_COLUMNS
+
+DATA_PATH = 'data/processed/cleaned_dataset_iqr.csv'
+
+
+def pandas_pipeline(features):
+    """The original DataFrame -> encoder -> concat -> poly chain, kept as the reference."""
+    input_data = pd.DataFrame(features if isinstance(features, list) else [features])
+    encoded_zipcode = predict.encoder.transform(input_data[['zipcode']])
+    encoded_df = pd.DataFrame(encoded_zipcode, columns=predict.encoder.get_feature_names_out(['zipcode']))
+    input_data = input_data.drop(columns=['zipcode'])
+    input_data = pd.concat([input_data, encoded_df], axis=1)
+    return predict.poly.transform(input_data)
+
+
+def load_rows():
+    df = pd.read_csv(DATA_PATH)
+    rows = []
+    for record in df[NUMERIC_COLUMNS + ['zipcode']].to_dict('records'):
+        features = {column: record[column] for column in NUMERIC_COLUMNS}
+        features["no_of_bedrooms"] = int(features["no_of_bedrooms"])
+        features["no_of_floors"] = int(features["no_of_floors"])
+        features["house_age"] = int(features["house_age"])
+        features["zipcode"] = int(record["zipcode"])
+        rows.append(features)
+    # The form posts zipcodes as strings; cover that path (and unknown zipcodes) too
+    rows += [dict(row, zipcode=str(row["zipcode"])) for row in rows[:500]]
+    rows += [dict(row, zipcode=98999) for row in rows[:100]]
+    return rows
+
+
+def check_equal(rows):
+    expected = pandas_pipeline(rows)
+    actual = predict.feature_builder.build_many(rows)
+    assert np.array_equal(expected.view(np.uint64), actual.view(np.uint64)), "batch output differs"
+    for row in rows[::50]:
+        expected = pandas_pipeline(row)
+        actual = predict.feature_builder.build(row)
+        assert np.array_equal(expected.view(np.uint64), actual.view(np.uint64)), f"row output differs: {row}"
+    print(f"Bit-for-bit match on {len(rows)} rows")
+
+
+def time_call(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    rows = load_rows()
+    check_equal(rows)
+
+    row = rows[0]
+    print(f"single row  pandas pipeline: {time_call(lambda: pandas_pipeline(row), 200):10.1f} us")
+    print(f"single row  FeatureBuilder : {time_call(lambda: predict.feature_builder.build(row), 5000):10.1f} us")
+    batch = rows[:1000]
+    print(f"1000 rows   pandas pipeline: {time_call(lambda: pandas_pipeline(batch), 5) / 1000:10.2f} us/row")
+    print(f"1000 rows   FeatureBuilder : {time_call(lambda: predict.feature_builder.build_many(batch), 20) / 1000:10.2f} us/row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Logging cost benchmark: what a log call costs the request thread (app/logging_config.py).
+
+Run from the project root:
+    python -m benchmarks.bench_logging [--calls 20000]
+
+Compares the old setup (basicConfig with a FileHandler written by the calling thread, f-string
+messages formatted before the level check) with the queue-based setup, for a suppressed DEBUG
+call and for an emitted INFO call. The message carries a feature dict and a 3002-column feature
+row, like the per-request debug lines did. Logs go to a temporary directory.
+"""
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import timeit
+
+import numpy as np
+
+from app.logging_config import setup_logging, stop_logging
+
+FEATURES = {"sqft_living": 2000, "no_of_bedrooms": 3, "no_of_bathrooms": 2.5, "sqft_lot": 6000,
+            "no_of_floors": 2, "house_age": 20, "zipcode": "98178"}
+ROW = np.random.default_rng(0).random((1, 3002))
+
+
+def per_call_us(fn, calls):
+    return min(timeit.repeat(fn, number=calls, repeat=3)) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    log = logging.getLogger("bench")
+    try:
+        # Old setup: root at INFO, synchronous file handler, eager f-strings
+        stop_logging()
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        logging.basicConfig(filename=os.path.join(directory, "sync.log"), level=logging.INFO,
+                            format="%(asctime)s - %(levelname)s - %(message)s")
+        old_debug = per_call_us(lambda: log.debug(f"Features: {FEATURES}, row: {ROW}"), args.calls // 10)
+        old_info = per_call_us(lambda: log.info(f"Features: {FEATURES}"), args.calls)
+
+        # New setup: queue handler, lazy %-style arguments, JSON formatted by the listener thread
+        setup_logging(level="INFO", log_format="json", log_file=os.path.join(directory, "queued.log"))
+        new_debug = per_call_us(lambda: log.debug("Features: %s, row: %s", FEATURES, ROW), args.calls)
+        new_info = per_call_us(lambda: log.info("Features: %s", FEATURES), args.calls)
+        stop_logging()
+
+        print(f"{'call':<16} {'old us':>8} {'new us':>8}")
+        print(f"{'suppressed DEBUG':<16} {old_debug:>8.2f} {new_debug:>8.2f}")
+        print(f"{'emitted INFO':<16} {old_info:>8.2f} {new_info:>8.2f}")
+    finally:
+        logging.shutdown()
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
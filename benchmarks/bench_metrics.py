@@ -0,0 +1,93 @@
+"""
+Instrumentation overhead benchmark: metrics (app/metrics.py) and the sampling profiler (app/profiler.py).
+
+Run from the project root:
+    python -m benchmarks.bench_metrics [--requests 2000] [--rounds 5]
+
+First times the recording primitives on their own, then sends the same POST / request through
+Flask's test client with metrics disabled, enabled, and enabled with the sampling profiler
+running. The modes are interleaved over several rounds and the fastest round of each counts.
+Requests hit the prediction cache, so the request itself is as cheap as it gets and
+the instrumentation's share is as large as it gets. Predictions are stored in a temporary
+copy of the database, not data/housing.db.
+"""
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import time
+import timeit
+
+from flask import g
+
+from app import app, database, routes
+from app.metrics import Counter, Histogram, MetricsRegistry, observe_stages, registry
+from app.profiler import SamplingProfiler
+
+BODY = {"sqft_living": "2000", "no_of_bedrooms": "3", "no_of_bathrooms": "2.5", "sqft_lot": "6000",
+        "no_of_floors": "2", "house_age": "20", "zipcode": "98178", "purpose": "buy"}
+
+
+def time_per_call(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per mode and round")
+    parser.add_argument("--rounds", type=int, default=5, help="interleaved rounds; the fastest round counts")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    scratch = MetricsRegistry()
+    histogram = scratch.register(Histogram("bench_seconds", "Benchmark histogram.", ("stage",)))
+    counter = scratch.register(Counter("bench_total", "Benchmark counter.", ("endpoint",)))
+    print(f"Histogram.observe: {time_per_call(lambda: histogram.observe(0.0012, 'infer'), 200_000) * 1e9:.0f} ns")
+    print(f"Counter.inc:       {time_per_call(lambda: counter.inc('/'), 200_000) * 1e9:.0f} ns")
+    scratch.enabled = False
+    print(f"disabled observe:  {time_per_call(lambda: histogram.observe(0.0012, 'infer'), 200_000) * 1e9:.0f} ns")
+
+    # Everything recorded for one POST /: the after_request hook plus the stage timings it observes
+    stage_timings = dict.fromkeys(("parse", "validate", "featurize", "infer", "recommend", "persist", "render"), 0.1)
+    with app.test_request_context("/", method="POST", json=BODY):
+        g.request_start = time.perf_counter()
+        g.stage_timings = stage_timings
+        response = app.response_class("")
+        hook = time_per_call(lambda: routes.record_request_metrics(response), 20_000)
+    print(f"per-request hook:  {hook * 1e6:.1f} us ({len(stage_timings)} stages, of which observe_stages "
+          f"{time_per_call(lambda: observe_stages(stage_timings), 20_000) * 1e6:.1f} us)")
+
+    directory = tempfile.mkdtemp()
+    try:
+        shutil.copy(database.DB_PATH, os.path.join(directory, "housing.db"))
+        database.pool = database.ConnectionPool(os.path.join(directory, "housing.db"))
+        database.create_database()  # Migrates the copy, as the app does at startup
+        client = app.test_client()
+        client.post("/", json=BODY)  # Loads the model and fills the prediction cache
+
+        def request():
+            client.post("/", json=BODY)
+
+        results = {}
+        profiler = SamplingProfiler()
+        for _ in range(args.rounds):
+            # Modes are interleaved so drift in machine load affects them equally
+            for mode in ("disabled", "enabled", "profiler"):
+                registry.enabled = mode != "disabled"
+                routes.profiler = profiler if mode == "profiler" else None
+                seconds = timeit.timeit(request, number=args.requests) / args.requests
+                results[mode] = min(results.get(mode, seconds), seconds)
+                profiler.stop()
+
+        baseline = results["disabled"]
+        print(f"\n{'POST / (cached)':<18} {'us/request':>11} {'overhead':>9}")
+        for mode, seconds in results.items():
+            print(f"{mode:<18} {seconds * 1e6:>11.1f} {(seconds / baseline - 1) * 100:>8.1f}%")
+    finally:
+        database.pool.close_all()
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
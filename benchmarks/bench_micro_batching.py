@@ -0,0 +1,83 @@
+"""
+Load benchmark: single predictions with and without micro-batching (model/batcher.py).
+
+Run from the project root:
+    python -m benchmarks.bench_micro_batching [--clients 1 8 32] [--duration 5] [--wait-ms 2] [--batch-size 32]
+
+Simulates concurrent clients with a closed loop per thread: each client sends one prediction
+(PredictionRequest.infer(), the path behind POST /), waits for the answer and immediately sends
+the next. Properties are drawn from the training data with the prediction cache disabled, so every
+request reaches the model. Reports throughput, p50 / p99 latency and the mean batch size.
+Set MODEL_BACKEND=numpy to measure the NumPy predictor instead of LightGBM.
+"""
+import argparse
+import logging
+import random
+import threading
+import time
+
+import numpy as np
+
+from app import app  # noqa: F401  (initializes the app before model.predict, avoiding the circular import)
+from model import predict
+from model.batcher import MicroBatcher
+from benchmarks.bench_features import load_rows
+
+
+def run_load(rows, clients, duration):
+    """Runs clients closed-loop threads for duration seconds; returns (latencies in ms, elapsed seconds)."""
+    latencies = [[] for _ in range(clients)]
+    start_barrier = threading.Barrier(clients + 1)
+    stop = threading.Event()
+
+    def client(index):
+        rng = random.Random(index)
+        start_barrier.wait()
+        while not stop.is_set():
+            features = rows[rng.randrange(len(rows))]
+            start = time.perf_counter()
+            predict.PredictionRequest(features, "buy", validated=True).infer()
+            latencies[index].append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return np.concatenate([np.array(values) for values in latencies]), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per run")
+    parser.add_argument("--wait-ms", type=float, default=2.0, help="micro-batch collection window")
+    parser.add_argument("--batch-size", type=int, default=32, help="max rows per micro-batch")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    rows = [row for row in load_rows() if isinstance(row["zipcode"], int)]
+    predict.prediction_cache.maxsize = 0  # Every request runs the model
+    predict.models.warm_up()
+
+    print(f"{'mode':>9} {'clients':>8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'rows/batch':>11}")
+    for clients in args.clients:
+        for mode in ("single", "batched"):
+            batcher = MicroBatcher(predict.infer_batch, args.batch_size, args.wait_ms / 1000) if mode == "batched" else None
+            predict.micro_batcher = batcher
+            run_load(rows, clients, min(args.duration, 0.5))  # Warm-up (and starts the batcher thread)
+            if batcher is not None:
+                batcher.batches = batcher.items = 0
+            latencies, elapsed = run_load(rows, clients, args.duration)
+            rows_per_batch = f"{batcher.items / max(batcher.batches, 1):.1f}" if batcher is not None else "1.0"
+            print(f"{mode:>9} {clients:>8} {len(latencies) / elapsed:>9,.0f} {np.percentile(latencies, 50):>8.2f} "
+                  f"{np.percentile(latencies, 99):>8.2f} {rows_per_batch:>11}")
+    predict.micro_batcher = None
+
+
+if __name__ == "__main__":
+    main()
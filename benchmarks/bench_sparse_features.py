@@ -0,0 +1,104 @@
+"""
+Training benchmark: dense one-hot + PolynomialFeatures vs. the sparse, pruned SparseFeatureBuilder.
+
+Run from the project root:
+    python -m benchmarks.bench_sparse_features [--estimators 1000]
+
+Each pipeline is trained in its own fresh process (so peak memory is measured separately)
+with the parameters and train/test split of model/train_model.py. Reports the column
+count, featurization and training time, peak RSS, test MAE / R2 on the price scale and
+single-request serving latency (featurize + predict).
+"""
+import argparse
+import multiprocessing
+import resource
+import time
+import timeit
+import warnings
+
+DATA_PATH = 'data/processed/cleaned_dataset_iqr.csv'
+LGBM_PARAMS = dict(n_estimators=1000, learning_rate=0.05, max_depth=6, subsample=0.8, colsample_bytree=0.8, random_state=42, verbose=-1)
+
+
+def train(pipeline, n_estimators):
+    """Featurizes, trains and evaluates one pipeline; runs in a child process."""
+    warnings.filterwarnings("ignore")
+    import lightgbm as lgb
+    import numpy as np
+    import pandas as pd
+    from sklearn.metrics import mean_absolute_error, r2_score
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import OneHotEncoder, PolynomialFeatures
+    from model.features import NUMERIC_COLUMNS, FeatureBuilder, SparseFeatureBuilder
+
+    df = pd.read_csv(DATA_PATH)
+    y = np.log1p(df["price"])
+    X = df[NUMERIC_COLUMNS + ["zipcode"]]
+
+    start = time.perf_counter()
+    encoder = OneHotEncoder(handle_unknown='ignore', sparse_output=False).fit(X[['zipcode']])
+    if pipeline == "dense":
+        # Same steps as model/train_model.py
+        encoded = pd.DataFrame(encoder.transform(X[['zipcode']]), columns=encoder.get_feature_names_out(['zipcode']))
+        X_encoded = pd.concat([X.drop(columns=['zipcode']), encoded], axis=1)
+        poly = PolynomialFeatures(degree=2, include_bias=False)
+        features = pd.DataFrame(poly.fit_transform(X_encoded), columns=poly.get_feature_names_out(X_encoded.columns))
+        builder = FeatureBuilder(encoder, poly)
+        stored = features.size
+    else:
+        builder = SparseFeatureBuilder(encoder.categories_[0], dense_output=True)  # Dense rows for serving, as in ModelHolder
+        features = builder.transform_frame(X)
+        stored = features.nnz
+    featurize_time = time.perf_counter() - start
+
+    X_train, X_test, y_train, y_test = train_test_split(features, y, test_size=0.2, random_state=42)
+    model = lgb.LGBMRegressor(**dict(LGBM_PARAMS, n_estimators=n_estimators))
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    train_time = time.perf_counter() - start
+
+    y_pred = np.expm1(model.predict(X_test))
+    request = {column: X[column].iloc[0].item() for column in NUMERIC_COLUMNS}
+    request["zipcode"] = int(X["zipcode"].iloc[0])
+    latency = min(timeit.repeat(lambda: model.predict(builder.build(request)), number=200, repeat=5)) / 200
+
+    return {
+        "columns": features.shape[1],
+        "stored_values": stored,
+        "featurize_s": featurize_time,
+        "train_s": train_time,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "mae": mean_absolute_error(np.expm1(y_test), y_pred),
+        "r2": r2_score(np.expm1(y_test), y_pred),
+        "latency_ms": latency * 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--estimators", type=int, default=LGBM_PARAMS["n_estimators"])
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for pipeline in ("dense", "sparse"):
+        with context.Pool(1) as pool:
+            results[pipeline] = pool.apply(train, (pipeline, args.estimators))
+
+    rows = [
+        ("columns", "columns", "{:,.0f}"),
+        ("stored values", "stored_values", "{:,.0f}"),
+        ("featurize (s)", "featurize_s", "{:.2f}"),
+        ("train (s)", "train_s", "{:.1f}"),
+        ("peak RSS (MB)", "peak_rss_mb", "{:,.0f}"),
+        ("test MAE ($)", "mae", "{:,.0f}"),
+        ("test R2", "r2", "{:.4f}"),
+        ("serve 1 row (ms)", "latency_ms", "{:.3f}"),
+    ]
+    print(f"{'':<18} {'dense':>14} {'sparse':>14}")
+    for label, key, fmt in rows:
+        print(f"{label:<18} {fmt.format(results['dense'][key]):>14} {fmt.format(results['sparse'][key]):>14}")
+
+
+if __name__ == "__main__":
+    main()
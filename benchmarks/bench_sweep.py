@@ -0,0 +1,74 @@
+"""
+What-if sweep benchmark: predict_sweep (/predict/sweep) vs. predicting the same grid row by row.
+
+Run from the project root:
+    python -m benchmarks.bench_sweep [--points 1000]
+
+Sweeps sqft_living alone, every zipcode (a wide one-hot axis), sqft_living against
+no_of_bathrooms and sqft_living against zipcode around one synthetic property, then prices
+the same grid as a list of properties with predict_prices, the /predict/batch path. Checks
+that both agree to within floating-point rounding and reports the best-of-5 time of each,
+next to one single prediction.
+"""
+import argparse
+import logging
+import timeit
+
+import numpy as np
+
+from app import app  # noqa: F401  (initializes the app before model.predict, avoiding the circular import)
+from model import predict
+from benchmarks.synthetic import synthetic_properties
+
+TOLERANCE = 1e-6  # Relative, on the price
+
+
+def best_of(fn, number=1):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def grid_rows(features, axes):
+    """The grid as a list of feature dicts, in the C order predict_sweep uses."""
+    rows = [dict(features)]
+    for feature, values in axes:
+        rows = [dict(row, **{feature: value}) for row in rows for value in values]
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=1000, help="approximate grid size")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    predict.prediction_cache.maxsize = 0  # Every call runs the model
+    predict.models.warm_up()
+    loaded = predict.current_models()
+    features = synthetic_properties(1, seed=5)[0]
+    n = max(1, args.points // 20)
+    zipcodes = sorted(loaded.feature_builder.zip_index)[:20]
+    sweeps = {
+        "sqft_living": [("sqft_living", np.linspace(1000, 4000, args.points).round().tolist())],
+        "zipcode": [("zipcode", sorted(loaded.feature_builder.zip_index))],
+        "sqft_living x bathrooms": [("sqft_living", np.linspace(1000, 4000, n).round().tolist()),
+                                    ("no_of_bathrooms", np.arange(1, 11, 0.5).tolist())],
+        "sqft_living x zipcode": [("sqft_living", np.linspace(1000, 4000, n).round().tolist()),
+                                  ("zipcode", zipcodes)],
+    }
+
+    single = best_of(lambda: predict.predict_price(features, "buy", recommend=False), number=20)
+    print(f"single prediction: {single * 1e3:.2f} ms\n")
+    print(f"{'sweep':<24} {'points':>7} {'max rel diff':>13} {'sweep ms':>9} {'rows ms':>9} {'speed-up':>9}")
+    for name, axes in sweeps.items():
+        rows = grid_rows(features, axes)
+        prices = predict.predict_sweep(features, axes, loaded)[0].ravel()
+        expected = np.array([result["predicted_price"] for result in predict.predict_prices(rows, "buy", recommend=False)])
+        difference = np.abs(prices / expected - 1).max()
+        assert difference < TOLERANCE, f"{name}: sweep and row-by-row prices differ by {difference}"
+        sweep = best_of(lambda: predict.predict_sweep(features, axes, loaded))
+        by_rows = best_of(lambda: predict.predict_prices(rows, "buy", recommend=False))
+        print(f"{name:<24} {len(rows):>7,} {difference:>13.1e} {sweep * 1e3:>9.1f} {by_rows * 1e3:>9.1f} {by_rows / sweep:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Inference benchmark: LGBMRegressor.predict vs. the NumPy TreePredictor.
+
+Run from the project root:
+    python -m benchmarks.bench_tree_predictor [--sizes 1 100 100000]
+
+Rows are drawn from the training data (cycled for large batches) and featurized once.
+For each batch size the script checks that both predictors agree within float tolerance,
+then reports the best-of-5 time per call and per row.
+"""
+import argparse
+import logging
+import timeit
+
+import joblib
+import numpy as np
+
+from app import app  # noqa: F401  (initializes the app before model.predict, avoiding the circular import)
+from config import Config
+from model import predict
+from model.tree_predictor import TreePredictor
+from benchmarks.bench_features import load_rows
+
+TOLERANCE = 1e-9  # On the log-price scale
+
+
+def time_call(fn, size):
+    number = max(1, 2000 // size)
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 100_000])
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    model = joblib.load(Config.MODEL_PATH)
+    trees = TreePredictor.load(Config.TREES_PATH)
+    rows = load_rows()
+    X = predict.feature_builder.build_many([rows[i % len(rows)] for i in range(max(args.sizes))])
+
+    print(f"{'rows':>8} {'max |diff|':>11} {'lightgbm ms':>12} {'numpy ms':>10} {'lightgbm us/row':>16} {'numpy us/row':>13}")
+    for size in args.sizes:
+        batch = X[:size]
+        difference = np.abs(model.predict(batch) - trees.predict(batch)).max()
+        assert difference < TOLERANCE, f"predictions differ by {difference} at batch size {size}"
+        lightgbm = time_call(lambda: model.predict(batch), size)
+        numpy = time_call(lambda: trees.predict(batch), size)
+        print(f"{size:>8,} {difference:>11.1e} {lightgbm * 1e3:>12.3f} {numpy * 1e3:>10.3f} "
+              f"{lightgbm / size * 1e6:>16.2f} {numpy / size * 1e6:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Benchmark suite: times the prediction service and the storage layer, and compares the results with a stored baseline.
+
+Run from the project root (offline; every input is synthetic, see benchmarks/synthetic.py):
+    python -m benchmarks.suite [--quick] [--only predict db] [--output results.json]
+                               [--baseline benchmarks/baseline.json] [--threshold 0.25] [--update-baseline]
+
+Benchmarks (prediction cache disabled throughout):
+  featurize/<n>         preprocess_features on n properties, n = 1 .. 100,000
+  predict/<n>           predict_price (n = 1) or predict_prices on n properties, without recommendations
+  recommendations/<n>   get_recommendations (n = 1) or get_recommendations_batch on n properties
+  db/insert/<rows>      insert_query into a database already holding rows queries
+  db/read_all/<rows>    get_all_queries over rows queries
+  db/stats/<rows>       get_query_stats per day over rows queries (a year of them), from the aggregates
+  http/<route>/c<k>     POST /, /admin, /admin/queries, /admin/stats and /download_all_csv through
+                        Flask's test client, with k clients sending requests concurrently
+
+Batches above Config.MAX_BATCH_SIZE are processed in chunks of that size, as /predict/batch clients
+send them (a dense 100,000-row feature matrix alone would need 2.4 GB). Every benchmark reports the
+median and minimum seconds per call over its repetitions; HTTP benchmarks report the median and p99
+request latency and the requests per second. Results are written as JSON, with the machine and
+model they were measured on. A benchmark whose median is more than --threshold slower than in the
+baseline is flagged as a regression, and the exit status is 1. A baseline is only comparable on the
+machine that recorded it, so differences in the machine are printed before the comparison.
+Databases live in a temporary directory; data/housing.db is never touched.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app import app, database
+from app.query_writer import query_writer
+from config import Config
+from model import predict
+from benchmarks.synthetic import build_database, synthetic_properties, synthetic_queries
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+GROUPS = ("featurize", "predict", "recommendations", "db", "http")
+
+# Batch sizes, database sizes and concurrency levels of a full and a --quick run
+FULL = {"batch_sizes": (1, 10, 100, 1000, 10_000, 100_000), "db_rows": (1000, 10_000, 100_000),
+        "http_rows": 10_000, "clients": (1, 8), "min_time": 1.0, "http_duration": 2.0}
+QUICK = {"batch_sizes": (1, 100, 10_000), "db_rows": (1000, 10_000),
+         "http_rows": 1000, "clients": (1, 4), "min_time": 0.2, "http_duration": 0.5}
+
+# Machine properties that make results incomparable when they differ from the baseline's
+MACHINE_KEYS = ("python", "platform", "cpus", "numpy", "model_backend", "feature_pipeline", "quick")
+
+
+def measure(fn, min_time, min_runs=3, max_runs=1000):
+    """Calls fn once to warm up, then until min_time has passed (at least min_runs times); returns seconds per call."""
+    fn()
+    times = []
+    deadline = time.perf_counter() + min_time
+    while len(times) < min_runs or (time.perf_counter() < deadline and len(times) < max_runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"median": float(np.median(times)), "min": min(times), "runs": len(times)}
+
+
+def chunked(fn, items):
+    """Returns a callable running fn over items in chunks of Config.MAX_BATCH_SIZE."""
+    size = Config.MAX_BATCH_SIZE
+    chunks = [items[start:start + size] for start in range(0, len(items), size)]
+    return lambda: [fn(chunk) for chunk in chunks]
+
+
+def bench_featurize(settings):
+    properties = synthetic_properties(max(settings["batch_sizes"]), seed=1)
+    for n in settings["batch_sizes"]:
+        if n == 1:
+            call = lambda: predict.preprocess_features(properties[0])
+        else:
+            call = chunked(predict.preprocess_features, properties[:n])
+        yield f"featurize/{n}", measure(call, settings["min_time"])
+
+
+def bench_predict(settings):
+    properties = synthetic_properties(max(settings["batch_sizes"]), seed=2)
+    for n in settings["batch_sizes"]:
+        if n == 1:
+            call = lambda: predict.predict_price(properties[0], "buy", recommend=False)
+        else:
+            call = chunked(lambda chunk: predict.predict_prices(chunk, "buy", recommend=False), properties[:n])
+        yield f"predict/{n}", measure(call, settings["min_time"])
+
+
+def bench_recommendations(settings):
+    properties = synthetic_properties(1000, seed=3)
+    yield "recommendations/1", measure(lambda: database.get_recommendations("sell", properties[0]), settings["min_time"])
+    yield "recommendations/1000", measure(lambda: database.get_recommendations_batch("sell", properties), settings["min_time"])
+
+
+def bench_db(settings, directory):
+    for rows in settings["db_rows"]:
+        build_database(os.path.join(directory, f"queries_{rows}.db"), rows)
+        # Every insert is a new row, so none is skipped as a duplicate
+        values = iter(synthetic_queries(100_000, seed=rows))
+        yield f"db/insert/{rows}", measure(lambda: database.insert_query(*next(values)), settings["min_time"], max_runs=50_000)
+        yield f"db/read_all/{rows}", measure(database.get_all_queries, settings["min_time"])
+        # The warm-up call folds the inserted rows into the aggregates; the timed calls only read them
+        yield f"db/stats/{rows}", measure(lambda: database.get_query_stats("day"), settings["min_time"])
+        database.pool.close_all()
+
+
+def run_clients(send, clients, duration):
+    """Runs clients threads, each with its own test client, calling send(client) until duration passes.
+
+    Returns (latencies in seconds, elapsed seconds).
+    """
+    latencies = [[] for _ in range(clients)]
+    barrier = threading.Barrier(clients + 1)
+
+    def worker(latencies):
+        client = app.test_client()
+        barrier.wait()
+        deadline = time.perf_counter() + duration
+        while True:
+            start = time.perf_counter()
+            send(client)
+            end = time.perf_counter()
+            latencies.append(end - start)
+            if end >= deadline:
+                break
+
+    threads = [threading.Thread(target=worker, args=(latencies[i],)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return [latency for client in latencies for latency in client], time.perf_counter() - start
+
+
+def bench_http(settings, directory):
+    build_database(os.path.join(directory, "http.db"), settings["http_rows"])
+    properties = itertools.cycle([dict(features, purpose="buy") for features in synthetic_properties(10_000, seed=4)])
+    routes = {
+        "predict": lambda client: client.post("/", json=next(properties)),
+        "admin": lambda client: client.get("/admin"),
+        "admin_queries": lambda client: client.get("/admin/queries"),
+        "admin_stats": lambda client: client.get("/admin/stats"),
+        "csv_export": lambda client: client.get("/download_all_csv").get_data(),  # Reads the whole stream
+    }
+    for route, send in routes.items():
+        for clients in settings["clients"]:
+            send(app.test_client())  # Warm-up
+            latencies, elapsed = run_clients(send, clients, settings["http_duration"])
+            yield f"http/{route}/c{clients}", {
+                "median": float(np.median(latencies)),
+                "p99": float(np.percentile(latencies, 99)),
+                "requests_per_second": len(latencies) / elapsed,
+                "runs": len(latencies),
+            }
+    query_writer.flush()
+    database.pool.close_all()
+
+
+def machine_info(quick):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "model_backend": Config.MODEL_BACKEND,
+        "feature_pipeline": Config.FEATURE_PIPELINE,
+        "model_version": predict.models.version,
+        "commit": commit or None,
+        "quick": quick,
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Prints each benchmark against the baseline; returns the names of the regressions."""
+    differences = [f"{key}: {baseline['machine'].get(key)} -> {results['machine'].get(key)}"
+                   for key in MACHINE_KEYS if baseline["machine"].get(key) != results["machine"].get(key)]
+    if differences:
+        print("Baseline was recorded on a different setup; treat the comparison with care:")
+        for difference in differences:
+            print(f"  {difference}")
+
+    regressions = []
+    print(f"\n{'benchmark':<30} {'baseline':>11} {'current':>11} {'change':>8}")
+    for name, result in results["benchmarks"].items():
+        previous = baseline["benchmarks"].get(name)
+        if previous is None:
+            print(f"{name:<30} {'-':>11} {format_seconds(result['median']):>11} {'new':>8}")
+            continue
+        change = result["median"] / previous["median"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<30} {format_seconds(previous['median']):>11} {format_seconds(result['median']):>11} {change * 100:>+7.1f}%{flag}")
+    return regressions
+
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and shorter runs (a smoke test, not a baseline)")
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=GROUPS, help="benchmark groups to run")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON to compare with (default: %(default)s)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative slowdown flagged as a regression")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    settings = QUICK if args.quick else FULL
+    predict.prediction_cache.maxsize = 0  # Every call runs the model
+    predict.models.warm_up()
+    results = {"machine": machine_info(args.quick), "benchmarks": {}}
+
+    with tempfile.TemporaryDirectory() as directory:
+        benchmarks = {
+            "featurize": lambda: bench_featurize(settings),
+            "predict": lambda: bench_predict(settings),
+            "recommendations": lambda: bench_recommendations(settings),
+            "db": lambda: bench_db(settings, directory),
+            "http": lambda: bench_http(settings, directory),
+        }
+        for group in GROUPS:
+            if group not in args.only:
+                continue
+            for name, result in benchmarks[group]():
+                results["benchmarks"][name] = result
+                print(f"{name:<30} {format_seconds(result['median']):>11}", flush=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline written to {os.path.relpath(args.baseline)}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {os.path.relpath(args.baseline)}; run with --update-baseline to record one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"\nNo regressions above {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Synthetic inputs for the benchmarks, drawn from the distributions in data/processed/cleaned_dataset_iqr.csv.
+
+Properties are rows of the dataset sampled with replacement, with every continuous feature jittered
+by a few percent and rounded back to the column's grain. Feature correlations and the zipcode mix
+match the real sales, while the rows themselves are new (so they miss the prediction cache and pass
+the duplicate check). Logged queries reuse them with a predicted price near the sale price, a
+purpose and timestamps spread evenly over the last year.
+"""
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from app import database
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../data/processed/cleaned_dataset_iqr.csv")
+
+# Relative jitter applied to each continuous column, and the grain values are rounded to
+JITTER = {"sqft_living": (0.05, 10), "sqft_lot": (0.10, 10), "house_age": (0.05, 1)}
+
+_dataset = None
+
+def load_dataset():
+    global _dataset
+    if _dataset is None:
+        _dataset = pd.read_csv(DATASET_PATH)
+    return _dataset
+
+def synthetic_sales(n, seed=0):
+    """Returns n synthetic sales as {column: array}, with the columns of the dataset."""
+    df = load_dataset()
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(df), n)
+    sales = {column: df[column].to_numpy()[rows] for column in df.columns}
+    for column, (spread, grain) in JITTER.items():
+        values = sales[column] * rng.normal(1.0, spread, n)
+        sales[column] = np.maximum(np.round(values / grain) * grain, grain).astype(np.int64)
+    sales["price"] = np.round(sales["price"] * rng.normal(1.0, 0.05, n), 2)
+    return sales
+
+def properties_from_sales(sales):
+    """Returns feature dicts as validate_features produces them (JSON request with an integer zipcode)."""
+    columns = [
+        sales["sqft_living"].astype(float).tolist(),
+        sales["no_of_bedrooms"].astype(int).tolist(),
+        sales["no_of_bathrooms"].astype(float).tolist(),
+        sales["sqft_lot"].astype(float).tolist(),
+        sales["no_of_floors"].astype(int).tolist(),
+        sales["house_age"].astype(int).tolist(),
+        sales["zipcode"].astype(int).tolist(),
+    ]
+    keys = ("sqft_living", "no_of_bedrooms", "no_of_bathrooms", "sqft_lot", "no_of_floors", "house_age", "zipcode")
+    return [dict(zip(keys, values)) for values in zip(*columns)]
+
+def synthetic_properties(n, seed=0):
+    return properties_from_sales(synthetic_sales(n, seed))
+
+def synthetic_queries(n, seed=0):
+    """Returns n rows of QUERY_COLUMNS values (the property, its purpose and a predicted price)."""
+    sales = synthetic_sales(n, seed)
+    purposes = np.random.default_rng(seed + 1).choice(["buy", "sell"], n).tolist()
+    return [
+        tuple(features.values()) + (purpose, price)
+        for features, purpose, price in zip(properties_from_sales(sales), purposes, sales["price"].tolist())
+    ]
+
+def utc_timestamps(n, days=365):
+    """Returns n ascending 'YYYY-MM-DD HH:MM:SS' UTC timestamps spread evenly over the last days."""
+    now = np.datetime64("now", "s")
+    offsets = np.linspace(days * 86400, 0, n).astype("timedelta64[s]")
+    return [timestamp.replace("T", " ") for timestamp in np.datetime_as_string(now - offsets).tolist()]
+
+def build_database(path, rows, seed=0, days=365, chunk_size=10000):
+    """Creates a queries database at path holding rows synthetic queries over the last days, and points app.database at it.
+
+    Rows are inserted directly (with their timestamps, hashes and a model version) rather than
+    through insert_query, so building a large database takes seconds. Returns the connection pool.
+    """
+    database.pool.close_all()
+    database.pool = database.ConnectionPool(path)
+    database.DB_PATH = path
+    database.create_database()
+
+    conn = sqlite3.connect(path)
+    sql = f"""INSERT INTO queries ({", ".join(database.QUERY_COLUMNS)}, timestamp, query_hash, model_version)
+              VALUES ({", ".join("?" * (len(database.QUERY_COLUMNS) + 3))})"""
+    timestamps = utc_timestamps(rows, days)
+    for start in range(0, rows, chunk_size):
+        batch = synthetic_queries(min(chunk_size, rows - start), seed + start)
+        with conn:
+            conn.executemany(sql, [row + (timestamp, database.query_hash(*row), "synthetic")
+                                   for row, timestamp in zip(batch, timestamps[start:])])
+    conn.close()
+    return database.pool
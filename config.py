@@ -15,11 +15,98 @@ class Config:
     MODEL_PATH = 'model/saved_model/model.pkl'
     ENCODER_PATH = 'model/saved_model/encoder.pkl'
     POLY_PATH = 'model/saved_model/poly.pkl'
+    TREES_PATH = 'model/saved_model/model.txt'  # Booster exported by train_model.py (LightGBM text format)
+    # 5th / 95th percentile quantile models behind the prediction interval (dense features only)
+    INTERVAL_PATHS = ('model/saved_model/model_q05.txt', 'model/saved_model/model_q95.txt')
+
+    # Versioned model registry (model/registry.py): when model/registry/CURRENT exists, the version it
+    # names is served instead of the paths above, and workers swap in a newly activated version within
+    # MODEL_WATCH_INTERVAL seconds (0 disables the watcher)
+    MODEL_REGISTRY_DIR = 'model/registry'
+    MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', '5'))
+
+    # Feature pipeline used for serving: 'dense' (model.pkl, 3002 polynomial columns) or 'sparse'
+    # (the pruned 517-column CSR features; train the model with `python model/train_model.py --sparse`)
+    FEATURE_PIPELINE = os.environ.get('FEATURE_PIPELINE', 'dense')
+    SPARSE_MODEL_PATH = 'model/saved_model/model_sparse.pkl'
+    SPARSE_TREES_PATH = 'model/saved_model/model_sparse.txt'
+
+    # Model backend used for serving: 'numpy' (TREES_PATH and the INTERVAL_PATHS quantile models stacked
+    # into one model/tree_predictor.py predictor, so price and interval come from a single pass) or
+    # 'lightgbm' (model.pkl, with the interval models evaluated in a second pass)
+    MODEL_BACKEND = os.environ.get('MODEL_BACKEND', 'numpy')
+
+    # Load the model and run a warm-up prediction in the gunicorn master before the workers fork
+    # (gunicorn.conf.py); when disabled the model is loaded by the first prediction request
+    MODEL_WARM_UP = os.environ.get('MODEL_WARM_UP', '1') == '1'
+
+    # Prediction cache (LRU keyed on the normalized features; set the size to 0 to disable)
+    PREDICTION_CACHE_SIZE = 4096
+    PREDICTION_CACHE_TTL = 3600  # Seconds before a cached prediction is recomputed
+
+    # Micro-batching of concurrent single predictions (model/batcher.py): requests arriving within
+    # MICRO_BATCH_WAIT_MS of each other share one featurize + predict call of up to MICRO_BATCH_SIZE rows.
+    # Off by default: it adds up to MICRO_BATCH_WAIT_MS to every request and only pays off under concurrent load
+    MICRO_BATCH = os.environ.get('MICRO_BATCH', '0') == '1'
+    MICRO_BATCH_SIZE = int(os.environ.get('MICRO_BATCH_SIZE', '32'))
+    MICRO_BATCH_WAIT_MS = float(os.environ.get('MICRO_BATCH_WAIT_MS', '2'))
+
+    # Request counters and per-stage latency histograms, served at /metrics (app/metrics.py)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+
+    # Logging (app/logging_config.py): records below LOG_LEVEL cost a level check and nothing else.
+    # LOG_FORMAT is 'json' (one object per line) or 'text'; LOG_FILE is written by a background
+    # thread, set it to '' to log to stderr instead
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+    LOG_FILE = os.environ.get('LOG_FILE', 'database.log')
+
+    # SQLite database of logged predictions; empty means data/housing.db (the tests point it at a temporary file)
+    DATABASE_PATH = os.environ.get('DATABASE_PATH', '')
+
+    # Sampling profiler (app/profiler.py): samples every thread's stack every PROFILER_INTERVAL_MS
+    # and serves the folded stacks at /debug/profile (for flamegraph.pl or speedscope). Off by default
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', '0') == '1'
+    PROFILER_INTERVAL_MS = float(os.environ.get('PROFILER_INTERVAL_MS', '10'))
 
     
 
   
 
+    # Write-behind prediction logging (see app/query_writer.py)
+    QUERY_QUEUE_SIZE = 10000  # Rows buffered in memory before requests fall back to writing synchronously
+    QUERY_FLUSH_INTERVAL = 0.5  # Max seconds a queued row waits before being committed
+    QUERY_BATCH_SIZE = 200  # Max rows committed per transaction
+    QUERY_DUPLICATE_WINDOW = 1.0  # Identical submissions within this many seconds are stored once
+
+    # Admin dashboard pagination (rows per page fetched from /admin/queries)
+    ADMIN_PAGE_SIZE = 50
+    ADMIN_PAGE_SIZE_MAX = 500
+
+    # Rows read from the database per chunk when streaming CSV exports
+    CSV_CHUNK_SIZE = 1000
+
+    # Time zone used to display stored (UTC) timestamps and to interpret admin date filters
+    DISPLAY_TIMEZONE = 'Africa/Nairobi'
+
+    # Where feature recommendation rules come from: 'builtin' (app/database.py) or 'database'
+    # (the recommendations table), and seconds between checks of the table for changed rules
+    RECOMMENDATION_RULES_SOURCE = 'builtin'
+    RECOMMENDATION_RULES_REFRESH = 60
+
+    # Maximum number of properties accepted by /predict/batch in one request
+    MAX_BATCH_SIZE = 10000
+
+    # Maximum number of grid points (the product of the axis lengths) priced by one /predict/sweep request
+    SWEEP_MAX_POINTS = 2500
+    # Lower limit for grids with a zipcode axis: each zipcode step flips many one-hot splits, so these
+    # cost about 3x more per point (python -m benchmarks.bench_sweep)
+    SWEEP_MAX_ZIPCODE_POINTS = 1000
+
+    # Comparable sales returned by /comps when the request does not set k, and the largest k allowed
+    COMPS_DEFAULT_K = 10
+    COMPS_MAX_K = 50
+
     # Zipcode range for validation (can be modified as needed)
     ZIPCODE_RANGE = (98001, 99001)
 
@@ -0,0 +1,28 @@
+# Gunicorn settings (read automatically when gunicorn is started from the project root)
+import gc
+import time
+
+# Import the app once in the master process; workers are forked from it and share its memory
+preload_app = True
+
+_started = time.perf_counter()
+
+def when_ready(server):
+    """Creates or migrates the database, then loads and warms up the model in the master, before any worker is forked."""
+    from config import Config
+    from app import database
+    database.create_database()
+    database.pool.close_all()  # Workers open their own connections
+    if Config.MODEL_WARM_UP:
+        from model.predict import models
+        models.warm_up()
+        server.log.info("Model startup breakdown (ms): %s", models.startup_report())
+
+        # Comparable sales index (app/comps.py), built or loaded once and shared with the workers
+        from app.comps import comparable_sales
+        server.log.info("Comparable sales index: %d sales", len(comparable_sales.index))
+    server.log.info("Master ready in %.2fs", time.perf_counter() - _started)
+
+    # Move everything loaded so far out of the garbage collector's reach, so collections in the
+    # workers do not touch (and copy) the shared pages
+    gc.freeze()
@@ -0,0 +1,91 @@
+import logging
+import queue
+import threading
+import time
+
+from utils import ForkSafeThread
+
+
+class _Pending:
+    """One submitted item waiting for its batch to be processed."""
+    __slots__ = ("item", "result", "error", "done")
+
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class MicroBatcher(ForkSafeThread):
+    """Coalesces concurrent single-item calls into one batched call.
+
+    submit() queues an item and blocks until its result is ready. A background thread takes
+    the oldest waiting item, keeps collecting until max_batch_size items are gathered or
+    max_wait seconds have passed since it took the first one, then calls process(items) once
+    for the whole batch; process must return one result per item, in order. An exception from
+    process is raised in every caller of that batch. After a batch of one item the next batch
+    does not wait (items queued while the model runs are still picked up), so a lone client only
+    pays for the thread handoff. The batching thread is a ForkSafeThread, started by the first submit().
+    """
+
+    thread_name = "micro-batcher"
+
+    def __init__(self, process, max_batch_size=32, max_wait=0.002):
+        super().__init__()
+        self.process = process
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait  # Max seconds the first item of a batch waits for company
+
+        self._queue = None
+        self._last_batch_size = 0
+
+        self.batches = 0
+        self.items = 0
+
+    def _on_start(self):
+        self._queue = queue.SimpleQueue()
+        return ()
+
+    def submit(self, item):
+        """Runs item through the next batch and returns its result."""
+        self.ensure_started()
+        pending = _Pending(item)
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        # Only wait for company when the last batch showed there is concurrent traffic
+        deadline = time.monotonic() + (self.max_wait if self._last_batch_size > 1 else 0)
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                # Items that are already queued are taken even once the deadline has passed
+                batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._last_batch_size = len(batch)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = self.process([pending.item for pending in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Batch of {len(batch)} items returned {len(results)} results")
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as e:
+                logging.error(f"Error processing a batch of {len(batch)} predictions: {str(e)}")
+                for pending in batch:
+                    pending.error = e
+            finally:
+                self.batches += 1
+                self.items += len(batch)
+                for pending in batch:
+                    pending.done.set()
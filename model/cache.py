@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with a per-entry TTL for prediction results.
+
+    The cache remembers the modification signature of the files it depends on
+    (the model, encoder and poly pickles) and clears itself when any of them changes.
+    A maxsize of 0 disables caching.
+    """
+
+    def __init__(self, maxsize, ttl, watched_paths=(), check_interval=1.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.watched_paths = tuple(watched_paths)
+        self.check_interval = check_interval
+
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._signature = self._file_signature()
+        self._next_check = time.monotonic() + check_interval
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _file_signature(self):
+        signature = []
+        for path in self.watched_paths:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _check_files(self, now):
+        # Called with the lock held; stat the files at most once per check_interval
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        signature = self._file_signature()
+        if signature != self._signature:
+            self._signature = signature
+            self._entries.clear()
+            self.invalidations += 1
+
+    def get(self, key):
+        """Returns the cached value for key, or None on a miss."""
+        if not self.maxsize:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._check_files(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Stores value under key, evicting the least recently used entry when full."""
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns the cache counters as a dict."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
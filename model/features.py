@@ -0,0 +1,182 @@
+import numpy as np
+
+# Numeric input columns, in the order the encoder/poly pipeline was trained on
+NUMERIC_COLUMNS = ["sqft_living", "no_of_bedrooms", "no_of_bathrooms", "sqft_lot", "no_of_floors", "house_age"]
+
+class FeatureBuilder:
+    """Builds the one-hot + degree-2 polynomial feature row without pandas.
+
+    The zipcode-to-column index and the polynomial term layout are frozen from the fitted
+    encoder and poly once, at load time. A request then only fills the handful of non-zero
+    terms of a zeroed row: numeric x numeric products, plus the terms of its own zipcode column.
+    Products with any other zipcode column are always zero and are never touched.
+    """
+
+    def __init__(self, encoder, poly):
+        n_numeric = len(NUMERIC_COLUMNS)
+        input_names = list(poly.feature_names_in_)
+        if input_names[:n_numeric] != NUMERIC_COLUMNS:
+            raise ValueError(f"Unexpected poly input columns: {input_names[:n_numeric]}")
+
+        categories = encoder.categories_[0]
+        if len(input_names) != n_numeric + len(categories):
+            raise ValueError("Encoder categories do not match the poly input columns")
+
+        # Same lookup semantics as OneHotEncoder(handle_unknown='ignore'): unknown -> all zeros
+        self.zip_index = {category.item(): k for k, category in enumerate(categories)}
+        self.n_features_out = poly.n_output_features_
+
+        # Slot n_numeric of the value vector holds a constant 1.0, which stands in for
+        # the (single) active one-hot column and for the missing factor of degree-1 terms
+        one = n_numeric
+        numeric_out, numeric_a, numeric_b = [], [], []
+        zip_out = [[] for _ in categories]
+        zip_src = [[] for _ in categories]
+
+        for out_col, powers in enumerate(poly.powers_):
+            factors = [i for i in np.flatnonzero(powers) for _ in range(powers[i])]
+            zips = sorted(set(i - n_numeric for i in factors if i >= n_numeric))
+            numerics = [i for i in factors if i < n_numeric]
+
+            if not zips:
+                numeric_out.append(out_col)
+                numeric_a.append(numerics[0])
+                numeric_b.append(numerics[1] if len(numerics) > 1 else one)
+            elif len(zips) == 1:
+                # zip, zip^2 -> 1.0; numeric * zip -> the numeric value
+                zip_out[zips[0]].append(out_col)
+                zip_src[zips[0]].append(numerics[0] if numerics else one)
+            # Products of two different zipcode columns are structurally zero
+
+        self.numeric_out = np.array(numeric_out, dtype=np.intp)
+        self.numeric_a = np.array(numeric_a, dtype=np.intp)
+        self.numeric_b = np.array(numeric_b, dtype=np.intp)
+        self.zip_out = [np.array(cols, dtype=np.intp) for cols in zip_out]
+        self.zip_src = [np.array(src, dtype=np.intp) for src in zip_src]
+
+    def build(self, features):
+        """Returns the (1, n_features_out) feature row for one feature dict."""
+        values = np.array([features[column] for column in NUMERIC_COLUMNS] + [1.0], dtype=np.float64)
+
+        row = np.zeros((1, self.n_features_out))
+        out = row[0]
+        out[self.numeric_out] = values[self.numeric_a] * values[self.numeric_b]
+
+        k = self.zip_index.get(features["zipcode"])
+        if k is not None:
+            out[self.zip_out[k]] = values[self.zip_src[k]]
+        return row
+
+    def build_many(self, features_list):
+        """Returns the (N, n_features_out) feature matrix for a list of feature dicts."""
+        values = [[features[column] for column in NUMERIC_COLUMNS] for features in features_list]
+        zip_indices = [self.zip_index.get(features["zipcode"], -1) for features in features_list]
+        return self.build_values(np.array(values, dtype=np.float64).reshape(-1, len(NUMERIC_COLUMNS)), zip_indices)
+
+    def build_values(self, values, zip_indices):
+        """Returns the feature matrix for an (N, 6) array of NUMERIC_COLUMNS values and N zipcode column indices (-1 = unknown)."""
+        n_rows = len(values)
+        values = np.concatenate([np.asarray(values, dtype=np.float64), np.ones((n_rows, 1))], axis=1)
+        zip_indices = np.asarray(zip_indices, dtype=np.intp)
+
+        matrix = np.zeros((n_rows, self.n_features_out))
+        matrix[:, self.numeric_out] = values[:, self.numeric_a] * values[:, self.numeric_b]
+
+        # Group rows by zipcode so each active column block is written once
+        for k in np.unique(zip_indices[zip_indices >= 0]):
+            rows = np.flatnonzero(zip_indices == k)
+            matrix[rows[:, None], self.zip_out[k]] = values[rows[:, None], self.zip_src[k]]
+        return matrix
+
+class SparseFeatureBuilder:
+    """Builds a pruned, sparse (CSR) version of the one-hot + degree-2 polynomial features.
+
+    The dense layout has 3002 columns, 2415 of which multiply two different zipcode columns
+    and are always zero, and 70 zip^2 columns that duplicate the zip columns. This layout keeps
+    only the columns that can be non-zero, in this order:
+        numerics (6) | numeric x numeric products (21) | zip one-hot (70) | numeric x zip (6 x 70)
+    A row has at most 34 stored values. Used for both training (transform_frame) and serving.
+    With dense_output=True, build() and build_many() return plain arrays in the same layout,
+    which LightGBM predicts on faster than on a CSR matrix for a single request.
+    """
+
+    def __init__(self, zip_categories, dense_output=False):
+        n_numeric = len(NUMERIC_COLUMNS)
+        self.dense_output = dense_output
+        # Same lookup semantics as OneHotEncoder(handle_unknown='ignore'): unknown -> all zeros
+        self.zip_index = {getattr(category, "item", lambda: category)(): k for k, category in enumerate(zip_categories)}
+        self.n_zips = len(zip_categories)
+
+        self.pair_a, self.pair_b = (np.array(index, dtype=np.intp) for index in np.triu_indices(n_numeric))
+        self.zip_start = n_numeric + len(self.pair_a)
+        self.cross_start = self.zip_start + self.n_zips
+        self.n_features_out = self.cross_start + n_numeric * self.n_zips
+
+        self.feature_names = (
+            list(NUMERIC_COLUMNS)
+            + [f"{NUMERIC_COLUMNS[a]} {NUMERIC_COLUMNS[b]}" if a != b else f"{NUMERIC_COLUMNS[a]}^2"
+               for a, b in zip(self.pair_a, self.pair_b)]
+            + [f"zipcode_{category}" for category in zip_categories]
+            + [f"{column} zipcode_{category}" for column in NUMERIC_COLUMNS for category in zip_categories]
+        )
+
+    def transform(self, values, zip_indices):
+        """Returns the CSR matrix for an (N, 6) numeric array and N zipcode column indices (-1 = unknown)."""
+        from scipy import sparse
+
+        values = np.asarray(values, dtype=np.float64)
+        zip_indices = np.asarray(zip_indices, dtype=np.intp)
+        n_rows, n_numeric = values.shape
+        known = zip_indices >= 0
+        zips = np.where(known, zip_indices, 0)
+
+        # Every row gets the same 34 candidate slots, already in column order
+        data = np.empty((n_rows, n_numeric + len(self.pair_a) + 1 + n_numeric))
+        columns = np.empty(data.shape, dtype=np.intp)
+        data[:, :n_numeric] = values
+        columns[:, :n_numeric] = np.arange(n_numeric)
+        pairs = slice(n_numeric, self.zip_start)
+        data[:, pairs] = values[:, self.pair_a] * values[:, self.pair_b]
+        columns[:, pairs] = np.arange(n_numeric, self.zip_start)
+        data[:, self.zip_start] = 1.0
+        columns[:, self.zip_start] = self.zip_start + zips
+        data[:, self.zip_start + 1:] = values
+        columns[:, self.zip_start + 1:] = self.cross_start + np.arange(n_numeric) * self.n_zips + zips[:, None]
+
+        # Drop explicit zeros and the zipcode slots of rows with an unknown zipcode
+        keep = data != 0
+        keep[~known, self.zip_start:] = False
+        indptr = np.zeros(n_rows + 1, dtype=np.intp)
+        np.cumsum(keep.sum(axis=1), out=indptr[1:])
+        return sparse.csr_matrix((data[keep], columns[keep], indptr), shape=(n_rows, self.n_features_out))
+
+    def transform_frame(self, df):
+        """Returns the CSR matrix for a DataFrame with the numeric columns and a zipcode column."""
+        zip_indices = [self.zip_index.get(zipcode, -1) for zipcode in df["zipcode"].tolist()]
+        return self.transform(df[NUMERIC_COLUMNS].to_numpy(dtype=np.float64), zip_indices)
+
+    def build(self, features):
+        """Returns the (1, n_features_out) row for one feature dict (CSR unless dense_output)."""
+        if not self.dense_output:
+            return self.build_many([features])
+        values = np.array([features[column] for column in NUMERIC_COLUMNS], dtype=np.float64)
+        row = np.zeros((1, self.n_features_out))
+        out = row[0]
+        out[:len(values)] = values
+        out[len(values):self.zip_start] = values[self.pair_a] * values[self.pair_b]
+        k = self.zip_index.get(features["zipcode"])
+        if k is not None:
+            out[self.zip_start + k] = 1.0
+            out[self.cross_start + k::self.n_zips] = values
+        return row
+
+    def build_many(self, features_list):
+        """Returns the (N, n_features_out) matrix for a list of feature dicts (CSR unless dense_output)."""
+        values = [[features[column] for column in NUMERIC_COLUMNS] for features in features_list]
+        zip_indices = [self.zip_index.get(features["zipcode"], -1) for features in features_list]
+        return self.build_values(np.array(values, dtype=np.float64).reshape(-1, len(NUMERIC_COLUMNS)), zip_indices)
+
+    def build_values(self, values, zip_indices):
+        """Returns the matrix for an (N, 6) numeric array and N zipcode column indices (CSR unless dense_output)."""
+        matrix = self.transform(values, zip_indices)
+        return matrix.toarray() if self.dense_output else matrix
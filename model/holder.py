@@ -0,0 +1,188 @@
+import importlib
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from model.features import FeatureBuilder, SparseFeatureBuilder
+from model.registry import file_digest
+from model.tree_predictor import TreePredictor
+
+# Everything one model version needs to serve a prediction; requests keep a reference to one of
+# these for their whole lifetime, so a hot swap never mixes the encoder of one version with another's model
+LoadedModels = namedtuple("LoadedModels", "model encoder poly feature_builder interval_model version")
+
+class ModelHolder:
+    """Holds the saved model, encoder and polynomial transformer, loaded on first use.
+
+    Importing the prediction code stays cheap (joblib, LightGBM and scikit-learn are only
+    imported when the pickles are unpickled), so processes that never predict, such as admin
+    requests, never pay for them. warm_up() loads everything ahead of time and runs one
+    synthetic prediction; called in the gunicorn master with preload_app, the loaded objects
+    are shared copy-on-write with every forked worker. swap() replaces the loaded objects with
+    another holder's (see model/registry.py) while requests keep being served.
+    """
+
+    def __init__(self, model_path, encoder_path, poly_path, trees_path=None, backend="lightgbm", sparse=False, interval_paths=(), version=None):
+        self.model_path = model_path
+        self.encoder_path = encoder_path
+        self.poly_path = poly_path
+        self.trees_path = trees_path  # Exported booster, evaluated with NumPy when backend is 'numpy'
+        self.backend = backend
+        self.sparse = sparse  # Model trained on SparseFeatureBuilder features instead of the dense poly layout
+        self.interval_paths = tuple(interval_paths)  # (lower, upper) quantile models, as exported text models
+        self.version = version  # Registry version; files outside the registry are labelled by content hash on load
+        self.timings = {}  # Startup step -> seconds
+        self._lock = threading.Lock()
+        self._loaded = None  # LoadedModels
+        self._grid_lock = threading.Lock()
+        self._grid_model = None  # (LightGBM model, the same trees as a TreePredictor), see grid_model()
+
+    def _timed(self, step, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.timings[step] = time.perf_counter() - start
+        return result
+
+    def load(self):
+        """Loads the saved objects if they are not loaded yet (thread-safe); returns the LoadedModels."""
+        if self._loaded is None:
+            with self._lock:
+                if self._loaded is None:
+                    try:
+                        joblib = self._timed("import_joblib", importlib.import_module, "joblib")
+                        model, interval_model = self._load_models(joblib)
+                        encoder = self._timed("load_encoder", joblib.load, self.encoder_path)
+                        poly = self._timed("load_poly", joblib.load, self.poly_path)
+                        # Freeze the zipcode columns and polynomial term layout once, for fast per-request featurization
+                        if self.sparse:
+                            feature_builder = self._timed("feature_builder", SparseFeatureBuilder, encoder.categories_[0], True)
+                        else:
+                            feature_builder = self._timed("feature_builder", FeatureBuilder, encoder, poly)
+                    except Exception as e:
+                        logging.error(f"Error loading model, encoder, or polynomial features: {str(e)}")
+                        raise
+                    if self.version is None:
+                        self.version = f"local-{file_digest(self.model_path)}"
+                    self._loaded = LoadedModels(model, encoder, poly, feature_builder, interval_model, self.version)
+                    logging.info("Model, encoder, and polynomial features loaded in %.3fs", sum(self.timings.values()))
+        return self._loaded
+
+    def _load_models(self, joblib):
+        """Returns (model, interval_model). With the numpy backend the price and quantile trees
+        are stacked into one predictor, so the interval comes from the same pass as the price."""
+        interval_paths = self.interval_paths
+        if interval_paths and self.sparse:
+            logging.warning("Prediction intervals need the dense feature pipeline, using the fixed margin instead")
+            interval_paths = ()
+
+        if self.backend == "numpy":
+            try:
+                return self._timed("load_model", TreePredictor.load, self.trees_path, *interval_paths), None
+            except Exception as e:
+                logging.error(f"Error loading the NumPy tree predictor, falling back to LightGBM: {str(e)}")
+
+        # Unpickling the model also imports LightGBM and scikit-learn
+        model = self._timed("load_model", joblib.load, self.model_path)
+        interval_model = None
+        if interval_paths:
+            try:
+                interval_model = self._timed("load_interval_model", TreePredictor.load, *interval_paths)
+            except Exception as e:
+                logging.error(f"Error loading the interval models, using the fixed margin instead: {str(e)}")
+        return model, interval_model
+
+    @property
+    def is_loaded(self):
+        return self._loaded is not None
+
+    @property
+    def model(self):
+        return self.load().model
+
+    @property
+    def encoder(self):
+        return self.load().encoder
+
+    @property
+    def poly(self):
+        return self.load().poly
+
+    @property
+    def feature_builder(self):
+        return self.load().feature_builder
+
+    @property
+    def interval_model(self):
+        return self.load().interval_model
+
+    def swap(self, other):
+        """Starts serving another holder's models (loaded first if needed); in-flight requests finish on the old ones."""
+        loaded = other.load()
+        with self._lock:
+            self.model_path, self.encoder_path, self.poly_path = other.model_path, other.encoder_path, other.poly_path
+            self.trees_path, self.interval_paths, self.version = other.trees_path, other.interval_paths, other.version
+            self.timings = other.timings
+            self._loaded = loaded
+
+    def predict(self, X, loaded=None):
+        """Returns (log_price, log_lower, log_upper) arrays for a feature matrix.
+
+        The bounds are None when no interval models are loaded. Pass loaded to predict with a
+        LoadedModels snapshot instead of the models currently being served.
+        """
+        loaded = loaded or self.load()
+        model, interval_model = loaded.model, loaded.interval_model
+        if getattr(model, "n_outputs", 1) > 1:
+            # Price and quantile trees stacked in one NumPy predictor
+            outputs = model.predict(X)
+            return outputs[:, 0], outputs[:, 1], outputs[:, 2]
+        log_price = model.predict(X)
+        if interval_model is None:
+            return log_price, None, None
+        bounds = interval_model.predict(X)
+        return log_price, bounds[:, 0], bounds[:, 1]
+
+    def grid_model(self, loaded):
+        """Returns the price model as a TreePredictor, for predict_grid(): the numpy backend's own
+        predictor, or the LightGBM booster's trees, converted on first use and kept per model version."""
+        if isinstance(loaded.model, TreePredictor):
+            return loaded.model
+        with self._grid_lock:
+            if self._grid_model is None or self._grid_model[0] is not loaded.model:
+                predictor = self._timed("grid_model", lambda: TreePredictor.from_dump(loaded.model.booster_.dump_model()))
+                self._grid_model = (loaded.model, predictor)
+            return self._grid_model[1]
+
+    def predict_grid(self, X, shape, loaded=None):
+        """Same as predict(), for the feature rows of a what-if grid of the given shape
+        (see TreePredictor.predict_grid). Both backends evaluate the trees with NumPy here."""
+        loaded = loaded or self.load()
+        model, interval_model = self.grid_model(loaded), loaded.interval_model
+        if model.n_outputs > 1:
+            outputs = model.predict_grid(X, shape)
+            return outputs[:, 0], outputs[:, 1], outputs[:, 2]
+        log_price = model.predict_grid(X, shape)
+        if interval_model is None:
+            return log_price, None, None
+        bounds = interval_model.predict_grid(X, shape)
+        return log_price, bounds[:, 0], bounds[:, 1]
+
+    def warm_up(self):
+        """Loads everything and runs one synthetic prediction so the first request is served at full speed."""
+        self.load()
+        start = time.perf_counter()
+        features = {
+            "sqft_living": 1500.0, "no_of_bedrooms": 3, "no_of_bathrooms": 2.0, "sqft_lot": 5000.0,
+            "no_of_floors": 1, "house_age": 20, "zipcode": int(self.load().encoder.categories_[0][0])
+        }
+        loaded = self.load()
+        self.predict(loaded.feature_builder.build(features), loaded)
+        self.predict(loaded.feature_builder.build_many([features, features]), loaded)  # Batch code path
+        self.predict_grid(loaded.feature_builder.build_many([features, features]), (2,), loaded)  # Sweep code path
+        self.timings["warm_up"] = time.perf_counter() - start
+        logging.info("Model startup breakdown: %s", self.startup_report())
+
+    def startup_report(self):
+        """Returns the time spent on each startup step, in milliseconds."""
+        return {step: round(seconds * 1000, 1) for step, seconds in self.timings.items()}
@@ -1,49 +1,67 @@
-import joblib
+import time
 import numpy as np
-import pandas as pd
-from sklearn.preprocessing import OneHotEncoder, PolynomialFeatures
 from config import Config  # Import from the config file
-from app.database import insert_query, get_recommendations  # Import the functions to store predictions and get recommendations
+from app.database import get_recommendations, get_recommendations_batch  # Import the functions to get recommendations
+from model.features import NUMERIC_COLUMNS
+from model.holder import ModelHolder
+from model.registry import ModelRegistry, ModelWatcher
+from model.cache import PredictionCache
+from model.batcher import MicroBatcher
+from app.query_writer import query_writer
+from app.metrics import Gauge, registry as metrics_registry, stage_duration
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
-
 # Load the saved model using paths from the config
-model_path = Config.MODEL_PATH
+sparse_features = Config.FEATURE_PIPELINE == 'sparse'
+model_path = Config.SPARSE_MODEL_PATH if sparse_features else Config.MODEL_PATH
 encoder_path = Config.ENCODER_PATH
 poly_path = Config.POLY_PATH
+trees_path = Config.SPARSE_TREES_PATH if sparse_features else Config.TREES_PATH
 
-# Load the saved model, encoder, and poly using joblib
-try:
-    model = joblib.load(model_path)
-    encoder = joblib.load(encoder_path)
-    poly = joblib.load(poly_path)
-    logging.debug("Model, encoder, and polynomial features loaded successfully.")
-except Exception as e:
-    logging.error(f"Error loading model, encoder, or polynomial features: {str(e)}")
-    raise
+registry = ModelRegistry(Config.MODEL_REGISTRY_DIR)
 
-# Function to preprocess features for prediction
-def preprocess_features(features):
-    try:
-        # Convert the input data to a DataFrame
-        input_data = pd.DataFrame([features])
-        logging.debug(f"Input data converted to DataFrame: {input_data}")
+def build_holder(version=None):
+    """Returns an unloaded ModelHolder for a registry version, or for the config paths when version is None."""
+    if version is None:
+        return ModelHolder(model_path, encoder_path, poly_path, trees_path=trees_path, backend=Config.MODEL_BACKEND,
+                           sparse=sparse_features, interval_paths=Config.INTERVAL_PATHS)
+    files = registry.files(version)
+    interval_paths = (files["interval_low"], files["interval_high"]) if "interval_low" in files and "interval_high" in files else ()
+    return ModelHolder(files.get("sparse_model" if sparse_features else "model"), files.get("encoder"), files.get("poly"),
+                       trees_path=files.get("sparse_trees" if sparse_features else "trees"), backend=Config.MODEL_BACKEND,
+                       sparse=sparse_features, interval_paths=interval_paths, version=version)
 
-        # One-Hot Encode the 'zipcode' feature (same as during training)
-        encoded_zipcode = encoder.transform(input_data[['zipcode']])
-        encoded_df = pd.DataFrame(encoded_zipcode, columns=encoder.get_feature_names_out(['zipcode']))
-        logging.debug(f"Encoded zipcode: {encoded_df}")
+# The current model, encoder, and poly are loaded on first use (or by models.warm_up(), see gunicorn.conf.py)
+models = build_holder(registry.current_version())
 
-        # Remove the 'zipcode' column and concatenate the encoded data
-        input_data = input_data.drop(columns=['zipcode'])
-        input_data = pd.concat([input_data, encoded_df], axis=1)
-        logging.debug(f"Input data after encoding: {input_data}")
+# Swaps in newly activated registry versions in the background (started by the first prediction in each process)
+model_watcher = ModelWatcher(registry, models, build_holder, interval=Config.MODEL_WATCH_INTERVAL)
 
-        # Polynomial feature transformation (same degree as used in training)
-        input_data_poly = poly.transform(input_data)
-        logging.debug(f"Input data after polynomial transformation: {input_data_poly}")
+def current_models():
+    """Returns the LoadedModels snapshot a request should use from start to finish."""
+    model_watcher.ensure_started()
+    return models.load()
+
+def __getattr__(name):
+    # model, encoder, poly and feature_builder stay importable from this module, but load lazily
+    if name in ("model", "encoder", "poly", "feature_builder"):
+        return getattr(models, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Function to preprocess features for prediction
+def preprocess_features(features, loaded=None):
+    """Builds the encoded + polynomial feature matrix for a single feature dict or a list of them.
+
+    Produces exactly the same values as encoder.transform -> pd.concat -> poly.transform,
+    without constructing any DataFrames.
+    """
+    try:
+        feature_builder = (loaded or models.load()).feature_builder
+        if isinstance(features, list):
+            input_data_poly = feature_builder.build_many(features)
+        else:
+            input_data_poly = feature_builder.build(features)
+        logging.debug("Features built with shape %s", input_data_poly.shape)
 
         return input_data_poly
     except Exception as e:
@@ -51,39 +69,416 @@ def preprocess_features(features):
         raise
 
 
-# Function to predict price and fetch recommendations (no DB insert here)
-def predict_price(features, purpose):
+# Memoizes (predicted_price, confidence_interval) per normalized feature tuple;
+# cleared automatically when any of the saved model files changes on disk
+prediction_cache = PredictionCache(
+    maxsize=Config.PREDICTION_CACHE_SIZE,
+    ttl=Config.PREDICTION_CACHE_TTL,
+    watched_paths=(model_path, encoder_path, poly_path, trees_path) + Config.INTERVAL_PATHS
+)
+
+metrics_registry.register(Gauge("prediction_cache_hits_total", "Predictions served from the prediction cache.",
+                        lambda: {(): prediction_cache.hits}, type="counter"))
+metrics_registry.register(Gauge("prediction_cache_misses_total", "Predictions that had to run the model.",
+                        lambda: {(): prediction_cache.misses}, type="counter"))
+metrics_registry.register(Gauge("model_info", "The model version being served (always 1).",
+                        lambda: {(models.version,): 1} if models.is_loaded else {}, ("version",)))
+
+def cache_key(features, loaded=None):
+    """Normalizes a feature dict into the prediction cache key.
+
+    Numeric values are keyed as floats (1500 and 1500.0 featurize identically) and the zipcode
+    as the one-hot column it activates, so the key captures exactly what the model sees.
+    The model version is part of the key, so a hot-swapped model never serves stale entries.
+    """
+    loaded = loaded or models.load()
+    return tuple(float(features[column]) for column in NUMERIC_COLUMNS) + (loaded.feature_builder.zip_index.get(features["zipcode"]), loaded.version)
+
+# Function to validate and cast raw request data into model features
+def validate_features(data):
+    """Casts raw input into the feature dict used for prediction (same rules as the home page form).
+
+    Raises KeyError for a missing field and ValueError for a non-numeric value or an out-of-range zipcode.
+    """
+    try:
+        features = {
+            "sqft_living": float(data['sqft_living']),
+            "no_of_bedrooms": int(data['no_of_bedrooms']),
+            "no_of_bathrooms": float(data['no_of_bathrooms']),  # Allow decimals for bathrooms
+            "sqft_lot": float(data['sqft_lot']),
+            "no_of_floors": int(data['no_of_floors']),
+            "house_age": int(data['house_age']),
+            "zipcode": int(data['zipcode'])  # '98103' and 98103 are the same encoder category
+        }
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Please enter valid numerical values for all fields. Error: {str(e)}")
+
+    # Validate the zipcode against the range defined in config.py
+    min_zipcode, max_zipcode = Config.ZIPCODE_RANGE
+    if not (min_zipcode <= features["zipcode"] <= max_zipcode):
+        raise ValueError(f"Invalid zipcode. It should be between {min_zipcode} and {max_zipcode}.")
+
+    return features
+
+PURPOSES = ("buy", "sell")
+
+def validate_purpose(purpose):
+    """Returns purpose if it is 'buy' or 'sell'; raises ValueError otherwise (it is stored and shown on the admin dashboard)."""
+    if purpose not in PURPOSES:
+        raise ValueError("Invalid purpose. It should be 'buy' or 'sell'.")
+    return purpose
+
+# Fixed margin of error of $20,000, used only when the quantile models are unavailable
+MARGIN_OF_ERROR = 20000
+
+def infer_prices(processed_features, loaded=None):
+    """Runs the model on a featurized matrix; returns (predicted_price, ci_min, ci_max) arrays.
+
+    The interval comes from the 5th / 95th percentile quantile models, evaluated with the price model.
+    """
+    start = time.perf_counter()
+    predicted_price_log, lower_log, upper_log = models.predict(processed_features, loaded)
+    stage_duration.observe(time.perf_counter() - start, "model_predict")
+    logging.debug("Predicted price (log scale): %s", predicted_price_log)
+
+    return to_prices(predicted_price_log, lower_log, upper_log)
+
+def to_prices(predicted_price_log, lower_log, upper_log):
+    """Turns the model's log-scale outputs into (predicted_price, ci_min, ci_max) arrays."""
+    # Inverse log transformation to get actual price
+    predicted_price = np.expm1(predicted_price_log)
+    logging.debug("Predicted price (actual): %s", predicted_price)
+
+    # Confidence Interval
+    if lower_log is None:
+        return predicted_price, predicted_price - MARGIN_OF_ERROR, predicted_price + MARGIN_OF_ERROR
+    # Quantile models are fitted separately, so make sure the interval contains the prediction
+    ci_min = np.minimum(np.expm1(lower_log), predicted_price)
+    ci_max = np.maximum(np.expm1(upper_log), predicted_price)
+    return predicted_price, ci_min, ci_max
+
+# Inputs a what-if sweep (/predict/sweep) can vary; validate_features casts the integer ones with int()
+SWEEP_FEATURES = NUMERIC_COLUMNS + ["zipcode"]
+INTEGER_FEATURES = ("no_of_bedrooms", "no_of_floors", "house_age", "zipcode")
+
+def sweep_values(axis):
+    """Returns (feature, values) for one sweep axis.
+
+    axis is {"feature": name, "values": [...]} or {"feature": name, "start": a, "stop": b, "step": c}
+    (stop included). Raises ValueError for an unknown feature, a malformed axis, a fractional value
+    of an integer feature, an out-of-range zipcode, or more than Config.SWEEP_MAX_POINTS values.
+    """
+    if not isinstance(axis, dict):
+        raise ValueError("Each axis must be a JSON object.")
+    feature = axis.get("feature")
+    if feature not in SWEEP_FEATURES:
+        raise ValueError(f"Cannot vary '{feature}'. Choose from: {', '.join(SWEEP_FEATURES)}.")
     try:
-        logging.debug(f"Received features for prediction: {features}")
-        logging.debug(f"Purpose: {purpose}")
+        if "values" in axis:
+            if not isinstance(axis["values"], list) or not axis["values"]:
+                raise ValueError("values must be a non-empty list")
+            values = [float(value) for value in axis["values"]]
+        else:
+            start, stop, step = float(axis["start"]), float(axis["stop"]), float(axis["step"])
+            if not (step > 0 and stop >= start):
+                raise ValueError("step must be positive and stop must not be below start")
+            count = int(np.floor((stop - start) / step + 1e-9)) + 1
+            if count > Config.SWEEP_MAX_POINTS:
+                raise ValueError(f"the range has {count} values, more than the {Config.SWEEP_MAX_POINTS} allowed")
+            values = np.round(start + step * np.arange(count), 6).tolist()  # No 1.2000000000000002 steps
+    except KeyError as e:
+        raise ValueError(f"Invalid axis for '{feature}': give 'values' or 'start', 'stop' and 'step' (missing {str(e)}).")
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid axis for '{feature}': {str(e)}")
+
+    if not np.all(np.isfinite(values)):
+        raise ValueError(f"Invalid axis for '{feature}': every value must be a finite number.")
+    if feature in INTEGER_FEATURES:
+        if not all(value.is_integer() for value in values):
+            raise ValueError(f"Invalid axis for '{feature}': whole numbers only.")
+        values = [int(value) for value in values]
+    if feature == "zipcode":
+        min_zipcode, max_zipcode = Config.ZIPCODE_RANGE
+        if not all(min_zipcode <= zipcode <= max_zipcode for zipcode in values):
+            raise ValueError(f"Invalid zipcode. It should be between {min_zipcode} and {max_zipcode}.")
+    return feature, values
+
+def validate_sweep(data):
+    """Validates a /predict/sweep request body; returns (features, axes).
+
+    features is the validated base property (as validate_features returns it) and axes a list of
+    (feature, values) pairs, in request order. Raises KeyError / ValueError like validate_features.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("property"), dict):
+        raise ValueError("Expected a JSON object with a 'property' object and a 'vary' list.")
+    features = validate_features(data["property"])
+    vary = data.get("vary")
+    if not isinstance(vary, list) or not vary:
+        raise ValueError("'vary' must be a non-empty list of axes.")
+
+    axes = [sweep_values(axis) for axis in vary]
+    if len({feature for feature, _ in axes}) < len(axes):
+        raise ValueError("Each feature can only be varied along one axis.")
+    points = int(np.prod([len(values) for _, values in axes]))
+    if points > Config.SWEEP_MAX_POINTS:
+        raise ValueError(f"The sweep has {points} points, more than the {Config.SWEEP_MAX_POINTS} allowed.")
+    if points > Config.SWEEP_MAX_ZIPCODE_POINTS and any(feature == "zipcode" for feature, _ in axes):
+        raise ValueError(f"The sweep has {points} points, more than the {Config.SWEEP_MAX_ZIPCODE_POINTS} allowed when varying the zipcode.")
+    return features, axes
+
+def predict_sweep(features, axes, loaded=None, timings=None):
+    """Predicts every combination of the axes values, with the rest of the property as in features.
+
+    The grid is featurized as one matrix (no feature dicts) and evaluated with
+    ModelHolder.predict_grid, which compares each split only along the axes its column changes
+    with. Returns (predicted_price, ci_min, ci_max) arrays with one dimension per axis. Pass a
+    dict as timings to receive the duration of the featurize and infer stages in milliseconds.
+    """
+    timings = {} if timings is None else timings
+    loaded = loaded or current_models()
+    shape = tuple(len(values) for _, values in axes)
 
-        # Preprocess the features before passing them to the model
-        processed_features = preprocess_features(features)
-        logging.debug(f"Processed features: {processed_features}")
+    # Every grid row starts as the base property; each axis overwrites its column (C order, last axis fastest)
+    start = time.perf_counter()
+    index = np.indices(shape).reshape(len(shape), -1)
+    zip_index = loaded.feature_builder.zip_index
+    values = np.tile([float(features[column]) for column in NUMERIC_COLUMNS], (index.shape[1], 1))
+    zip_indices = np.full(index.shape[1], zip_index.get(features["zipcode"], -1))
+    for axis, (feature, axis_values) in enumerate(axes):
+        if feature == "zipcode":
+            zip_indices = np.array([zip_index.get(zipcode, -1) for zipcode in axis_values])[index[axis]]
+        else:
+            values[:, NUMERIC_COLUMNS.index(feature)] = np.array(axis_values, dtype=np.float64)[index[axis]]
+    processed_features = loaded.feature_builder.build_values(values, zip_indices)
+    timings["featurize"] = (time.perf_counter() - start) * 1000
 
-        # Predict using the trained model
-        predicted_price_log = model.predict(processed_features)
-        logging.debug(f"Predicted price (log scale): {predicted_price_log}")
+    start = time.perf_counter()
+    predicted_price_log, lower_log, upper_log = models.predict_grid(processed_features, shape, loaded)
+    stage_duration.observe(time.perf_counter() - start, "model_predict")
+    predicted_price, ci_min, ci_max = to_prices(predicted_price_log, lower_log, upper_log)
+    timings["infer"] = (time.perf_counter() - start) * 1000
+    logging.debug("Sweep of %d points over %s", index.shape[1], [feature for feature, _ in axes])
+    return predicted_price.reshape(shape), ci_min.reshape(shape), ci_max.reshape(shape)
 
-        # Inverse log transformation to get actual price
-        predicted_price = np.expm1(predicted_price_log)
-        logging.debug(f"Predicted price (actual): {predicted_price}")
+def infer_batch(items):
+    """MicroBatcher callback: predicts (features, LoadedModels) pairs, one featurize + predict call per model version.
 
-        # Fixed margin of error of $20,000
-        margin_of_error = 20000  
+    Returns (predicted_price, confidence_interval) for each item.
+    """
+    groups = {}
+    for i, (features, loaded) in enumerate(items):
+        groups.setdefault(loaded.version, (loaded, []))[1].append(i)
 
-        # Confidence Interval
-        ci_min = predicted_price - margin_of_error  
-        ci_max = predicted_price + margin_of_error  
-        logging.debug(f"Confidence interval: [{ci_min}, {ci_max}]")
+    results = [None] * len(items)
+    for loaded, rows in groups.values():
+        processed_features = preprocess_features([items[i][0] for i in rows], loaded)
+        predicted_price, ci_min, ci_max = infer_prices(processed_features, loaded)
+        for row, i in enumerate(rows):
+            results[i] = (predicted_price[row], (ci_min[row], ci_max[row]))
+    logging.debug("Micro-batch of %d predictions", len(items))
+    return results
 
-        # Fetch recommendations based on the purpose and property features
-        recommendations = get_recommendations(purpose, features)
-        logging.debug(f"Recommendations: {recommendations}")
+# Shares one model call between concurrent single predictions (opt-in, see config.py)
+micro_batcher = MicroBatcher(infer_batch, Config.MICRO_BATCH_SIZE, Config.MICRO_BATCH_WAIT_MS / 1000) if Config.MICRO_BATCH else None
+if micro_batcher is not None:
+    metrics_registry.register(Gauge("micro_batches_total", "Batched model calls made by the micro-batcher.",
+                            lambda: {(): micro_batcher.batches}, type="counter"))
+    metrics_registry.register(Gauge("micro_batch_rows_total", "Predictions served through the micro-batcher.",
+                            lambda: {(): micro_batcher.items}, type="counter"))
+
+def format_server_timing(timings):
+    """Formats {stage: milliseconds} as a Server-Timing header value (shown in browser dev tools)."""
+    return ", ".join(f"{stage};dur={duration:.3f}" for stage, duration in timings.items())
+
+class PredictionRequest:
+    """One property moving through the prediction pipeline:
+    validate -> featurize -> infer -> recommend -> persist.
+
+    Each stage can be called on its own. It runs the stages it depends on first, runs at most
+    once per request, and records its own duration (ms, excluding its dependencies) in timings.
+    Callers that do not need recommendations or storage simply never call those stages.
+    All stages use the model version that was current when the request first needed it.
+    """
+
+    def __init__(self, data, purpose=None, validated=False):
+        self.data = data
+        self.purpose = purpose
+        self.timings = {}
+        self._results = {}
+        self._models = None
+        if validated:
+            self._results["validate"] = data  # Already a feature dict (e.g. from validate_features)
+
+    def _record(self, stage, start, result):
+        self.timings[stage] = (time.perf_counter() - start) * 1000
+        self._results[stage] = result
+        return result
+
+    @property
+    def models(self):
+        """The LoadedModels snapshot used by this request."""
+        if self._models is None:
+            self._models = current_models()
+        return self._models
+
+    @property
+    def model_version(self):
+        return self.models.version
+
+    def validate(self):
+        """Returns the validated feature dict (KeyError / ValueError as in validate_features)."""
+        if "validate" not in self._results:
+            start = time.perf_counter()
+            self._record("validate", start, validate_features(self.data))
+        return self._results["validate"]
+
+    def featurize(self):
+        """Returns the encoded + polynomial feature matrix (1 row)."""
+        if "featurize" not in self._results:
+            features = self.validate()
+            start = time.perf_counter()
+            self._record("featurize", start, preprocess_features(features, self.models))
+        return self._results["featurize"]
+
+    def infer(self):
+        """Returns (predicted_price, confidence_interval). Cached predictions skip featurize entirely."""
+        if "infer" not in self._results:
+            features = self.validate()
+            key = cache_key(features, self.models)
+            cached = prediction_cache.get(key)
+            if cached is not None:
+                logging.debug("Prediction cache hit: %s", cached[0])
+                self.timings["infer"] = 0.0
+                self._results["infer"] = cached
+            elif micro_batcher is not None:
+                # Featurized and predicted together with concurrent requests; infer covers the wait too
+                start = time.perf_counter()
+                result = micro_batcher.submit((features, self.models))
+                prediction_cache.put(key, result)
+                self._record("infer", start, result)
+            else:
+                processed_features = self.featurize()
+                start = time.perf_counter()
+                predicted_price, ci_min, ci_max = infer_prices(processed_features, self.models)
+                logging.debug("Confidence interval: [%s, %s]", ci_min, ci_max)
+                result = (predicted_price[0], (ci_min[0], ci_max[0]))
+                prediction_cache.put(key, result)
+                self._record("infer", start, result)
+        return self._results["infer"]
+
+    @property
+    def predicted_price(self):
+        return self.infer()[0]
+
+    @property
+    def confidence_interval(self):
+        return self.infer()[1]
+
+    def recommend(self):
+        """Returns the rule and market-trend recommendations for the request's purpose."""
+        if "recommend" not in self._results:
+            features = self.validate()
+            start = time.perf_counter()
+            recommendations = get_recommendations(self.purpose, features)
+            logging.debug("Recommendations: %s", recommendations)
+            self._record("recommend", start, recommendations)
+        return self._results["recommend"]
+
+    def persist(self):
+        """Queues the prediction for storage in the queries table (at most once per request)."""
+        if "persist" not in self._results:
+            features = self.validate()
+            predicted_price = self.predicted_price
+            start = time.perf_counter()
+            self._record("persist", start, query_writer.submit(purpose=self.purpose, predicted_price=predicted_price,
+                                                                    model_version=self.model_version, **features))
+        return self._results["persist"]
+
+    def server_timing(self):
+        return format_server_timing(self.timings)
+
+# Function to predict price and fetch recommendations (no DB insert here)
+def predict_price(features, purpose, recommend=True):
+    """Predicts the price of one validated property; returns (price, confidence_interval, recommendations).
+
+    With recommend=False the recommendation stage is skipped and an empty list is returned.
+    """
+    try:
+        logging.debug("Received features for prediction: %s, purpose=%s", features, purpose)
+
+        prediction = PredictionRequest(features, purpose, validated=True)
+        predicted_price, confidence_interval = prediction.infer()
+        recommendations = prediction.recommend() if recommend else []
 
         # Return prediction results (no database write here)
-        return predicted_price[0], (ci_min[0], ci_max[0]), recommendations
+        return predicted_price, confidence_interval, recommendations
 
     except Exception as e:
         logging.error(f"Error in predict_price function: {str(e)}")
         raise
+
+
+# Function to predict prices for many properties in one pass (no DB insert here)
+def predict_prices(features_list, purpose, recommend=True, timings=None):
+    """Predicts prices for a list of raw property dicts with a single encoder/poly/model pass.
+
+    Returns one result dict per input, in order. Rows that fail validation get an "error"
+    entry instead of a prediction; they do not fail the rest of the batch. Predictions carry
+    the model version that produced them. With recommend=False
+    the recommendation stage is skipped and results carry no "recommendations" entry.
+    Pass a dict as timings to receive the duration of each stage in milliseconds.
+    """
+    try:
+        timings = {} if timings is None else timings
+        results = [None] * len(features_list)
+        valid_rows = []
+        valid_indices = []
+
+        # Validate each row on its own so one bad property does not sink the batch
+        start = time.perf_counter()
+        for i, data in enumerate(features_list):
+            if not isinstance(data, dict):
+                results[i] = {"index": i, "error": "Each property must be a JSON object."}
+                continue
+            try:
+                valid_rows.append(validate_features(data))
+                valid_indices.append(i)
+            except KeyError as e:
+                results[i] = {"index": i, "error": f"Missing required field: {str(e)}"}
+            except ValueError as e:
+                results[i] = {"index": i, "error": str(e)}
+        timings["validate"] = (time.perf_counter() - start) * 1000
+
+        logging.debug("Batch prediction: %d valid of %d rows", len(valid_rows), len(features_list))
+
+        if valid_rows:
+            # Featurize and predict every valid row as one matrix, all with the same model version
+            loaded = current_models()
+            start = time.perf_counter()
+            processed_features = preprocess_features(valid_rows, loaded)
+            timings["featurize"] = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            predicted_price, ci_min, ci_max = infer_prices(processed_features, loaded)
+            timings["infer"] = (time.perf_counter() - start) * 1000
+
+            if recommend:
+                start = time.perf_counter()
+                recommendations = get_recommendations_batch(purpose, valid_rows)
+                timings["recommend"] = (time.perf_counter() - start) * 1000
+
+            for row, i in enumerate(valid_indices):
+                results[i] = {
+                    "index": i,
+                    "predicted_price": predicted_price[row],
+                    "confidence_interval": (ci_min[row], ci_max[row]),
+                    "model_version": loaded.version
+                }
+                if recommend:
+                    results[i]["recommendations"] = recommendations[row]
+
+        return results
+
+    except Exception as e:
+        logging.error(f"Error in predict_prices function: {str(e)}")
+        raise
@@ -0,0 +1,182 @@
+"""
+Versioned model registry.
+
+Every published model lives in its own directory under model/registry/ (model, encoder, poly,
+exported trees, quantile models and training.json), and the CURRENT file names the version
+being served. Publishing copies the files into a hidden directory and renames it into place,
+and switching versions rewrites CURRENT with os.replace(), so a reader always sees either the
+old or the new version, never a partial one. Serving processes poll CURRENT (ModelWatcher)
+and load a new version in the background before swapping it in; no worker restart is needed.
+
+    python -m model.registry publish            # copy model/saved_model into a new version and serve it
+    python -m model.registry list               # versions, newest last; * marks the current one
+    python -m model.registry activate VERSION   # roll forward or back to a published version
+"""
+import argparse
+import hashlib
+import logging
+import os
+import shutil
+import time
+
+from utils import ForkSafeThread, atomic_write
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REGISTRY_DIR = os.path.join(BASE_DIR, "registry")
+SAVED_MODEL_DIR = os.path.join(BASE_DIR, "saved_model")
+
+# Artifact name -> file name inside a version directory (and in model/saved_model)
+ARTIFACTS = {
+    "model": "model.pkl",
+    "encoder": "encoder.pkl",
+    "poly": "poly.pkl",
+    "trees": "model.txt",
+    "interval_low": "model_q05.txt",
+    "interval_high": "model_q95.txt",
+    "sparse_model": "model_sparse.pkl",
+    "sparse_trees": "model_sparse.txt",
+    "metadata": "training.json",
+}
+REQUIRED_ARTIFACTS = ("model", "encoder", "poly")
+
+def file_digest(path):
+    """Returns a short content hash of a file, used to label model versions."""
+    digest = hashlib.blake2b(digest_size=4)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def artifact_files(directory):
+    """Returns {artifact: path} for the artifacts present in directory."""
+    paths = {name: os.path.join(directory, filename) for name, filename in ARTIFACTS.items()}
+    return {name: path for name, path in paths.items() if os.path.exists(path)}
+
+class ModelRegistry:
+    """Published model versions under root, plus the CURRENT pointer to the one being served."""
+
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+        self.current_path = os.path.join(root, "CURRENT")
+
+    def current_version(self):
+        """Returns the version named by CURRENT, or None when nothing has been published."""
+        try:
+            with open(self.current_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def versions(self):
+        """Returns the published versions, oldest first (version names start with a timestamp)."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if not name.startswith(".") and os.path.isdir(os.path.join(self.root, name)))
+
+    def files(self, version):
+        """Returns {artifact: path} for a published version."""
+        return artifact_files(os.path.join(self.root, version))
+
+    def publish(self, source_dir=SAVED_MODEL_DIR, activate=True):
+        """Copies the artifacts in source_dir into a new version; returns the version name."""
+        files = artifact_files(source_dir)
+        missing = [name for name in REQUIRED_ARTIFACTS if name not in files]
+        if missing:
+            raise ValueError(f"Cannot publish {source_dir}: missing {', '.join(missing)}")
+
+        version = f"{time.strftime('%Y%m%d-%H%M%S')}-{file_digest(files['model'])}"
+        tmp_dir = os.path.join(self.root, f".{version}.tmp")
+        os.makedirs(tmp_dir)
+        for name, path in files.items():
+            shutil.copy2(path, os.path.join(tmp_dir, ARTIFACTS[name]))
+        os.rename(tmp_dir, os.path.join(self.root, version))
+        logging.info("Published model version %s from %s", version, source_dir)
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        """Points CURRENT at a published version (atomic: readers never see a partial file)."""
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version: {version}")
+        with atomic_write(self.current_path, "w") as f:
+            f.write(version + "\n")
+        logging.info("Model version %s is now current", version)
+
+class ModelWatcher(ForkSafeThread):
+    """Polls the registry's CURRENT pointer and hot-swaps the serving model when it changes.
+
+    The new version is loaded and warmed up by the watcher thread while requests keep being
+    served by the old one; the swap itself is a single assignment in ModelHolder.swap().
+    A version that fails to load is logged and skipped until CURRENT changes again.
+    The polling thread is a ForkSafeThread: started by the first prediction in each process.
+    """
+
+    thread_name = "model-watcher"
+
+    def __init__(self, registry, holder, build_holder, interval=5.0):
+        super().__init__()
+        self.registry = registry
+        self.holder = holder
+        self.build_holder = build_holder  # Callable: version -> unloaded ModelHolder
+        self.interval = interval  # Seconds between polls; 0 disables watching
+        self._failed_version = None
+
+    def ensure_started(self):
+        if self.interval > 0:
+            super().ensure_started()
+
+    def check(self):
+        """Swaps in the current registry version if it differs from the one being served; returns True on a swap."""
+        version = self.registry.current_version()
+        if version is None or version == self.holder.version or version == self._failed_version:
+            return False
+        start = time.perf_counter()
+        try:
+            candidate = self.build_holder(version)
+            candidate.warm_up()
+        except Exception as e:
+            logging.error(f"Error loading model version {version}, keeping {self.holder.version}: {str(e)}")
+            self._failed_version = version
+            return False
+        previous = self.holder.version
+        self.holder.swap(candidate)
+        logging.info("Swapped model version %s -> %s (loaded in %.2fs)", previous, version, time.perf_counter() - start)
+        return True
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                logging.error(f"Error checking for a new model version: {str(e)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=REGISTRY_DIR, help="registry directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    publish = commands.add_parser("publish", help="publish a trained model as a new version")
+    publish.add_argument("--source", default=SAVED_MODEL_DIR, help="directory with the trained artifacts")
+    publish.add_argument("--no-activate", action="store_true", help="publish without serving it")
+    commands.add_parser("list", help="list published versions")
+    activate = commands.add_parser("activate", help="serve a published version")
+    activate.add_argument("version")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == "publish":
+        version = registry.publish(args.source, activate=not args.no_activate)
+        print(f"Published {version}" + ("" if args.no_activate else " (current)"))
+    elif args.command == "list":
+        current = registry.current_version()
+        for version in registry.versions():
+            print(f"{'*' if version == current else ' '} {version}")
+    else:
+        registry.activate(args.version)
+        print(f"{args.version} is now current")
+
+if __name__ == "__main__":
+    main()
@@ -1,60 +1,348 @@
+"""
+Trains the price model. Run from the project root:
+
+    python model/train_model.py                 # retrain only if the data or parameters changed
+    python model/train_model.py --force         # retrain unconditionally
+    python model/train_model.py --search        # cross-validated hyperparameter search first
+    python model/train_model.py --sparse        # also train the sparse, pruned-feature model
+    python model/train_model.py --publish       # publish the result as a new registry version
+
+The CSV is read with explicit dtypes. The encoder, poly transformer and feature matrices
+are cached under model/.cache/<data hash>/, so they are rebuilt only when the data file (or
+FEATURES_VERSION) changes; --search results are cached there too, per search space, and reused
+until the data, the grid, the base parameters or the folds change. The dense matrix is stored as .npy and memory-mapped, so the
+search workers share one copy through the page cache instead of each pickling ~400 MB.
+model/saved_model/training.json records the data hash and parameters of the saved model.
+Alongside the price model, two quantile models (5th / 95th percentile) are trained for the
+prediction interval and exported as LightGBM text models.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 import lightgbm as lgb
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import KFold, train_test_split
 from sklearn.preprocessing import OneHotEncoder, PolynomialFeatures
-from sklearn.metrics import mean_absolute_error, r2_score 
+from sklearn.metrics import mean_absolute_error, r2_score
+from scipy import sparse
 import joblib
 
-# Check if the model already exists, if so, skip training
+# Let `python model/train_model.py` import the model package (run from the project root)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model.features import NUMERIC_COLUMNS, SparseFeatureBuilder
+from model.registry import ModelRegistry
+from utils import atomic_write
+
+data_path = 'data/processed/cleaned_dataset_iqr.csv'
+cache_dir = 'model/.cache'
 model_save_path = 'model/saved_model/model.pkl'
+trees_save_path = 'model/saved_model/model.txt'
 encoder_save_path = 'model/saved_model/encoder.pkl'
 poly_save_path = 'model/saved_model/poly.pkl'
+metadata_save_path = 'model/saved_model/training.json'
+quantile_save_paths = {0.05: 'model/saved_model/model_q05.txt', 0.95: 'model/saved_model/model_q95.txt'}
+sparse_model_save_path = 'model/saved_model/model_sparse.pkl'
+sparse_trees_save_path = 'model/saved_model/model_sparse.txt'
+
+# Column types of the cleaned dataset (what pandas would infer, without the inference pass)
+CSV_DTYPES = {
+    "price": "float64",
+    "no_of_bedrooms": "int64",
+    "no_of_bathrooms": "float64",
+    "sqft_living": "int64",
+    "sqft_lot": "int64",
+    "no_of_floors": "float64",
+    "zipcode": "int64",
+    "house_age": "int64",
+}
+TARGET = "price"
+
+# Bump when the feature construction below changes, so cached matrices are rebuilt
+FEATURES_VERSION = 1
+
+LGBM_PARAMS = dict(n_estimators=1000, learning_rate=0.05, max_depth=6, subsample=0.8, colsample_bytree=0.8, random_state=42)
+
+# Candidates for --search (each combination is cross-validated on the training split)
+PARAM_GRID = {
+    "num_leaves": [31, 63],
+    "learning_rate": [0.05, 0.1],
+    "min_child_samples": [10, 20, 40],
+}
+
+
+def file_hash(path):
+    """Returns a short content hash of a file."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_atomic(path, save):
+    """Writes the file through save(f), atomically (see utils.atomic_write)."""
+    with atomic_write(path) as f:
+        save(f)
+
+
+def load_dataset(path):
+    return pd.read_csv(path, usecols=list(CSV_DTYPES), dtype=CSV_DTYPES)
 
-# 1. Check if model, encoder, and poly exist
-try:
-    model = joblib.load(model_save_path)
-    encoder = joblib.load(encoder_save_path)
-    poly = joblib.load(poly_save_path)
-    print(f"Model, Encoder, and Poly transformer loaded from {model_save_path}")
-except FileNotFoundError:
-    # 2. Load the dataset
-    data_path = 'data/processed/cleaned_dataset_iqr.csv'
-    df = pd.read_csv(data_path)
-
-    # 3. Preprocessing
-    features = ["sqft_living", "no_of_bedrooms", "no_of_bathrooms", "sqft_lot", "no_of_floors", "house_age", "zipcode"]
-    target = "price"
-    X = df[features]
-    y = df[target]
-
-    # 4. Log Transformation of Target Variable
-    y = np.log1p(y)
-
-    # 5. One-Hot Encoding for 'zipcode'
+
+def build_artifacts(path, directory):
+    """Fits the encoder and poly transformer and writes both feature matrices into directory."""
+    df = load_dataset(path)
+    X = df[NUMERIC_COLUMNS + ["zipcode"]]
+
+    # Log Transformation of Target Variable
+    y = np.log1p(df[TARGET].to_numpy())
+
+    # One-Hot Encoding for 'zipcode'
     encoder = OneHotEncoder(handle_unknown='ignore', sparse_output=False)
     X_encoded = encoder.fit_transform(X[['zipcode']])
     encoded_df = pd.DataFrame(X_encoded, columns=encoder.get_feature_names_out(['zipcode']))
-    X = X.drop(columns=['zipcode'])
-    X = pd.concat([X, encoded_df], axis=1)
+    X_dense = pd.concat([X.drop(columns=['zipcode']), encoded_df], axis=1)
 
-    # 6. Polynomial Feature Creation
+    # Polynomial Feature Creation
     poly = PolynomialFeatures(degree=2, include_bias=False)
-    X_poly = poly.fit_transform(X)
-    X_poly = pd.DataFrame(X_poly, columns=poly.get_feature_names_out(X.columns))
+    X_poly = poly.fit_transform(X_dense)
+
+    # Sparse, pruned variant of the same features (see SparseFeatureBuilder)
+    sparse_builder = SparseFeatureBuilder(encoder.categories_[0])
+    X_sparse = sparse_builder.transform_frame(X)
+
+    os.makedirs(directory, exist_ok=True)
+    names = {
+        "dense": list(poly.get_feature_names_out(X_dense.columns)),
+        "sparse": sparse_builder.feature_names,
+    }
+    save_atomic(os.path.join(directory, "y.npy"), lambda f: np.save(f, y))
+    save_atomic(os.path.join(directory, "dense.npy"), lambda f: np.save(f, X_poly))
+    save_atomic(os.path.join(directory, "sparse.npz"), lambda f: sparse.save_npz(f, X_sparse))
+    save_atomic(os.path.join(directory, "names.json"), lambda f: f.write(json.dumps(names).encode()))
+    save_atomic(os.path.join(directory, "encoder.pkl"), lambda f: joblib.dump(encoder, f))
+    save_atomic(os.path.join(directory, "poly.pkl"), lambda f: joblib.dump(poly, f))
+    # Written last: marks the directory as complete
+    save_atomic(os.path.join(directory, "done"), lambda f: None)
+
+
+def feature_cache(path, cache_root):
+    """Returns the cache directory for the data file, building its artifacts if needed."""
+    directory = os.path.join(cache_root, f"{file_hash(path)}-v{FEATURES_VERSION}")
+    if os.path.exists(os.path.join(directory, "done")):
+        print(f"Reusing cached features from {directory}")
+    else:
+        start = time.perf_counter()
+        build_artifacts(path, directory)
+        print(f"Features built and cached in {directory} ({time.perf_counter() - start:.1f}s)")
+    return directory
+
+
+def load_features(directory, kind):
+    """Returns (X, y, feature_names) from the cache; the dense matrix is memory-mapped."""
+    y = np.load(os.path.join(directory, "y.npy"))
+    with open(os.path.join(directory, "names.json")) as f:
+        names = json.load(f)[kind]
+    if kind == "dense":
+        X = np.load(os.path.join(directory, "dense.npy"), mmap_mode="r")
+    else:
+        X = sparse.load_npz(os.path.join(directory, "sparse.npz"))
+    return X, y, names
+
+
+# ------------------- HYPERPARAMETER SEARCH (process pool) -------------------
+_search_data = None
+
+
+def _init_search_worker(directory, kind):
+    # The dense matrix stays memory-mapped: each fit only copies the rows of its own fold
+    global _search_data
+    X, y, _ = load_features(directory, kind)
+    train_rows, _ = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42)
+    _search_data = (X, y, train_rows)
+
+
+def _score_fold(params, train_index, test_index):
+    X, y, train_rows = _search_data
+    fit_rows, score_rows = train_rows[train_index], train_rows[test_index]
+    model = lgb.LGBMRegressor(**params, verbose=-1)
+    model.fit(X[fit_rows], y[fit_rows])
+    y_pred = np.expm1(model.predict(X[score_rows]))
+    return mean_absolute_error(np.expm1(y[score_rows]), y_pred)
+
+
+def search_key(kind, folds):
+    """Returns a short hash of the search space (the data is already part of the cache directory)."""
+    space = {"kind": kind, "folds": folds, "base": LGBM_PARAMS, "grid": PARAM_GRID}
+    return hashlib.blake2b(json.dumps(space, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
+def search(directory, kind, folds, workers, n_jobs, force=False):
+    """Cross-validates every PARAM_GRID combination on the training split; returns the best parameters.
+
+    The scores are cached in directory under the search space's hash, so an unchanged search is not rerun (unless force).
+    """
+    cache_path = os.path.join(directory, f"search-{kind}-{search_key(kind, folds)}.json")
+    if not force and os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cached = json.load(f)
+        print(f"Reusing the search results cached in {cache_path}")
+        return cached["best"]
+
+    candidates = [dict(LGBM_PARAMS, **dict(zip(PARAM_GRID, values))) for values in itertools.product(*PARAM_GRID.values())]
+    # Split the cores between the workers instead of letting every fit use all of them
+    threads = max(1, n_jobs // workers)
+    n_rows = len(np.load(os.path.join(directory, "y.npy")))
+    n_train = len(train_test_split(np.arange(n_rows), test_size=0.2, random_state=42)[0])
+    splits = list(KFold(n_splits=folds, shuffle=True, random_state=42).split(np.zeros(n_train)))
+
+    print(f"Searching {len(candidates)} parameter sets x {folds} folds on {workers} processes ({threads} threads each)")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker, initargs=(directory, kind)) as pool:
+        futures = [[pool.submit(_score_fold, dict(params, n_jobs=threads), train_index, test_index)
+                    for train_index, test_index in splits] for params in candidates]
+        scores = [np.mean([future.result() for future in fold_futures]) for fold_futures in futures]
+
+    for params, score in sorted(zip(candidates, scores), key=lambda pair: pair[1]):
+        print(f"  CV MAE {score:12,.0f}  {({key: params[key] for key in PARAM_GRID})}")
+    print(f"Search finished in {time.perf_counter() - start:.1f}s")
+
+    best = candidates[int(np.argmin(scores))]
+    results = [{"params": {key: params[key] for key in PARAM_GRID}, "cv_mae": float(score)} for params, score in zip(candidates, scores)]
+    save_atomic(cache_path, lambda f: f.write(json.dumps({"best": best, "results": results}, indent=2).encode()))
+    return best
+
+
+# ------------------- TRAINING -------------------
+def train(directory, kind, params, n_jobs):
+    """Fits the model on the training split; returns (model, test metrics)."""
+    X, y, names = load_features(directory, kind)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    start = time.perf_counter()
+    model = lgb.LGBMRegressor(**params, n_jobs=n_jobs)
+    model.fit(X_train, y_train, feature_name=[name.replace(" ", "_") for name in names])
+    train_time = time.perf_counter() - start
+
+    y_pred = np.expm1(model.predict(X_test))
+    metrics = {
+        "mae": mean_absolute_error(np.expm1(y_test), y_pred),
+        "r2": r2_score(np.expm1(y_test), y_pred),
+        "train_seconds": round(train_time, 2),
+    }
+    print(f"{kind.capitalize()} model MAE: {metrics['mae']:.2f}, R2: {metrics['r2']:.4f} (trained in {train_time:.1f}s)")
+    return model, metrics
+
+
+def train_quantiles(directory, params, n_jobs):
+    """Fits the lower/upper quantile models behind the prediction interval and exports them as text models.
+
+    Only the text export is kept: at serving time both are evaluated together by the NumPy tree predictor.
+    """
+    X, y, names = load_features(directory, "dense")
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    bounds = []
+    for alpha, path in quantile_save_paths.items():
+        model = lgb.LGBMRegressor(**dict(params, objective="quantile", alpha=alpha), n_jobs=n_jobs)
+        model.fit(X_train, y_train, feature_name=[name.replace(" ", "_") for name in names])
+        model.booster_.save_model(path)
+        bounds.append(np.expm1(model.predict(X_test)))
+        print(f"Quantile model ({alpha:.0%}) exported to {path}")
+
+    # Share of test prices inside the interval, and its typical width
+    price = np.expm1(y_test)
+    low, high = np.minimum(bounds[0], bounds[1]), np.maximum(bounds[0], bounds[1])
+    metrics = {
+        "quantiles": list(quantile_save_paths),
+        "coverage": float(np.mean((price >= low) & (price <= high))),
+        "median_width": float(np.median(high - low)),
+    }
+    print(f"Interval coverage on the test split: {metrics['coverage']:.1%}, median width: ${metrics['median_width']:,.0f}")
+    return metrics
+
+
+def needs_training(data_hash, params, force):
+    if force or not os.path.exists(model_save_path):
+        return True
+    if not os.path.exists(metadata_save_path):
+        print(f"{model_save_path} has no training record; keeping it (use --force to retrain)")
+        return False
+    with open(metadata_save_path) as f:
+        metadata = json.load(f)
+    if metadata.get("data_hash") != data_hash or metadata.get("params") != params:
+        print("Data or parameters changed since the saved model was trained")
+        return True
+    print(f"{model_save_path} is up to date (use --force to retrain)")
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=data_path, help="cleaned dataset CSV")
+    parser.add_argument("--cache-dir", default=cache_dir, help="where feature matrices are cached")
+    parser.add_argument("--force", action="store_true", help="retrain (and rerun --search) even if the cached results are up to date")
+    parser.add_argument("--search", action="store_true", help="run a cross-validated hyperparameter search first")
+    parser.add_argument("--folds", type=int, default=3, help="cross-validation folds for --search")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="processes for --search")
+    parser.add_argument("--n-jobs", type=int, default=os.cpu_count() or 1, help="CPU threads for training")
+    parser.add_argument("--sparse", action="store_true", help="also train the sparse, pruned-feature model")
+    parser.add_argument("--publish", action="store_true", help="publish the saved model to the registry and make it current")
+    args = parser.parse_args()
+
+    directory = feature_cache(args.data, args.cache_dir)
+    data_hash = file_hash(args.data)
+    params = search(directory, "dense", args.folds, args.workers, args.n_jobs, args.force) if args.search else dict(LGBM_PARAMS)
+
+    if needs_training(data_hash, params, args.force):
+        model, metrics = train(directory, "dense", params, args.n_jobs)
+
+        # Save the Model, Encoder, and Polynomial Features (fitted on the same data as the cached matrix)
+        joblib.dump(model, model_save_path)
+        joblib.dump(joblib.load(os.path.join(directory, "encoder.pkl")), encoder_save_path)
+        joblib.dump(joblib.load(os.path.join(directory, "poly.pkl")), poly_save_path)
+        print(f"Model, Encoder, and Poly transformer saved to {model_save_path}")
+
+        # Export the trees in LightGBM's text format for the NumPy predictor (model/tree_predictor.py)
+        model.booster_.save_model(trees_save_path)
+        print(f"Booster exported to {trees_save_path}")
+
+        metadata = {"data_hash": data_hash, "params": params, "metrics": metrics}
+        metadata["interval"] = train_quantiles(directory, params, args.n_jobs)
+        with open(metadata_save_path, "w") as f:
+            json.dump(metadata, f, indent=2)
+    else:
+        if not os.path.exists(trees_save_path):
+            joblib.load(model_save_path).booster_.save_model(trees_save_path)
+            print(f"Booster exported to {trees_save_path}")
+        if not all(os.path.exists(path) for path in quantile_save_paths.values()):
+            interval = train_quantiles(directory, params, args.n_jobs)
+            if os.path.exists(metadata_save_path):
+                with open(metadata_save_path) as f:
+                    metadata = json.load(f)
+                metadata["interval"] = interval
+                with open(metadata_save_path, "w") as f:
+                    json.dump(metadata, f, indent=2)
 
-    # 7. Split Data
-    X_train, X_test, y_train, y_test = train_test_split(X_poly, y, test_size=0.2, random_state=42)
+    # The sparse model uses the same parameters, split and cached data
+    if args.sparse:
+        sparse_model, _ = train(directory, "sparse", params, args.n_jobs)
+        joblib.dump(sparse_model, sparse_model_save_path)
+        sparse_model.booster_.save_model(sparse_trees_save_path)
+        print(f"Sparse model saved to {sparse_model_save_path} and exported to {sparse_trees_save_path}")
 
-    # 8. Train LightGBM Model
-    lgb_model = lgb.LGBMRegressor(n_estimators=1000, learning_rate=0.05, max_depth=6, subsample=0.8, colsample_bytree=0.8, random_state=42)
-    lgb_model.fit(X_train, y_train)
+    # Running workers pick up the new version without a restart (model/registry.py)
+    if args.publish:
+        version = ModelRegistry().publish(os.path.dirname(model_save_path))
+        print(f"Published model version {version}")
 
-    # 9. Save the Model, Encoder, and Polynomial Features
-    joblib.dump(lgb_model, model_save_path)
-    joblib.dump(encoder, encoder_save_path)
-    joblib.dump(poly, poly_save_path)
 
-    print(f"Model, Encoder, and Poly transformer saved to {model_save_path}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
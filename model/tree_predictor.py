@@ -0,0 +1,373 @@
+import json
+
+import numpy as np
+
+# LightGBM missing-value handling per split (decision_type '<=' only)
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+MISSING_TYPES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+MISSING_TYPE_NAMES = {code: name for name, code in MISSING_TYPES.items()}
+ZERO_THRESHOLD = 1e-35  # LightGBM's kZeroThreshold
+MAX_DEPTH = 14  # Trees are padded to 2**depth leaves, so very deep trees are better served by LightGBM
+
+def parse_model_text(text):
+    """Parses a LightGBM text model (Booster.save_model) into the dict layout of Booster.dump_model()."""
+    header, trees = {}, []
+    tree = None
+    for line in text.splitlines():
+        if line.startswith("Tree="):
+            tree = {}
+            trees.append(tree)
+        elif line == "end of trees":
+            break
+        elif "=" in line:
+            key, value = line.split("=", 1)
+            (tree if tree is not None else header)[key] = value
+        elif line == "average_output" and tree is None:
+            header["average_output"] = True
+
+    def node(tree, index):
+        # Negative child indices point at leaves (~leaf_index)
+        if index < 0:
+            return {"leaf_value": tree["leaf_value"][~index]}
+        decision_type = tree["decision_type"][index]
+        return {
+            "split_feature": tree["split_feature"][index],
+            "threshold": tree["threshold"][index],
+            "decision_type": "==" if decision_type & 1 else "<=",
+            "default_left": bool(decision_type & 2),
+            "missing_type": MISSING_TYPE_NAMES[(decision_type >> 2) & 3],
+            "left_child": node(tree, tree["left_child"][index]),
+            "right_child": node(tree, tree["right_child"][index]),
+        }
+
+    tree_info = []
+    for tree in trees:
+        if tree.get("is_linear", "0") != "0":
+            raise ValueError("Linear trees are not supported")
+        parsed = {"leaf_value": [float(v) for v in tree["leaf_value"].split()]}
+        if int(tree["num_leaves"]) > 1:
+            for key in ("split_feature", "decision_type", "left_child", "right_child"):
+                parsed[key] = [int(v) for v in tree[key].split()]
+            parsed["threshold"] = [float(v) for v in tree["threshold"].split()]
+            structure = node(parsed, 0)
+        else:
+            structure = {"leaf_value": parsed["leaf_value"][0]}
+        tree_info.append({"tree_structure": structure})
+
+    return {
+        "num_tree_per_iteration": int(header.get("num_tree_per_iteration", 1)),
+        "objective": header.get("objective", ""),
+        "average_output": header.get("average_output", False),
+        "max_feature_idx": int(header["max_feature_idx"]),
+        "tree_info": tree_info,
+    }
+
+class TreePredictor:
+    """Pure NumPy evaluator for a LightGBM regression ensemble (text model or Booster.dump_model() dict).
+
+    Every tree is padded to a complete binary tree of the ensemble's maximum depth and the
+    split features, thresholds and leaf values of all trees are stored in flat arrays.
+    A leaf that sits above the bottom level is padded with always-left splits (threshold +inf)
+    down to the bottom, so evaluation is the same fixed number of steps for every tree:
+    node = 2 * node + 1 + (value > threshold), vectorized across all rows and trees at once.
+
+    Several ensembles over the same features (e.g. the price model and its quantile models)
+    can be compiled into one predictor with from_dumps()/load(); predict() then evaluates
+    all of them in the same pass and returns one column per ensemble.
+    """
+
+    def __init__(self, feature, threshold, leaf_value, default_left, missing_type, n_features, output_starts=(0,)):
+        self.feature = feature  # (n_trees, 2**depth - 1) split feature index
+        self.threshold = threshold  # (n_trees, 2**depth - 1) split threshold
+        self.leaf_value = leaf_value  # (n_trees, 2**depth)
+        self.default_left = default_left
+        self.missing_type = missing_type
+        self.n_features = n_features
+        self.n_trees, self.n_leaves = leaf_value.shape
+        self.depth = self.n_leaves.bit_length() - 1
+        self.handles_missing = bool((missing_type != MISSING_NONE).any())
+        self.output_starts = np.array(output_starts, dtype=np.intp)  # First tree of each ensemble
+        self.n_outputs = len(self.output_starts)
+
+        # Flattened node / leaf arrays. For every node, _left holds the flat index of its left child
+        # (the right child follows it); for nodes on the last split level, _leaf_left indexes the leaves
+        n_nodes = self.n_leaves - 1
+        tree = np.repeat(np.arange(self.n_trees), n_nodes)
+        local = np.tile(np.arange(n_nodes), self.n_trees)
+        self._node_offset = np.arange(self.n_trees) * n_nodes
+        self._left = tree * n_nodes + 2 * local + 1
+        self._leaf_left = tree * self.n_leaves + 2 * local + 1 - n_nodes
+        self._feature = feature.ravel()
+        self._threshold = threshold.ravel()
+        self._leaf_value = leaf_value.ravel()
+        self._used = None  # See _used_features()
+
+    @classmethod
+    def from_dump(cls, dump):
+        """Compiles the dict returned by Booster.dump_model()."""
+        return cls.from_dumps([dump])
+
+    @classmethod
+    def from_dumps(cls, dumps):
+        """Compiles several dump_model() dicts over the same features into one multi-output predictor."""
+        trees, output_starts = [], []
+        for dump in dumps:
+            objective = dump.get("objective", "")
+            if dump.get("num_tree_per_iteration", 1) != 1 or not objective.startswith(("regression", "quantile")):
+                raise ValueError(f"Only single-output regression models are supported, not {objective!r}")
+            if dump.get("average_output"):
+                raise ValueError("Averaged (random forest) models are not supported")
+            if dump["max_feature_idx"] != dumps[0]["max_feature_idx"]:
+                raise ValueError("Stacked models must use the same features")
+            output_starts.append(len(trees))
+            trees += [tree["tree_structure"] for tree in dump["tree_info"]]
+
+        def tree_depth(node):
+            if "leaf_value" in node:
+                return 0
+            return 1 + max(tree_depth(node["left_child"]), tree_depth(node["right_child"]))
+
+        depth = max(max(tree_depth(tree) for tree in trees), 1)
+        if depth > MAX_DEPTH:
+            raise ValueError(f"Trees of depth {depth} are too deep to pad (max {MAX_DEPTH})")
+        n_nodes, n_leaves = 2 ** depth - 1, 2 ** depth
+
+        feature = np.zeros((len(trees), n_nodes), dtype=np.intp)
+        threshold = np.full((len(trees), n_nodes), np.inf)
+        default_left = np.ones((len(trees), n_nodes), dtype=bool)
+        missing_type = np.zeros((len(trees), n_nodes), dtype=np.int8)
+        leaf_value = np.zeros((len(trees), n_leaves))
+
+        def fill(t, node, position, level):
+            if "leaf_value" in node:
+                if level == depth:
+                    leaf_value[t, position - n_nodes] = node["leaf_value"]
+                    return
+                # Padding split (threshold +inf, always left); both subtrees carry the leaf value
+                fill(t, node, 2 * position + 1, level + 1)
+                fill(t, node, 2 * position + 2, level + 1)
+                return
+            if node["decision_type"] != "<=":
+                raise ValueError(f"Unsupported split type: {node['decision_type']}")
+            feature[t, position] = node["split_feature"]
+            threshold[t, position] = node["threshold"]
+            default_left[t, position] = node["default_left"]
+            missing_type[t, position] = MISSING_TYPES[node["missing_type"]]
+            fill(t, node["left_child"], 2 * position + 1, level + 1)
+            fill(t, node["right_child"], 2 * position + 2, level + 1)
+
+        for t, tree in enumerate(trees):
+            fill(t, tree, 0, 0)
+
+        return cls(feature, threshold, leaf_value, default_left, missing_type, dumps[0]["max_feature_idx"] + 1, output_starts)
+
+    @classmethod
+    def load(cls, *paths):
+        """Loads models exported by model/train_model.py: LightGBM text format, or JSON (.json) from dump_model().
+
+        With several paths, the models are stacked and predict() returns one column per path.
+        """
+        dumps = []
+        for path in paths:
+            with open(path) as f:
+                dumps.append(json.load(f) if path.endswith(".json") else parse_model_text(f.read()))
+        return cls.from_dumps(dumps)
+
+    def _go_right(self, values, nodes):
+        """Split decisions for feature values at flat node indices (LightGBM's NumericalDecision)."""
+        thresholds = self._threshold[nodes]
+        if not self.handles_missing:
+            return values > thresholds  # NaN inputs were already replaced by 0.0 in predict()
+        missing_type = self.missing_type.ravel()[nodes]
+        is_nan = np.isnan(values)
+        values = np.where(is_nan & (missing_type != MISSING_NAN), 0.0, values)
+        missing = ((missing_type == MISSING_ZERO) & (np.abs(values) <= ZERO_THRESHOLD)) | ((missing_type == MISSING_NAN) & is_nan)
+        return np.where(missing, ~self.default_left.ravel()[nodes], values > thresholds)
+
+    def _predict_chunk(self, X):
+        n_rows = X.shape[0]
+        flat_X = X.ravel()
+        row_offset = (np.arange(n_rows) * X.shape[1])[:, None]
+        node = np.broadcast_to(self._node_offset, (n_rows, self.n_trees))  # Root of every tree, for every row
+        for level in range(self.depth):
+            go_right = self._go_right(flat_X[row_offset + self._feature[node]], node)
+            if level < self.depth - 1:
+                node = self._left[node] + go_right
+        # The children of the last split level are the leaves
+        leaf_values = self._leaf_value[self._leaf_left[node] + go_right]
+        if self.n_outputs == 1:
+            return leaf_values.sum(axis=1)
+        return np.add.reduceat(leaf_values, self.output_starts, axis=1)
+
+    def _as_matrix(self, X, fix_nan=True):
+        if hasattr(X, "toarray"):
+            X = X.toarray()  # scipy.sparse input (SparseFeatureBuilder)
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected a 2D array with {self.n_features} features, got shape {X.shape}")
+        return self._fix_nan(X) if fix_nan else X
+
+    def _fix_nan(self, X):
+        if not self.handles_missing and np.isnan(X).any():
+            X = np.nan_to_num(X, nan=0.0, posinf=np.inf, neginf=-np.inf)  # LightGBM treats NaN as 0.0 here
+        return X
+
+    def _used_features(self):
+        """Returns (used, feature): the sorted feature columns that at least one (non-padding) split
+        looks at, and every node's split feature as an index into them."""
+        if self._used is None:
+            used = np.unique(self.feature[np.isfinite(self.threshold)])
+            self._used = used, np.searchsorted(used, self.feature)  # Padding splits never look at their column
+        return self._used
+
+    def predict(self, X, chunk_size=None):
+        """Returns the raw (log-price) predictions for a 2D feature matrix, like LGBMRegressor.predict.
+
+        The result has shape (n_rows,) for a single model and (n_rows, n_outputs) for stacked models.
+        """
+        X = self._as_matrix(X)
+
+        # Bound the (rows x trees) working arrays to a few million elements
+        chunk_size = chunk_size or max(1, 4_000_000 // self.n_trees)
+        if X.shape[0] <= chunk_size:
+            return self._predict_chunk(X)
+        return np.concatenate([self._predict_chunk(X[start:start + chunk_size]) for start in range(0, X.shape[0], chunk_size)])
+
+    def _left_masks(self):
+        """For every node position: a leaf bitmask with the leaves of its left subtree cleared."""
+        masks = []
+        for position in range(self.n_leaves - 1):
+            level = (position + 1).bit_length() - 1
+            start = (position + 1) * 2 ** (self.depth - level) - self.n_leaves  # Leftmost leaf below the node
+            width = 2 ** (self.depth - level - 1)
+            masks.append((2 ** self.n_leaves - 1) & ~((2 ** width - 1) << start))
+        return np.array(masks, dtype=np.uint64)
+
+    def _specialize(self, base, feature, column_axes):
+        """Partially evaluates every tree for a grid of rows around base (see predict_grid).
+
+        feature maps every node to its column in base; column_axes holds, for every column, a bitmask of the grid axes along which it
+        changes (0 for a column that is the same in every row). Returns (split_axes, tree_axes, exits):
+        split_axes is, per node, the axes bitmask of the reachable splits on changing columns (0 for
+        every other node), where reachable means some row still gets there once the splits on constant
+        columns are taken; tree_axes ORs them per tree; exits is each tree's leaf bitmask after the
+        constant splits (see predict_grid).
+        """
+        n_nodes = self.n_leaves - 1
+        go_right = self._go_right(base[feature.ravel()], np.arange(self.n_trees * n_nodes)).reshape(self.n_trees, n_nodes)
+        node_axes = np.where(np.isfinite(self.threshold), column_axes[feature], 0)  # Padding splits never change
+        changing = node_axes != 0
+
+        # Top down: a constant split passes rows to one child, a changing split to both
+        reachable = np.zeros((self.n_trees, n_nodes + self.n_leaves), dtype=bool)
+        reachable[:, 0] = True
+        for level in range(self.depth):
+            local = np.arange(2 ** level - 1, 2 ** (level + 1) - 1)
+            here, both = reachable[:, local], reachable[:, local] & changing[:, local]
+            reachable[:, 2 * local + 1] = both | (here & ~go_right[:, local])
+            reachable[:, 2 * local + 2] = both | (here & go_right[:, local])
+        split_axes = np.where(reachable[:, :n_nodes], node_axes, 0)
+
+        all_leaves = np.uint64(2 ** self.n_leaves - 1)
+        exits = np.bitwise_and.reduce(np.where(go_right & ~changing, self._left_masks(), all_leaves), axis=1)
+        return split_axes, np.bitwise_or.reduce(split_axes, axis=1), exits
+
+    def _leaf_values(self, trees, exits):
+        """Leaf values for leaf bitmasks of the given trees; each exits at the lowest set bit."""
+        lowest = exits & (~exits + np.uint64(1))
+        leaves = np.frexp(lowest.astype(np.float64))[1] - 1  # Exact: lowest is a power of two
+        return self._leaf_value.take(trees * self.n_leaves + leaves)
+
+    def _output(self, trees):
+        """The ensemble (output column) each tree belongs to."""
+        return np.searchsorted(self.output_starts, trees, side="right") - 1
+
+    def predict_grid(self, X, shape=None):
+        """Same as predict(), for the rows of a grid around one property (a what-if sweep).
+
+        X holds the feature rows of a grid of the given shape (one axis per swept input, in
+        C order; default: a single axis). Such rows differ in only a few of the feature columns,
+        so the splits on every other column are taken once, for the first row, and only the
+        splits on changing columns are compared per row, each on the sub-grid of the axes its
+        column changes along (a split on sqft_living is compared once per sqft_living value,
+        not once per grid point).
+
+        Trees are evaluated QuickScorer-style: every split that goes right clears the leaves of
+        its left subtree from a bitmask, and a row ends in the leftmost leaf left. A tree can only
+        change leaf between two consecutive rows of its sub-grid where one of its splits flips, so
+        its leaf is looked up at the first row and at those rows only, and each row's sum is the
+        running total of the changes. The axis that changes the fewest columns is walked innermost
+        (a zipcode axis would flip its one-hot splits at every step). Trees that depend on no axis
+        add a constant. Equal to predict() up to floating-point summation order.
+        """
+        if self.n_leaves > 64:
+            return self.predict(X)  # Leaf bitmasks are 64-bit
+        X = self._as_matrix(X, fix_nan=False)
+        shape = tuple(shape) if shape else (X.shape[0],)
+
+        # Only the columns some tree splits on matter (a few hundred of the 3002), stored column-major:
+        # a split compares one column with every row of its sub-grid, a contiguous run here
+        used, feature = self._used_features()
+        X = self._fix_nan(np.ascontiguousarray(X[:, used]))
+        grid = X.reshape(shape + (len(used),))
+        column_axes = np.zeros(len(used), dtype=np.intp)
+        for axis in range(len(shape)):
+            changes = (grid != grid.take([0], axis=axis)).reshape(-1, len(used)).any(axis=0)
+            column_axes |= changes.astype(np.intp) << axis
+        split_axes, tree_axes, exits = self._specialize(X[0], feature, column_axes)
+        # Rows are visited with the axis that changes the fewest columns innermost (a zipcode axis,
+        # which flips many splits at every step, outermost)
+        order = sorted(range(len(shape)), key=lambda axis: -np.count_nonzero(column_axes >> axis & 1))
+        columns = np.ascontiguousarray(X.T).reshape((len(used),) + shape)
+
+        def sub_grid(mask):
+            # The grid along the axes in mask, at index 0 along the others (kept as size-1 axes)
+            return tuple(slice(None) if mask >> axis & 1 else slice(0, 1) for axis in range(len(shape)))
+
+        fixed = np.flatnonzero(tree_axes == 0)
+        result = np.zeros((self.n_outputs,) + shape)
+        result += np.bincount(self._output(fixed), self._leaf_values(fixed, exits[fixed]), self.n_outputs).reshape(
+            (self.n_outputs,) + (1,) * len(shape))
+        left_masks = self._left_masks()
+        all_leaves = np.uint64(2 ** self.n_leaves - 1)
+        for tree_mask in np.unique(tree_axes[tree_axes != 0]):
+            trees = np.flatnonzero(tree_axes == tree_mask)
+            sub_shape = columns[(0,) + sub_grid(tree_mask)].shape
+            n_rows = int(np.prod(sub_shape))
+
+            # Every changing split of these trees, compared on the rows of their sub-grid
+            owner, local = np.nonzero(split_axes[trees])  # Grouped by tree
+            nodes = trees[owner] * (self.n_leaves - 1) + local
+            node_mask = split_axes[trees[owner], local]
+            go_right = np.empty((len(nodes),) + sub_shape, dtype=bool)
+            for split_mask in np.unique(node_mask):
+                selected = np.flatnonzero(node_mask == split_mask)
+                values = columns[(feature.ravel()[nodes[selected]],) + sub_grid(split_mask)]
+                go_right[selected] = self._go_right(values.reshape(len(selected), -1), nodes[selected, None]).reshape(values.shape)
+            go_right = go_right.transpose([0] + [axis + 1 for axis in order]).reshape(len(nodes), n_rows)
+
+            # A tree's leaf can only change at a row where one of its splits flips: find the leaf at
+            # the first row and at those rows only, and sum the changes along the rows
+            _, starts, counts = np.unique(owner, return_index=True, return_counts=True)
+            flips = np.zeros((len(trees), n_rows), dtype=bool)
+            flips[:, 0] = True
+            for k in range(counts.max()):
+                with_k = np.flatnonzero(counts > k)
+                node = starts[with_k] + k
+                flips[with_k, 1:] |= go_right[node, 1:] != go_right[node, :-1]
+            event_tree, event_row = np.nonzero(flips)  # Sorted by tree, then row
+            masks = exits[trees[event_tree]]
+            with_k = np.arange(len(event_tree))
+            for k in range(counts.max()):
+                with_k = with_k[counts[event_tree[with_k]] > k]  # Events of the trees with a k-th split
+                node = starts[event_tree[with_k]] + k
+                masks[with_k] &= np.where(go_right[node, event_row[with_k]], left_masks[local[node]], all_leaves)
+            leaf = self._leaf_values(trees[event_tree], masks)
+            change = np.where(event_row == 0, leaf, leaf - np.roll(leaf, 1))
+            changes = np.bincount(self._output(trees[event_tree]) * n_rows + event_row, change, self.n_outputs * n_rows)
+            sums = np.cumsum(changes.reshape(self.n_outputs, n_rows), axis=1)
+            sums = sums.reshape((self.n_outputs,) + tuple(sub_shape[axis] for axis in order))
+            result += sums.transpose([0] + [order.index(axis) + 1 for axis in range(len(shape))])
+
+        result = result.reshape(self.n_outputs, -1).T
+        return result[:, 0] if self.n_outputs == 1 else result
@@ -1,14 +1,18 @@
 import os
 from app import app
+from app.database import create_database
 from config import Config  # Import the Config class
 
-# Set the system time zone to Nairobi (EAT, UTC+3)
-os.environ['TZ'] = 'Africa/Nairobi'
+# Set the system time zone to the configured display time zone (Nairobi, EAT, UTC+3 by default)
+os.environ['TZ'] = Config.DISPLAY_TIMEZONE
 
 # Apply configuration to the app
 app.config.from_object(Config)
 
 if __name__ == "__main__":
+    # Create the database tables (or migrate an existing database) before serving requests;
+    # gunicorn does the same in its when_ready hook (gunicorn.conf.py)
+    create_database()
     app.run(debug=True)  # Start the Flask app
         # debug=True allows for changes to be made to the app without needing to restart the server
                          # useful for development, but this is my reminder to set to False in production                        
\ No newline at end of file
@@ -0,0 +1,130 @@
+import logging
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+# Set before the app is imported: keep the logged queries and logs out of data/housing.db and database.log
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="housing-tests-"), "housing.db")
+os.environ["LOG_FILE"] = ""
+os.environ["MODEL_WATCH_INTERVAL"] = "0"
+
+from app import app as flask_app  # noqa: E402  (initializes the app before model.predict, avoiding the circular import)
+from app.database import create_database  # noqa: E402
+from model import predict  # noqa: E402
+from model.features import NUMERIC_COLUMNS  # noqa: E402
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../data/processed/cleaned_dataset_iqr.csv")
+
+create_database()  # Importing the app no longer creates it (run.py and gunicorn's when_ready do)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def quiet_logging():
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture(scope="session")
+def loaded():
+    return predict.current_models()
+
+
+@pytest.fixture
+def client():
+    flask_app.config["TESTING"] = True
+    with flask_app.test_client() as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def training_rows():
+    """Feature dicts of the training data: integer zipcodes, then some posted as strings and some unknown to the encoder."""
+    df = pd.read_csv(DATA_PATH)[::10]
+    rows = [{column: int(record[column]) if column in ("no_of_bedrooms", "no_of_floors", "house_age") else record[column]
+             for column in NUMERIC_COLUMNS} | {"zipcode": int(record["zipcode"])}
+            for record in df[NUMERIC_COLUMNS + ["zipcode"]].to_dict("records")]
+    return rows + [dict(row, zipcode=str(row["zipcode"])) for row in rows[:100]] + [dict(row, zipcode=98999) for row in rows[:20]]
+
+
+@pytest.fixture(scope="session")
+def house():
+    """One property as the home page form posts it (zipcode as a string)."""
+    return {"sqft_living": 2100, "no_of_bedrooms": 3, "no_of_bathrooms": 2.5, "sqft_lot": 6000,
+            "no_of_floors": 2, "house_age": 25, "zipcode": "98103"}
+
+
+@pytest.fixture(scope="session")
+def pandas_pipeline(loaded):
+    """The original DataFrame -> encoder -> concat -> poly featurization, kept as the reference."""
+    def featurize(features):
+        input_data = pd.DataFrame(features if isinstance(features, list) else [features])
+        encoded = loaded.encoder.transform(input_data[["zipcode"]])
+        encoded_df = pd.DataFrame(encoded, columns=loaded.encoder.get_feature_names_out(["zipcode"]))
+        return loaded.poly.transform(pd.concat([input_data.drop(columns=["zipcode"]), encoded_df], axis=1))
+    return featurize
+
+
+def grid_rows(features, axes):
+    """The grid of a what-if sweep as a list of feature dicts, in the C order predict_sweep uses."""
+    rows = [dict(features)]
+    for feature, values in axes:
+        rows = [dict(row, **{feature: value}) for row in rows for value in values]
+    return rows
+
+
+@pytest.fixture(scope="session")
+def sweep_grid():
+    return grid_rows
+
+
+@pytest.fixture
+def fresh_database(tmp_path, monkeypatch):
+    """Points app.database at a new, empty database for the duration of a test; yields the module."""
+    from app import database
+    path = str(tmp_path / "housing.db")
+    monkeypatch.setattr(database, "pool", database.ConnectionPool(path))
+    monkeypatch.setattr(database, "DB_PATH", path)
+    database.create_database()
+    yield database
+    database.pool.close_all()
+
+
+def stored_query_rows(n, seed=0):
+    """n logged predictions as (sqft_living, ..., purpose, predicted_price, model_version, UTC timestamp) tuples, over 10 days."""
+    rng = random.Random(seed)
+    start = datetime(2024, 3, 1)
+    return [(rng.randrange(800, 4000, 10), rng.randint(1, 6), rng.choice([1.0, 1.5, 2.0, 3.0]), rng.randrange(2000, 20000, 10),
+             rng.randint(1, 3), rng.randint(0, 90), rng.choice([98001, 98052, 98103]), rng.choice(["buy", "sell"]),
+             round(rng.uniform(150_000, 1_500_000), 2), rng.choice(["v1", "v2"]),
+             (start + timedelta(minutes=rng.randrange(10 * 24 * 60))).strftime("%Y-%m-%d %H:%M:%S"))
+            for _ in range(n)]
+
+
+def insert_query_rows(conn, rows):
+    """Stores rows of stored_query_rows with their own timestamps (no aggregates are updated)."""
+    with conn:
+        conn.executemany("INSERT INTO queries (sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, "
+                         "zipcode, purpose, predicted_price, model_version, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+@pytest.fixture
+def stored_queries(fresh_database):
+    """200 logged predictions, stored in a fresh database with their timestamps; returns them by id."""
+    rows = stored_query_rows(200)
+    insert_query_rows(fresh_database.pool.connection(), rows)
+    return {i + 1: row for i, row in enumerate(rows)}
+
+
+@pytest.fixture
+def add_queries(fresh_database):
+    """Returns add(n, seed), which stores n more logged predictions and returns them."""
+    def add(n, seed):
+        rows = stored_query_rows(n, seed)
+        insert_query_rows(fresh_database.pool.connection(), rows)
+        return rows
+    return add
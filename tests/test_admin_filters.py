@@ -0,0 +1,23 @@
+import pytest
+
+
+@pytest.mark.parametrize("url", ["/admin/queries", "/admin/stats", "/download_filtered_csv"])
+@pytest.mark.parametrize("params", [
+    "minPrice=cheap",
+    "maxPrice=1e6x",
+    "minPrice=nan",
+    "zipcode=98l03",
+    "zipcode=98103.5",
+    "startDate=2024-13-01",
+])
+def test_malformed_filters_are_rejected(client, url, params):
+    response = client.get(f"{url}?{params}")
+    assert response.status_code == 400
+    if url != "/download_filtered_csv":
+        assert "Invalid filter value" in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("url", ["/admin/queries", "/admin/stats", "/download_filtered_csv"])
+def test_valid_and_empty_filters_are_accepted(client, url):
+    assert client.get(f"{url}?minPrice=100000&maxPrice=2e6&zipcode=98103&startDate=2024-01-01&purpose=buy").status_code == 200
+    assert client.get(f"{url}?minPrice=&maxPrice=&zipcode=").status_code == 200
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import database
+
+DISPLAY_OFFSET = timedelta(minutes=database.DISPLAY_OFFSET_MINUTES or 0)
+
+
+def local_day(row):
+    return (datetime.strptime(row[-1], "%Y-%m-%d %H:%M:%S") + DISPLAY_OFFSET).strftime("%Y-%m-%d")
+
+
+def expected_ids(stored, min_price=None, max_price=None, start_date=None, end_date=None, purpose=None, zipcode=None, model_version=None):
+    return [i for i, row in sorted(stored.items(), reverse=True)
+            if (min_price is None or row[8] >= min_price) and (max_price is None or row[8] <= max_price)
+            and (start_date is None or local_day(row) >= start_date) and (end_date is None or local_day(row) <= end_date)
+            and (purpose is None or row[7] == purpose) and (zipcode is None or row[6] == zipcode)
+            and (model_version is None or row[9] == model_version)]
+
+
+def walk(limit, **filters):
+    ids, cursor = [], None
+    while True:
+        rows, cursor = database.get_queries_page(limit=limit, before_id=cursor, **filters)
+        assert len(rows) <= limit
+        ids += [row[0] for row in rows]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"purpose": "sell"},
+    {"zipcode": 98052, "min_price": 400_000},
+    {"start_date": "2024-03-03", "end_date": "2024-03-05", "max_price": 900_000},
+    {"model_version": "v2", "purpose": "buy"},
+])
+def test_pages_cover_every_match_once_newest_first(stored_queries, filters):
+    expected = expected_ids(stored_queries, **filters)
+    assert expected  # The filters select something
+    for limit in (7, len(expected), 1000):
+        assert walk(limit, **filters) == expected
+
+
+def test_last_full_page_has_no_cursor(stored_queries):
+    rows, cursor = database.get_queries_page(limit=200)
+    assert len(rows) == 200 and cursor is None
+    rows, cursor = database.get_queries_page(limit=199)
+    assert cursor == rows[-1][0] == 2
+
+
+def test_admin_api_pages_with_the_returned_cursor(stored_queries, client):
+    first = client.get("/admin/queries?limit=50&purpose=buy").get_json()
+    second = client.get(f"/admin/queries?limit=50&purpose=buy&cursor={first['next_cursor']}").get_json()
+    ids = [row["id"] for row in first["rows"] + second["rows"]]
+    assert ids == expected_ids(stored_queries, purpose="buy")[:len(ids)]
+    assert all(row["purpose"] == "buy" for row in first["rows"])
+
+
+def test_filtered_page_walks_an_index(stored_queries):
+    clauses, params = database.build_query_filters(zipcode=98052)
+    plan = " ".join(row[-1] for row in database.pool.connection().execute(
+        f"EXPLAIN QUERY PLAN {database.QUERY_SELECT_SQL} WHERE {' AND '.join(clauses)} ORDER BY id DESC LIMIT 51", params))
+    assert "idx_queries_zipcode_id" in plan and "TEMP B-TREE" not in plan
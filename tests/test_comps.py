@@ -0,0 +1,88 @@
+import os
+import pickle
+import threading
+
+import numpy as np
+import pytest
+
+from app.comps import COMP_FEATURES, ComparableSales, ComparableSalesIndex, write_index
+
+
+def synthetic_sales(n=600, seed=3):
+    rng = np.random.default_rng(seed)
+    return {
+        "zipcode": rng.choice([98001, 98052, 98103], n),
+        "price": rng.uniform(2e5, 2e6, n).round(),
+        "sqft_living": rng.integers(500, 5000, n),
+        "no_of_bedrooms": rng.integers(1, 6, n),
+        "no_of_bathrooms": rng.integers(1, 8, n) / 2,
+        "sqft_lot": rng.integers(1000, 20000, n),
+        "house_age": rng.integers(0, 100, n),
+        "no_of_floors": rng.integers(1, 4, n),
+    }
+
+
+def brute_force(sales, features, k):
+    """The k nearest sales in the zipcode by scanning all of them, with the index's scaling."""
+    points = np.column_stack([sales[column] for column in COMP_FEATURES]).astype(float)
+    mean, scale = points.mean(axis=0), points.std(axis=0)
+    point = np.array([float(features[column]) for column in COMP_FEATURES])
+    distances = np.linalg.norm((points - point) / scale, axis=1)
+    distances[sales["zipcode"] != int(features["zipcode"])] = np.inf
+    nearest = np.argsort(distances, kind="stable")[:k]
+    return sales["price"][nearest].tolist(), distances[nearest].round(4).tolist()
+
+
+@pytest.fixture(scope="module")
+def sales():
+    return synthetic_sales()
+
+
+@pytest.mark.parametrize("zip_code", ["98001", 98052, "98103"])
+def test_query_matches_brute_force(sales, house, zip_code):
+    index = ComparableSalesIndex(sales)
+    features = dict(house, zipcode=zip_code)
+    comps = index.query(features, k=7)
+    prices, distances = brute_force(sales, features, 7)
+    assert [comp["price"] for comp in comps] == prices
+    assert [comp["distance"] for comp in comps] == pytest.approx(distances, abs=1e-4)
+    assert all(set(comp) == {"price", "no_of_floors", "distance", *COMP_FEATURES} for comp in comps)
+
+
+def test_query_caps_k_and_skips_unknown_zipcodes(sales, house):
+    index = ComparableSalesIndex(sales)
+    in_zip = int((sales["zipcode"] == 98001).sum())
+    assert len(index.query(dict(house, zipcode=98001), k=10 * in_zip)) == in_zip
+    assert index.query(dict(house, zipcode=98999)) is None
+
+
+def test_index_is_rebuilt_when_the_dataset_changes(tmp_path, sales):
+    dataset = tmp_path / "sales.csv"
+    columns = list(sales)
+    dataset.write_text(",".join(columns) + "\n" + "\n".join(
+        ",".join(str(sales[column][i]) for column in columns) for i in range(len(sales["price"]))) + "\n")
+    path = tmp_path / "comps.pkl"
+
+    first = ComparableSales(str(path), str(dataset))._load()
+    assert path.exists() and len(first) == len(sales["price"])
+    # An unchanged dataset is served from the saved file
+    with open(path, "rb") as f:
+        assert pickle.load(f).signature == first.signature
+    assert ComparableSales(str(path), str(dataset))._load().signature == first.signature
+
+    with open(dataset, "a") as f:
+        f.write(",".join(str(sales[column][0]) for column in columns) + "\n")
+    rebuilt = ComparableSales(str(path), str(dataset))._load()
+    assert len(rebuilt) == len(first) + 1
+    with open(path, "rb") as f:
+        assert len(pickle.load(f)) == len(rebuilt)
+
+
+def test_failed_write_keeps_the_previous_index(tmp_path, sales):
+    path = tmp_path / "comps.pkl"
+    write_index(ComparableSalesIndex(sales), str(path))
+    before = path.read_bytes()
+    with pytest.raises(TypeError):
+        write_index(threading.Lock(), str(path))  # Not picklable
+    assert path.read_bytes() == before
+    assert os.listdir(tmp_path) == ["comps.pkl"]
@@ -0,0 +1,69 @@
+import os
+import threading
+
+import pytest
+
+from app.database import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"))
+    yield pool
+    pool.close_all()
+
+
+def in_thread(fn):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn()))
+    thread.start()
+    thread.join()
+    return result[0], thread
+
+
+def test_each_thread_reuses_its_own_connection(pool):
+    conn = pool.connection()
+    assert pool.connection() is conn
+    other, _ = in_thread(pool.connection)
+    assert other is not conn
+
+
+def test_connections_use_wal(pool):
+    assert pool.connection().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_reader_is_not_blocked_by_an_open_write(pool):
+    writer = pool.connection()
+    writer.execute("CREATE TABLE t (x INTEGER)")
+    writer.execute("INSERT INTO t VALUES (1)")
+    writer.commit()
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute("INSERT INTO t VALUES (2)")
+    # Another thread reads the last committed state while the write transaction is open
+    count, _ = in_thread(lambda: pool.connection().execute("SELECT COUNT(*) FROM t").fetchone()[0])
+    assert count == 1
+    writer.commit()
+
+
+def test_connections_of_exited_threads_are_closed(pool):
+    other, thread = in_thread(pool.connection)
+    assert not thread.is_alive()
+    pool.connection()  # The next new connection sweeps up the exited thread's one
+    assert other not in [conn for _, conn in pool._connections]
+    with pytest.raises(Exception):
+        other.execute("SELECT 1")
+
+
+def test_forked_child_opens_its_own_connection(pool):
+    parent = pool.connection()
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        child = pool.connection()
+        os.write(write, b"1" if child is not parent and len(pool._connections) == 1 else b"0")
+        os._exit(0)
+    os.waitpid(pid, 0)
+    os.close(write)
+    assert os.read(read, 1) == b"1"
+    os.close(read)
+    assert pool.connection() is parent
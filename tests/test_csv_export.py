@@ -0,0 +1,47 @@
+import csv
+import gzip
+import io
+
+from app import database
+from app.routes import CSV_HEADERS
+
+
+def read_csv(data):
+    return list(csv.reader(io.StringIO(data.decode("utf-8"))))
+
+
+def test_filtered_export_streams_the_matching_rows(stored_queries, client):
+    response = client.get("/download_filtered_csv?purpose=sell&zipcode=98103")
+    assert response.is_streamed
+    assert response.mimetype == "text/csv"
+    assert "filtered_houses_predictions.csv" in response.headers["Content-Disposition"]
+    rows = read_csv(response.get_data())
+    assert rows[0] == CSV_HEADERS
+    expected = [i for i, row in sorted(stored_queries.items(), reverse=True) if row[7] == "sell" and row[6] == 98103]
+    assert len(rows) - 1 == len(expected) > 0
+    assert all(row[7] == "sell" and row[6] == "98103" for row in rows[1:])
+
+
+def test_gzip_export_has_the_same_content(stored_queries, client):
+    plain = client.get("/download_all_csv").get_data()
+    response = client.get("/download_filtered_csv?gzip=1")
+    assert response.mimetype == "application/gzip"
+    assert response.headers["Content-Disposition"].endswith(".csv.gz")
+    assert gzip.decompress(response.get_data()) == plain
+    assert len(read_csv(plain)) == len(stored_queries) + 1
+
+
+def test_export_without_matches_has_only_the_header(stored_queries, client):
+    assert read_csv(client.get("/download_filtered_csv?zipcode=98199").get_data()) == [CSV_HEADERS]
+
+
+def test_values_are_quoted(fresh_database, client):
+    fresh_database.insert_query(1500, 3, 2.0, 5000, 1, 20, 98103, "buy", 450000.0, 'v1, "beta"')
+    rows = read_csv(client.get("/download_all_csv").get_data())
+    assert rows[1][9] == 'v1, "beta"'
+
+
+def test_rows_are_read_in_chunks(stored_queries):
+    chunks = list(database.iter_queries(chunk_size=64))
+    assert [len(chunk) for chunk in chunks] == [64, 64, 64, 8]
+    assert [row[0] for chunk in chunks for row in chunk] == sorted(stored_queries, reverse=True)
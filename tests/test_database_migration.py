@@ -0,0 +1,97 @@
+import hashlib
+import os
+import sqlite3
+import subprocess
+import sys
+
+from app import database
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+ROW = (1500, 3, 2.0, 5000, 1, 20, 98103, "buy", 450000.0)
+
+# The queries table as the original schema created it (no query_hash, no model_version)
+ORIGINAL_SCHEMA = """
+    CREATE TABLE queries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sqft_living INTEGER NOT NULL, no_of_bedrooms INTEGER NOT NULL, no_of_bathrooms REAL NOT NULL,
+        sqft_lot INTEGER NOT NULL, no_of_floors REAL NOT NULL, house_age INTEGER NOT NULL,
+        zipcode INTEGER NOT NULL, purpose TEXT NOT NULL, predicted_price REAL NOT NULL,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX idx_queries_purpose ON queries (purpose);
+"""
+
+
+def count(db, where="1"):
+    return db.pool.connection().execute(f"SELECT COUNT(*) FROM queries WHERE {where}").fetchone()[0]
+
+
+def test_identical_row_within_a_second_is_skipped(fresh_database):
+    fresh_database.insert_query(*ROW)
+    fresh_database.insert_query(*ROW)
+    # Equal after SQLite's column affinity: the zipcode as a string, integers as floats
+    fresh_database.insert_query(1500.0, 3, 2, 5000, 1.0, 20, "98103", "buy", 450000)
+    assert count(fresh_database) == 1
+    fresh_database.insert_query(*ROW[:-1], 450001.0)
+    assert count(fresh_database) == 2
+
+
+def test_identical_row_after_the_window_is_stored(fresh_database):
+    fresh_database.insert_query(*ROW)
+    conn = fresh_database.pool.connection()
+    with conn:
+        conn.execute("UPDATE queries SET timestamp = datetime('now', '-2 seconds')")
+    fresh_database.insert_query(*ROW)
+    assert count(fresh_database) == 2
+
+
+def test_batch_insert_skips_duplicates(fresh_database):
+    fresh_database.insert_queries([ROW, ROW, ROW[:-1] + (1.0,)])
+    assert count(fresh_database) == 2
+
+
+def test_duplicate_lookup_uses_the_hash_index(fresh_database):
+    params = fresh_database.query_params(ROW)
+    plan = " ".join(row[-1] for row in fresh_database.pool.connection().execute(
+        "EXPLAIN QUERY PLAN " + fresh_database.INSERT_QUERY_SQL, params))
+    assert "idx_queries_hash" in plan
+
+
+def test_migration_upgrades_an_original_database(tmp_path, monkeypatch):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(ORIGINAL_SCHEMA)
+    conn.executemany("INSERT INTO queries (sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, "
+                     "zipcode, purpose, predicted_price) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     [ROW[:-1] + (400000.0 + i,) for i in range(25)])
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(database, "pool", database.ConnectionPool(path))
+    monkeypatch.setattr(database, "DB_PATH", path)
+    database.create_database()
+    conn = database.pool.connection()
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(queries)")}
+    assert {"query_hash", "model_version"} <= columns
+    for row in conn.execute("SELECT sqft_living, no_of_bedrooms, no_of_bathrooms, sqft_lot, no_of_floors, house_age, "
+                            "zipcode, purpose, predicted_price, query_hash FROM queries"):
+        assert row[-1] == database.query_hash(*row[:-1])
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_queries_hash", "idx_queries_timestamp_id", "idx_queries_zipcode_id"} <= indexes
+    assert sum(bucket["count"] for bucket in database.get_query_stats("day")) == 25
+
+    # A second run changes nothing
+    database.migrate_database(conn)
+    assert count(database, "query_hash IS NULL") == 0
+    database.pool.close_all()
+
+
+def test_importing_the_app_leaves_the_database_untouched():
+    # Migration is an explicit step (run.py, gunicorn's when_ready); importing the package must not run it
+    with open(os.path.join(ROOT, "data/housing.db"), "rb") as f:
+        before = hashlib.sha256(f.read()).digest()
+    environment = dict(os.environ, DATABASE_PATH="", LOG_FILE="")
+    subprocess.run([sys.executable, "-c", "import app, model.predict"], cwd=ROOT, env=environment, check=True)
+    with open(os.path.join(ROOT, "data/housing.db"), "rb") as f:
+        assert hashlib.sha256(f.read()).digest() == before
+    assert not os.path.exists(os.path.join(ROOT, "data/housing.db-wal"))
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+import pytest
+import pytz
+
+from app import database
+
+
+def python_local_time(utc_timestamp, timezone):
+    utc_time = pytz.utc.localize(datetime.strptime(utc_timestamp, "%Y-%m-%d %H:%M:%S"))
+    return utc_time.astimezone(timezone).strftime("%Y-%m-%d %H:%M:%S")
+
+
+@pytest.mark.parametrize("zone, offset", [
+    ("Africa/Nairobi", 180),
+    ("Asia/Kolkata", 330),
+    ("UTC", 0),
+    ("America/New_York", None),  # DST: converted per row in Python
+    ("Europe/London", None),
+])
+def test_fixed_offset_is_detected(zone, offset):
+    assert database.fixed_utc_offset_minutes(pytz.timezone(zone)) == offset
+
+
+def test_conversion_matches_python(stored_queries):
+    rows = database.get_all_queries()
+    assert [row[0] for row in rows] == sorted(stored_queries, reverse=True)
+    for row in rows:
+        assert row[-1] == python_local_time(stored_queries[row[0]][-1], database.DISPLAY_TIMEZONE)
+
+
+def test_python_fallback_converts_each_row(monkeypatch):
+    new_york = pytz.timezone("America/New_York")
+    monkeypatch.setattr(database, "DISPLAY_OFFSET_MINUTES", None)
+    monkeypatch.setattr(database, "DISPLAY_TIMEZONE", new_york)
+    rows = [(1, "2024-01-15 12:00:00"), (2, "2024-07-15 12:00:00")]
+    assert database.localize_rows(rows) == [(1, "2024-01-15 07:00:00"), (2, "2024-07-15 08:00:00")]
+
+
+@pytest.mark.skipif(database.DISPLAY_TIMEZONE.zone != "Africa/Nairobi", reason="checks the default display time zone")
+def test_local_dates_bound_utc_ranges():
+    # Nairobi is UTC+3: the local day starts at 21:00 UTC the day before
+    assert database.local_date_to_utc("2024-03-05") == "2024-03-04 21:00:00"
+    assert database.local_date_to_utc("2024-03-05", end_of_day=True) == "2024-03-05 21:00:00"
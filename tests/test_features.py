@@ -0,0 +1,25 @@
+import numpy as np
+
+from model.features import NUMERIC_COLUMNS
+
+
+def assert_bitwise_equal(expected, actual):
+    assert expected.shape == actual.shape
+    assert np.array_equal(expected.view(np.uint64), actual.view(np.uint64))
+
+
+def test_build_many_matches_pandas_pipeline(loaded, training_rows, pandas_pipeline):
+    # Integer zipcodes, zipcodes posted as strings, and zipcodes the encoder has never seen
+    assert_bitwise_equal(pandas_pipeline(training_rows), loaded.feature_builder.build_many(training_rows))
+
+
+def test_build_matches_pandas_pipeline(loaded, training_rows, pandas_pipeline, house):
+    for row in training_rows[:3] + training_rows[-3:] + [house]:
+        assert_bitwise_equal(pandas_pipeline(row), loaded.feature_builder.build(row))
+
+
+def test_build_values_matches_build_many(loaded, training_rows):
+    rows = training_rows[:50] + training_rows[-5:]
+    values = np.array([[float(row[column]) for column in NUMERIC_COLUMNS] for row in rows])
+    zip_indices = np.array([loaded.feature_builder.zip_index.get(int(row["zipcode"]), -1) for row in rows])
+    assert_bitwise_equal(loaded.feature_builder.build_many(rows), loaded.feature_builder.build_values(values, zip_indices))
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from config import Config
+from model import predict
+from model.holder import ModelHolder
+from model.tree_predictor import TreePredictor
+
+TOLERANCE = 1e-9  # On the log-price scale
+
+
+def holder(backend):
+    return ModelHolder(Config.MODEL_PATH, Config.ENCODER_PATH, Config.POLY_PATH, trees_path=Config.TREES_PATH,
+                       backend=backend, interval_paths=Config.INTERVAL_PATHS)
+
+
+@pytest.fixture(scope="module")
+def holders():
+    return holder("numpy"), holder("lightgbm")
+
+
+def test_default_backend_stacks_price_and_interval_models(holders):
+    assert Config.MODEL_BACKEND == "numpy"
+    loaded = holders[0].load()
+    assert isinstance(loaded.model, TreePredictor) and loaded.model.n_outputs == 3
+    assert loaded.interval_model is None  # Nothing left for a second pass
+
+
+def test_stacked_pass_matches_separate_models(holders, training_rows):
+    stacked, separate = holders
+    X = stacked.load().feature_builder.build_many(training_rows[::5])
+    for expected, actual in zip(separate.predict(X), stacked.predict(X)):
+        assert np.abs(expected - actual).max() < TOLERANCE
+    grid = X[:12]
+    for expected, actual in zip(stacked.predict(grid), stacked.predict_grid(grid, (3, 4))):
+        assert np.abs(expected - actual).max() < TOLERANCE
+
+
+def test_interval_contains_the_price(holders, training_rows):
+    stacked = holders[0]
+    X = stacked.load().feature_builder.build_many(training_rows[::5])
+    price, ci_min, ci_max = predict.to_prices(*stacked.predict(X))
+    assert np.all(ci_min <= price) and np.all(price <= ci_max)
+    assert np.median(ci_max - ci_min) > 0
@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+import signal
+import threading
+
+import pytest
+
+from app.logging_config import DeferredQueueHandler, setup_logging, stop_logging
+
+
+class CountingArg:
+    """Log argument that records how often it was formatted."""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "counted"
+
+
+@pytest.fixture
+def log_to(tmp_path):
+    """Configures logging into a file in tmp_path; returns a reader for the written lines."""
+    logging.disable(logging.NOTSET)
+    path = tmp_path / "test.log"
+
+    def configure(**kwargs):
+        setup_logging(log_file=str(path), **kwargs)
+
+        def lines():
+            stop_logging()  # Drains the queue
+            return path.read_text().splitlines()
+        return lines
+
+    yield configure
+    setup_logging()
+
+
+def test_json_lines_carry_extra_fields_and_exceptions(log_to):
+    lines = log_to(level="INFO", log_format="json")
+    logging.getLogger("app.test").info("Predicted %s", 12, extra={"zipcode": 98103})
+    try:
+        raise ValueError("bad row")
+    except ValueError:
+        logging.exception("Failed")
+    first, second = (json.loads(line) for line in lines())
+
+    assert first["message"] == "Predicted 12"
+    assert first["level"] == "INFO"
+    assert first["logger"] == "app.test"
+    assert first["zipcode"] == 98103
+    assert first["thread"] == threading.current_thread().name
+    assert second["level"] == "ERROR"
+    assert "ValueError: bad row" in second["exception"]
+
+
+def test_text_format(log_to):
+    lines = log_to(level="INFO", log_format="text")
+    logging.getLogger("app.test").warning("Slow request: %.1f ms", 12.34)
+    (line,) = lines()
+    assert line.endswith(" - WARNING - app.test - Slow request: 12.3 ms")
+
+
+def test_records_below_level_are_never_formatted(log_to):
+    lines = log_to(level="WARNING", log_format="json")
+    arg = CountingArg()
+    logging.info("Features: %s", arg)
+    logging.getLogger("app").debug("Features: %s", arg)  # Flask's logger follows LOG_LEVEL too
+    assert arg.formatted == 0
+    logging.warning("Features: %s", arg)
+    assert [json.loads(line)["message"] for line in lines()] == ["Features: counted"]
+    assert arg.formatted == 1
+
+
+def test_arguments_are_captured_when_the_call_returns(log_to):
+    lines = log_to(level="INFO", log_format="json")
+    features = {"zipcode": 98103}
+    logging.info("Features: %s", features)
+    features["zipcode"] = 98001  # Mutated before the listener writes the record
+    assert json.loads(lines()[0])["message"] == "Features: {'zipcode': 98103}"
+
+
+def test_root_logger_only_queues(log_to):
+    log_to(level="DEBUG")
+    handlers = logging.getLogger().handlers
+    assert len(handlers) == 1 and isinstance(handlers[0], DeferredQueueHandler)
+    # Calling setup again replaces the handler instead of adding a second one
+    log_to(level="DEBUG")
+    assert len(logging.getLogger().handlers) == 1
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_writes_its_own_records(log_to):
+    lines = log_to(level="INFO", log_format="json")
+    logging.info("parent")
+    pid = os.fork()
+    if pid == 0:
+        signal.alarm(5)  # Never hang the test run
+        try:
+            logging.info("child")
+            stop_logging()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    records = [json.loads(line) for line in lines()]
+    assert sorted((record["message"], record["process"]) for record in records) == [
+        ("child", pid), ("parent", os.getpid())]
@@ -0,0 +1,96 @@
+import os
+import signal
+import threading
+
+import pytest
+
+from model.batcher import MicroBatcher
+
+
+def submit_concurrently(batcher, items):
+    results = {}
+    errors = {}
+    start = threading.Barrier(len(items))
+
+    def client(item):
+        start.wait()
+        try:
+            results[item] = batcher.submit(item)
+        except Exception as e:
+            errors[item] = e
+
+    threads = [threading.Thread(target=client, args=(item,)) for item in items]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return results, errors
+
+
+def test_each_caller_gets_its_own_result():
+    batcher = MicroBatcher(lambda items: [item * 10 for item in items], max_batch_size=8, max_wait=0.01)
+    assert batcher.submit(1) == 10
+    results, errors = submit_concurrently(batcher, list(range(2, 42)))
+    assert not errors
+    assert results == {item: item * 10 for item in range(2, 42)}
+    assert batcher.items == 41
+
+
+def test_concurrent_submits_are_coalesced():
+    sizes = []
+    release = threading.Event()
+
+    def process(items):
+        release.wait(5)  # Hold the first batch so the others queue up behind it
+        sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher(process, max_batch_size=16, max_wait=0.01)
+    threading.Timer(0.1, release.set).start()
+    results, errors = submit_concurrently(batcher, list(range(24)))
+    assert not errors and len(results) == 24
+    assert max(sizes) > 1
+    assert max(sizes) <= 16
+    assert batcher.batches == len(sizes) < 24
+
+
+def test_error_is_raised_in_every_caller_of_the_batch():
+    release = threading.Event()
+
+    def process(items):
+        release.wait(5)
+        raise ValueError("model failed")
+
+    batcher = MicroBatcher(process, max_batch_size=16, max_wait=0.01)
+    threading.Timer(0.1, release.set).start()
+    results, errors = submit_concurrently(batcher, list(range(8)))
+    assert not results
+    assert set(errors) == set(range(8))
+    assert all(isinstance(e, ValueError) for e in errors.values())
+
+
+def test_wrong_number_of_results_fails_the_batch():
+    batcher = MicroBatcher(lambda items: items[:-1])
+    with pytest.raises(RuntimeError, match="returned 0 results"):
+        batcher.submit("item")
+    # The thread survives a failed batch
+    batcher.process = lambda items: items
+    assert batcher.submit("item") == "item"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_thread_is_restarted_in_a_forked_child():
+    batcher = MicroBatcher(lambda items: [os.getpid()] * len(items))
+    assert batcher.submit(None) == os.getpid()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # Child: the parent's thread is gone, submit() must start a new one
+        signal.alarm(5)  # Never hang the test run
+        try:
+            os.write(write_fd, b"ok" if batcher.submit(None) == os.getpid() else b"no")
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    assert os.read(read_fd, 2) == b"ok"
+    os.close(read_fd)
@@ -0,0 +1,57 @@
+import os
+import time
+
+from model import predict
+from model.cache import PredictionCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(maxsize=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # b is now the least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = PredictionCache(maxsize=10, ttl=0.05)
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_cache_clears_when_a_watched_file_changes(tmp_path):
+    model_file = tmp_path / "model.pkl"
+    model_file.write_bytes(b"v1")
+    cache = PredictionCache(maxsize=10, ttl=60, watched_paths=[model_file], check_interval=0)
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    model_file.write_bytes(b"version 2")
+    os.utime(model_file, ns=(0, 0))
+    assert cache.get("a") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_maxsize_zero_disables_caching():
+    cache = PredictionCache(maxsize=0, ttl=60)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_equal_features_share_one_entry(loaded, house):
+    features = predict.validate_features(house)
+    as_floats = dict(features, no_of_bedrooms=float(features["no_of_bedrooms"]))
+    assert predict.cache_key(features, loaded) == predict.cache_key(as_floats, loaded)
+    assert predict.cache_key(features, loaded) != predict.cache_key(dict(features, sqft_living=2200.0), loaded)
+
+    predict.prediction_cache.clear()
+    first = predict.predict_price(house, "buy", recommend=False)
+    hits = predict.prediction_cache.hits
+    assert predict.predict_price(dict(house, sqft_living="2100.0"), "buy", recommend=False) == first
+    assert predict.prediction_cache.hits == hits + 1
@@ -0,0 +1,32 @@
+import pytest
+
+PROPERTY = {"sqft_living": 2100, "no_of_bedrooms": 3, "no_of_bathrooms": 2.5, "sqft_lot": 6000,
+            "no_of_floors": 2, "house_age": 25, "zipcode": "98103"}
+
+
+@pytest.mark.parametrize("purpose", [None, "", "rent", "<img src=x onerror=alert(1)>"])
+def test_batch_rejects_unknown_purpose(client, purpose):
+    response = client.post("/predict/batch", json={"purpose": purpose, "properties": [PROPERTY]})
+    assert response.status_code == 400
+    assert "Invalid purpose" in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("purpose", ["buy", "sell"])
+def test_batch_accepts_buy_and_sell(client, purpose):
+    response = client.post("/predict/batch", json={"purpose": purpose, "properties": [PROPERTY]})
+    assert response.status_code == 200
+    assert response.get_json()["errors"] == 0
+
+
+@pytest.mark.parametrize("purpose", [None, "", "rent", "<img src=x onerror=alert(1)>"])
+def test_predict_rejects_unknown_purpose(client, purpose):
+    response = client.post("/", json=dict(PROPERTY, purpose=purpose))
+    assert response.status_code == 400
+    assert "Invalid purpose" in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("purpose", ["buy", "sell"])
+def test_predict_accepts_buy_and_sell(client, purpose):
+    response = client.post("/", json=dict(PROPERTY, purpose=purpose))
+    assert response.status_code == 200
+    assert response.get_json()["predicted_price"] > 0
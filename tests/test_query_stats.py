@@ -0,0 +1,78 @@
+import statistics
+
+import pytest
+
+from app import database
+
+# A median is read from a 2% wide log-price bin, at its centre
+MEDIAN_TOLERANCE = database.PRICE_BIN_RATIO ** 0.5 - 1
+
+
+def local_day(row):
+    return database.convert_to_local_time(row[-1])[:10]
+
+
+BUCKET_OF = {"day": local_day, "zipcode": lambda row: row[6], "purpose": lambda row: row[7]}
+
+
+def expected_buckets(rows, group):
+    prices = {}
+    for row in rows:
+        prices.setdefault(BUCKET_OF[group](row), []).append(row[8])
+    return {bucket: (len(values), statistics.fmean(values), statistics.median(values), min(values), max(values))
+            for bucket, values in prices.items()}
+
+
+def assert_matches(buckets, rows, group):
+    expected = expected_buckets(rows, group)
+    assert [bucket[group] for bucket in buckets] == sorted(expected)
+    for bucket in buckets:
+        count, mean, median, low, high = expected[bucket[group]]
+        assert bucket["count"] == count
+        assert bucket["mean_price"] == pytest.approx(mean, rel=1e-9)
+        assert bucket["min_price"] == low and bucket["max_price"] == high
+        assert abs(bucket["median_price"] / median - 1) <= MEDIAN_TOLERANCE + 1e-12
+
+
+@pytest.mark.parametrize("group", ["day", "zipcode", "purpose"])
+def test_stats_match_the_queries_table(stored_queries, client, group):
+    response = client.get(f"/admin/stats?group={group}").get_json()
+    assert response["group"] == group
+    assert response["count"] == len(stored_queries)
+    assert_matches(response["buckets"], stored_queries.values(), group)
+
+
+@pytest.mark.parametrize("group", ["day", "purpose"])
+def test_filters_select_the_same_rows_as_the_queries_table(stored_queries, client, group):
+    response = client.get(f"/admin/stats?group={group}&startDate=2024-03-03&endDate=2024-03-06&purpose=sell").get_json()
+    rows = [row for row in stored_queries.values() if "2024-03-03" <= local_day(row) <= "2024-03-06" and row[7] == "sell"]
+    assert rows and response["count"] == len(rows)
+    assert_matches(response["buckets"], rows, group)
+
+
+def test_zipcode_buckets_ignore_dates_but_follow_purpose(stored_queries, client):
+    response = client.get("/admin/stats?group=zipcode&startDate=2024-03-03&purpose=buy").get_json()
+    assert_matches(response["buckets"], [row for row in stored_queries.values() if row[7] == "buy"], "zipcode")
+
+
+def last_id(conn):
+    return conn.execute("SELECT last_id FROM query_stats_state").fetchone()[0]
+
+
+def test_refresh_folds_in_only_rows_past_the_last_processed_id(stored_queries, add_queries):
+    conn = database.pool.connection()
+    assert database.refresh_query_stats(conn, limit=50) == 50
+    assert last_id(conn) == 50
+    assert database.refresh_query_stats(conn) == 150
+    assert last_id(conn) == 200
+    assert database.refresh_query_stats(conn) == 0  # Nothing new: nothing is folded in twice
+
+    # Rows at or below last_id are never read again, even if they change
+    with conn:
+        conn.execute("UPDATE queries SET predicted_price = 1 WHERE id = 1")
+    new_rows = add_queries(30, seed=1)
+    assert database.refresh_query_stats(conn) == 30
+    assert last_id(conn) == 230
+    rows = list(stored_queries.values()) + new_rows
+    assert_matches(database.get_query_stats("purpose"), rows, "purpose")
+    assert_matches(database.get_query_stats("zipcode"), rows, "zipcode")
@@ -0,0 +1,72 @@
+import itertools
+
+import pytest
+
+from app.database import pool
+from app.query_writer import QueryWriter, check_row
+
+sqft = itertools.count(5000)  # Every row distinct, so the database's own duplicate check keeps them all
+
+
+def row(purpose="buy", **overrides):
+    values = dict(sqft_living=next(sqft), no_of_bedrooms=3, no_of_bathrooms=2.0, sqft_lot=5000, no_of_floors=1,
+                  house_age=20, zipcode=98103, purpose=purpose, predicted_price=500000.0, model_version="test")
+    values.update(overrides)
+    return values
+
+
+def stored(rows):
+    conn = pool.connection()
+    return [conn.execute("SELECT COUNT(*) FROM queries WHERE sqft_living = ?", (values["sqft_living"],)).fetchone()[0]
+            for values in rows]
+
+
+@pytest.fixture
+def writer():
+    writer = QueryWriter(flush_interval=0.01, duplicate_window=1.0)
+    yield writer
+    writer.stop()
+
+
+def test_duplicate_window_starts_at_last_stored_row(writer):
+    values = tuple(row().values())
+    assert not writer._is_duplicate(values, 0.0)
+    assert writer._is_duplicate(values, 0.6)
+    # Dropping the second submission did not extend the window: 1.2s after the stored one is accepted
+    assert not writer._is_duplicate(values, 1.2)
+    assert writer._is_duplicate(values, 2.1)
+
+
+def test_submit_drops_duplicates(writer):
+    values = row()
+    assert writer.submit(**values)
+    assert not writer.submit(**values)
+    writer.flush()
+    assert stored([values]) == [1]
+
+
+@pytest.mark.parametrize("overrides", [
+    {"purpose": None},
+    {"purpose": "rent"},
+    {"zipcode": None},
+    {"sqft_lot": "large"},
+    {"predicted_price": float("nan")},
+])
+def test_submit_rejects_invalid_rows(writer, overrides):
+    values = row(**overrides)
+    with pytest.raises(ValueError):
+        check_row(tuple(values.values()))
+    assert not writer.submit(**values)
+    writer.flush()
+    assert stored([values]) == [0]
+
+
+def test_failed_batch_is_retried_row_by_row(writer):
+    rows = [row(purpose="buy" if i % 2 else "sell") for i in range(5)]
+    bad = row(purpose=None)  # Violates NOT NULL, as if it had slipped past check_row
+    writer.ensure_started()
+    for values in rows[:3] + [bad] + rows[3:]:
+        writer._queue.put(tuple(values.values()))
+    writer.flush()
+    assert stored(rows) == [1] * 5
+    assert stored([bad]) == [0]
@@ -0,0 +1,22 @@
+from app.recommendations import CompiledFeatureRules
+
+RULES = [
+    (">", 3000, None, "buy big", "sell big"),
+    ("<", 1000, "sell", "buy small", "sell small"),
+]
+
+
+def test_texts_are_framed_for_purpose():
+    rules = CompiledFeatureRules(RULES)
+    assert rules.texts("buy")[rules.region(4000)] == ["buy big"]
+    assert rules.texts("sell")[rules.region(4000)] == ["sell big"]
+    assert rules.texts("buy")[rules.region(500)] == []
+    assert rules.texts("sell")[rules.region(500)] == ["sell small"]
+
+
+def test_texts_cache_stays_bounded():
+    rules = CompiledFeatureRules(RULES)
+    for i in range(100):
+        assert rules.texts(f"purpose {i}") == rules.texts("sell")
+    rules.texts("buy")
+    assert sorted(rules._texts) == ["buy", "sell"]
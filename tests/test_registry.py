@@ -0,0 +1,119 @@
+import itertools
+import os
+import shutil
+import threading
+
+import pytest
+
+from model import registry as registry_module
+from model.holder import ModelHolder
+from model.registry import ModelRegistry, ModelWatcher, SAVED_MODEL_DIR
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    # Distinct version names even for publishes within the same second
+    stamps = itertools.count(1)
+    monkeypatch.setattr(registry_module.time, "strftime", lambda fmt: f"20240101-{next(stamps):06d}")
+    return ModelRegistry(str(tmp_path / "registry"))
+
+
+@pytest.fixture
+def saved_model(tmp_path):
+    directory = tmp_path / "saved_model"
+    shutil.copytree(SAVED_MODEL_DIR, directory)
+    return directory
+
+
+def build_holder(registry):
+    def build(version):
+        files = registry.files(version)
+        return ModelHolder(files["model"], files["encoder"], files["poly"], trees_path=files.get("trees"), backend="numpy",
+                           interval_paths=(files["interval_low"], files["interval_high"]), version=version)
+    return build
+
+
+def test_publish_copies_every_artifact_and_activates(registry, saved_model):
+    version = registry.publish(str(saved_model))
+    assert registry.current_version() == version
+    assert registry.versions() == [version]
+    assert sorted(os.path.basename(path) for path in registry.files(version).values()) == sorted(os.listdir(saved_model))
+    assert registry.publish(str(saved_model), activate=False) != version
+    assert registry.current_version() == version
+
+
+def test_failed_publish_leaves_no_version(registry, saved_model, monkeypatch):
+    version = registry.publish(str(saved_model))
+    copied = []
+
+    def copy_then_fail(source, destination):
+        if copied:
+            raise OSError("disk full")
+        copied.append(shutil.copy(source, destination))
+    monkeypatch.setattr(registry_module.shutil, "copy2", copy_then_fail)
+    with pytest.raises(OSError):
+        registry.publish(str(saved_model))
+    # The half-copied directory is hidden: never listed, never activatable
+    assert registry.versions() == [version]
+    assert registry.current_version() == version
+
+
+def test_publish_requires_the_model_files(registry, saved_model):
+    os.remove(saved_model / "encoder.pkl")
+    with pytest.raises(ValueError, match="missing encoder"):
+        registry.publish(str(saved_model))
+    with pytest.raises(ValueError, match="Unknown model version"):
+        registry.activate("20240101-999999-deadbeef")
+    assert registry.versions() == [] and registry.current_version() is None
+
+
+def test_readers_never_see_a_partial_current_file(registry, saved_model):
+    versions = [registry.publish(str(saved_model), activate=False) for _ in range(2)]
+    seen, stop = set(), threading.Event()
+
+    def read():
+        while not stop.is_set():
+            seen.add(registry.current_version())
+    reader = threading.Thread(target=read)
+    registry.activate(versions[0])
+    reader.start()
+    for i in range(200):
+        registry.activate(versions[i % 2])
+    stop.set()
+    reader.join()
+    assert seen <= set(versions)
+
+
+def test_watcher_swaps_the_model_in_flight(registry, saved_model, house):
+    first = registry.publish(str(saved_model))
+    build = build_holder(registry)
+    holder = build(first)
+    snapshot = holder.load()  # A request that started before the swap
+    watcher = ModelWatcher(registry, holder, build, interval=0)
+    assert not watcher.check()
+
+    second = registry.publish(str(saved_model))
+    assert watcher.check()
+    assert holder.version == second and holder.load().version == second
+    # The in-flight request finishes on the models it started with
+    assert snapshot.version == first
+    X = snapshot.feature_builder.build(house)
+    assert holder.predict(X, snapshot)[0] == pytest.approx(holder.predict(X)[0])
+
+
+def test_bad_version_leaves_the_old_model_serving(registry, saved_model, house):
+    good = registry.publish(str(saved_model))
+    build = build_holder(registry)
+    holder = build(good)
+    watcher = ModelWatcher(registry, holder, build, interval=0)
+
+    (saved_model / "encoder.pkl").write_bytes(b"not a pickle")
+    bad = registry.publish(str(saved_model))
+    assert registry.current_version() == bad
+    assert not watcher.check()
+    assert holder.version == good
+    assert holder.predict(holder.load().feature_builder.build(house))[0][0] > 0
+    assert not watcher.check()  # Not retried until CURRENT changes
+
+    registry.activate(good)
+    assert not watcher.check()  # Already serving it
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from model import predict
+
+TOLERANCE = 1e-6  # Relative, on the price
+
+
+@pytest.mark.parametrize("axes", [
+    [("sqft_living", [900, 1500, 2100, 2700, 3300])],
+    [("sqft_living", [1000, 2000, 3000]), ("no_of_bathrooms", [1.0, 2.5, 4.0])],
+    [("no_of_bedrooms", [2, 3, 4]), ("zipcode", [98001, 98052, 98103, 98999])],
+])
+def test_sweep_matches_batch_pricing(loaded, house, sweep_grid, axes):
+    features = predict.validate_features(house)
+    prices, ci_min, ci_max = predict.predict_sweep(features, axes, loaded)
+    assert prices.shape == tuple(len(values) for _, values in axes)
+
+    expected = predict.predict_prices(sweep_grid(features, axes), "buy", recommend=False)
+    assert np.abs(prices.ravel() / [result["predicted_price"] for result in expected] - 1).max() < TOLERANCE
+    assert np.all(ci_min <= prices) and np.all(prices <= ci_max)
+
+
+@pytest.mark.parametrize("zipcode", ["98103", 98103])
+@pytest.mark.parametrize("feature, values", [
+    ("sqft_living", [1500, 2100, 2700]),
+    ("zipcode", [98001, 98103, 98052]),
+])
+def test_base_point_of_the_grid_prices_like_post_index(fresh_database, client, house, zipcode, feature, values):
+    house = dict(house, zipcode=zipcode)
+    sweep = client.post("/predict/sweep", json={"property": house, "vary": [{"feature": feature, "values": values}]})
+    assert sweep.status_code == 200
+    single = client.post("/", json=dict(house, purpose="buy")).get_json()
+    base = sweep.get_json()
+    assert base["base"]["features"]["zipcode"] == 98103
+    assert base["base"]["predicted_price"] == pytest.approx(single["predicted_price"], rel=TOLERANCE)
+    # values[1] is the base property itself
+    assert base["prices"][1] == pytest.approx(base["base"]["predicted_price"], rel=TOLERANCE)
+
+
+@pytest.mark.parametrize("vary, message", [
+    ([{"feature": "purpose", "values": ["buy"]}], "Cannot vary"),
+    ([{"feature": "no_of_bedrooms", "values": [2.5]}], "whole numbers"),
+    ([{"feature": "sqft_living", "start": 1000, "stop": 2000}], "missing"),
+    ([{"feature": "zipcode", "values": [12345]}], "Invalid zipcode"),
+    ([{"feature": "sqft_living", "values": [1000]}, {"feature": "sqft_living", "values": [2000]}], "one axis"),
+    ([{"feature": "sqft_living", "start": 1000, "stop": 1100, "step": 1}, {"feature": "zipcode", "values": [98001] * 10}],
+     "when varying the zipcode"),
+])
+def test_validate_sweep_rejects_bad_axes(house, vary, message):
+    with pytest.raises(ValueError, match=message):
+        predict.validate_sweep({"property": house, "vary": vary})
@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+import pytest
+
+from model import train_model
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", train_model.data_path)
+
+
+@pytest.fixture
+def small_cache(tmp_path, monkeypatch):
+    data = tmp_path / "data.csv"
+    pd.read_csv(DATA_PATH).iloc[:300].to_csv(data, index=False)
+    monkeypatch.setattr(train_model, "LGBM_PARAMS", dict(train_model.LGBM_PARAMS, n_estimators=5))
+    monkeypatch.setattr(train_model, "PARAM_GRID", {"num_leaves": [7, 15]})
+    return train_model.feature_cache(str(data), str(tmp_path / "cache"))
+
+
+def no_search(*args, **kwargs):
+    raise AssertionError("the search was rerun")
+
+
+def test_search_results_are_reused_until_the_search_space_changes(small_cache, monkeypatch):
+    best = train_model.search(small_cache, "dense", folds=2, workers=1, n_jobs=1)
+    assert best["num_leaves"] in (7, 15)
+
+    monkeypatch.setattr(train_model, "ProcessPoolExecutor", no_search)
+    assert train_model.search(small_cache, "dense", folds=2, workers=1, n_jobs=1) == best
+    # A different grid, fold count or forced run is searched again
+    for call in (lambda: train_model.search(small_cache, "dense", folds=3, workers=1, n_jobs=1),
+                 lambda: train_model.search(small_cache, "dense", folds=2, workers=1, n_jobs=1, force=True)):
+        with pytest.raises(AssertionError, match="rerun"):
+            call()
+    monkeypatch.setattr(train_model, "PARAM_GRID", {"num_leaves": [7, 31]})
+    with pytest.raises(AssertionError, match="rerun"):
+        train_model.search(small_cache, "dense", folds=2, workers=1, n_jobs=1)
+
+
+def test_feature_cache_is_keyed_by_the_data(small_cache, tmp_path, capsys):
+    data = tmp_path / "data.csv"
+    assert train_model.feature_cache(str(data), str(tmp_path / "cache")) == small_cache
+    assert "Reusing cached features" in capsys.readouterr().out
+    pd.read_csv(data).iloc[:200].to_csv(data, index=False)
+    assert train_model.feature_cache(str(data), str(tmp_path / "cache")) != small_cache
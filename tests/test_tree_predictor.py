@@ -0,0 +1,51 @@
+import joblib
+import numpy as np
+import pytest
+
+from config import Config
+from model.tree_predictor import TreePredictor
+
+TOLERANCE = 1e-9  # On the log-price scale
+
+
+@pytest.fixture(scope="module")
+def model():
+    return joblib.load(Config.MODEL_PATH)
+
+
+@pytest.fixture(scope="module")
+def trees():
+    return TreePredictor.load(Config.TREES_PATH)
+
+
+@pytest.fixture(scope="module")
+def X(loaded, training_rows):
+    return loaded.feature_builder.build_many(training_rows[::4])
+
+
+def test_from_dump_matches_lightgbm(model, X):
+    trees = TreePredictor.from_dump(model.booster_.dump_model())
+    assert np.abs(trees.predict(X) - model.predict(X)).max() < TOLERANCE
+
+
+def test_load_matches_lightgbm(model, trees, X):
+    assert np.abs(trees.predict(X) - model.predict(X)).max() < TOLERANCE
+    assert np.abs(trees.predict(X[:1]) - model.predict(X[:1])).max() < TOLERANCE
+
+
+def test_chunked_predict_matches_whole_batch(trees, X):
+    assert np.array_equal(trees.predict(X, chunk_size=7), trees.predict(X))
+
+
+@pytest.mark.parametrize("axes", [
+    [("sqft_living", list(range(800, 4001, 200)))],
+    [("sqft_living", list(range(1000, 3001, 500))), ("no_of_bathrooms", [1, 1.5, 2, 3, 4.5])],
+    [("house_age", [0, 5, 30, 80]), ("zipcode", [98001, 98052, 98103, 98999])],
+    [("zipcode", [98103, 98001, 98052]), ("sqft_living", [3000, 900, 1800, 2400])],
+    [("sqft_lot", [2000, 8000]), ("zipcode", [98001, 98052, 98103]), ("no_of_bedrooms", [1, 3, 5]),
+     ("house_age", [40, 2, 90])],
+])
+def test_predict_grid_matches_predict(loaded, trees, house, sweep_grid, axes):
+    X = loaded.feature_builder.build_many(sweep_grid(house, axes))
+    shape = tuple(len(values) for _, values in axes)
+    assert np.abs(trees.predict_grid(X, shape) - trees.predict(X)).max() < TOLERANCE
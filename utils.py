@@ -0,0 +1,61 @@
+"""
+Small helpers shared by the app and model packages (kept outside both, so the training and
+registry CLIs can use them without creating the Flask app).
+"""
+import contextlib
+import os
+import threading
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode="wb"):
+    """Opens a temporary file next to path and moves it into place on success, so readers never
+    see a partial file. On error the temporary file is removed and path is left as it was."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, mode) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+class ForkSafeThread:
+    """Mixin for objects served by one background daemon thread.
+
+    ensure_started() starts the thread on first use, and again in a forked worker: threads do
+    not survive fork, so each process runs its own. Subclasses set thread_name and implement
+    _run(); _on_start() runs under the lock just before the thread starts, to set up
+    per-process state (queues, events), and returns the arguments passed to _run().
+    """
+
+    thread_name = "background"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None  # Process the thread was started in
+        self._thread = None
+
+    @property
+    def started(self):
+        """Whether the thread is running in this process."""
+        return self._pid == os.getpid()
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            args = self._on_start()
+            self._thread = threading.Thread(target=self._run, args=args, name=self.thread_name, daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _on_start(self):
+        return ()
+
+    def _run(self):
+        raise NotImplementedError